@@ -0,0 +1,77 @@
+'''Measure how long importing eodclient takes
+
+Runs a fresh interpreter for each sample so nothing is cached in
+sys.modules, and exits non-zero when the median is over the budget
+
+    python benchmarks/import_time.py --budget 0.05
+'''
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = {
+    'import eodclient': 'import eodclient',
+    'exchange codes': 'from eodclient.exchange import EXCHANGE_CODES',
+    'first name': 'from eodclient import Symbol',
+}
+
+TIMER = '''
+import time
+start = time.perf_counter()
+{statement}
+print(time.perf_counter() - start)
+'''
+
+
+def sample(statement, samples):
+    '''Import times in seconds for statement, one interpreter per sample'''
+    env = dict(os.environ)
+    env.pop('EOD_API_KEY', None)
+    times = []
+    for _ in range(samples):
+        output = subprocess.run(
+            [sys.executable, '-c', TIMER.format(statement=statement)],
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True
+        ).stdout
+        times.append(float(output))
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=20)
+    parser.add_argument(
+        '--budget', type=float, default=0.05,
+        help='maximum median seconds for import eodclient')
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for name, statement in STATEMENTS.items():
+        times = sample(statement, args.samples)
+        results[name] = {
+            'median': statistics.median(times),
+            'min': min(times),
+            'max': max(times),
+        }
+        print(f"{ name:<20} median { results[name]['median'] * 1000:8.2f} ms"
+              f"  min { results[name]['min'] * 1000:8.2f} ms")
+
+    if args.json:
+        with open(args.json, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if results['import eodclient']['median'] > args.budget:
+        print(f'import eodclient is over the { args.budget }s budget')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+'''Compare the json decoders on payloads shaped like the api's responses
+
+Decodes an end of day history, an exchange listing and a real time chunk
+with every installed backend, both into plain records and, for the
+history, straight into an EODSeries
+
+    python benchmarks/json_decoding.py --history-years 30 --json results.json
+'''
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eodclient import decoding  # noqa: E402
+from eodclient.series import EODSeries, np  # noqa: E402
+from eodclient.tests import stub_server  # noqa: E402
+
+
+def payloads(history_years, symbols, chunk_size):
+    '''Name to json body of each benchmarked response'''
+    end = datetime.date(2020, 3, 31)
+    start = end - datetime.timedelta(days=int(history_years * 365))
+    return {
+        'eod history': json.dumps(stub_server.bars(start, end)).encode(),
+        'exchange listing': json.dumps(
+            stub_server.symbols('US', symbols)).encode(),
+        'real time chunk': json.dumps([
+            stub_server.quote(f'S{ index }.US') for index in range(chunk_size)
+        ]).encode(),
+    }
+
+
+def best_time(function, repeats):
+    '''The fastest of repeats calls in seconds'''
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--history-years', type=float, default=30,
+                        help='years of end of day history')
+    parser.add_argument('--symbols', type=int, default=50000,
+                        help='symbols in the exchange listing')
+    parser.add_argument('--chunk-size', type=int, default=20,
+                        help='quotes in the real time chunk')
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--json', help='write the results to this file')
+    args = parser.parse_args()
+
+    decoders = []
+    for name in decoding.BACKENDS:
+        try:
+            decoders.append(decoding.get_decoder(name))
+        except ImportError as error:
+            print(error, file=sys.stderr)
+
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': vars(args),
+        'runs': {},
+    }
+    bodies = payloads(args.history_years, args.symbols, args.chunk_size)
+    for payload, body in bodies.items():
+        print(f'{ payload } { len(body) / 1024:.1f} KiB')
+        cases = [('records', lambda decoder: decoder.loads(body))]
+        if payload == 'eod history' and np is not None:
+            cases.append(('series', lambda decoder: EODSeries.from_json(
+                body, decoder)))
+        for case, function in cases:
+            for decoder in decoders:
+                seconds = best_time(
+                    lambda: function(decoder), args.repeats)
+                results['runs'][f'{ payload } { case } { decoder.name }'] = {
+                    'bytes': len(body),
+                    'ms': seconds * 1000,
+                    'mb_per_second': len(body) / seconds / 2**20,
+                }
+                print(f'  { case:<8} { decoder.name:<9}'
+                      f'{ seconds * 1000:9.3f} ms'
+                      f'{ len(body) / seconds / 2**20:9.0f} MiB/s')
+
+    if args.json:
+        with open(args.json, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,308 @@
+'''Measure client throughput and latency against a local stub api
+
+Runs Symbol, SymbolSet and Exchange requests serially, on a thread pool
+and with asyncio against the stub server used by the tests. The stub runs
+in its own process so its work does not compete with the client for the
+GIL, results only depend on the client and the configured latency and
+payload sizes
+
+    python benchmarks/throughput.py --latency 0.02 --json results.json
+    python benchmarks/throughput.py --compare results.json
+
+With --compare the run exits non-zero when any requests per second drop
+by more than --tolerance from the saved results
+'''
+
+import argparse
+import asyncio
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from eodclient import aio  # noqa: E402
+from eodclient.client import Client, set_client  # noqa: E402
+from eodclient.exchange import Exchange  # noqa: E402
+from eodclient.retry import RetryPolicy  # noqa: E402
+from eodclient.symbol import Symbol, SymbolSet  # noqa: E402
+from eodclient.tests.stub_server import StubServer  # noqa: E402
+
+SET_SIZE = 100
+
+
+def symbol_code(index):
+    return f'S{ index % 1000 }'
+
+
+def symbol_set(index, cls=SymbolSet, **kwargs):
+    return cls(
+        [
+            {'code': symbol_code(index + offset), 'exchange_code': 'US'}
+            for offset in range(SET_SIZE)
+        ],
+        **kwargs
+    )
+
+
+# name: (sync operation, async operation, endpoint parsed)
+OPERATIONS = {
+    'Symbol.get_real_time': (
+        lambda index: Symbol(symbol_code(index), 'US').get_real_time(),
+        lambda index, session: aio.AsyncSymbol(
+            symbol_code(index), 'US', session=session).get_real_time(),
+        'real-time/AAPL.US?fmt=json',
+    ),
+    'Symbol.get_end_of_day': (
+        lambda index: Symbol(symbol_code(index), 'US').get_end_of_day(),
+        lambda index, session: aio.AsyncSymbol(
+            symbol_code(index), 'US', session=session).get_end_of_day(),
+        'eod/AAPL.US?fmt=json',
+    ),
+    'SymbolSet.get_real_time': (
+        lambda index: symbol_set(index).get_real_time(),
+        lambda index, session: symbol_set(
+            index, aio.AsyncSymbolSet, session=session).get_real_time(),
+        'real-time/S0.US?fmt=json&s=' + ','.join(
+            f'S{ index }.US' for index in range(1, 20)),
+    ),
+    'Exchange.get_symbols': (
+        lambda index: Exchange('US').get_symbols(),
+        lambda index, session: aio.AsyncExchange(
+            'US', session=session).get_symbols(),
+        'exchanges/US?fmt=json',
+    ),
+}
+
+
+class StubProcess(object):
+    '''A StubServer running in a child process'''
+    def __init__(self, **kwargs):
+        self.connection, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=self.serve, args=(child, kwargs), daemon=True)
+
+    @staticmethod
+    def serve(connection, kwargs):
+        with StubServer(**kwargs) as server:
+            connection.send(server.url)
+            while connection.recv() != 'stop':
+                connection.send(len(server.requests))
+
+    def __enter__(self):
+        self.process.start()
+        self.url = self.connection.recv()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.connection.send('stop')
+        self.process.join()
+
+    @property
+    def request_count(self):
+        '''Requests the stub has answered'''
+        self.connection.send('count')
+        return self.connection.recv()
+
+
+def percentile(values, fraction):
+    '''The value at fraction of the sorted values'''
+    ordered = sorted(values)
+    return ordered[int(fraction * (len(ordered) - 1))]
+
+
+def timed(operation, index):
+    start = time.perf_counter()
+    operation(index)
+    return time.perf_counter() - start
+
+
+def run_serial(operation, count, workers):
+    return [timed(operation, index) for index in range(count)]
+
+
+def run_threaded(operation, count, workers):
+    with ThreadPoolExecutor(workers) as executor:
+        return list(executor.map(
+            lambda index: timed(operation, index), range(count)))
+
+
+def run_async(operation, count, workers):
+    async def timed_async(index, session):
+        start = time.perf_counter()
+        await operation(index, session)
+        return time.perf_counter() - start
+
+    async def main():
+        async with aio.AsyncSession(concurrency=workers) as session:
+            return await asyncio.gather(*[
+                timed_async(index, session) for index in range(count)
+            ])
+
+    return asyncio.run(main())
+
+
+MODES = {
+    'serial': run_serial,
+    'threaded': run_threaded,
+    'async': run_async,
+}
+
+
+def peak_memory(operation, count):
+    '''Peak bytes allocated while running count operations serially'''
+    tracemalloc.start()
+    try:
+        for index in range(count):
+            operation(index)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def parse_time(client, endpoint, repeats=20):
+    '''Seconds to decode an endpoint's response and its size in bytes'''
+    content = client.session.get(client.url(endpoint)).content
+    start = time.perf_counter()
+    for _ in range(repeats):
+        client.decoder.loads(content)
+    return (time.perf_counter() - start) / repeats, len(content)
+
+
+def benchmark(server, name, mode, count, workers):
+    '''Run one operation in one mode and summarise it'''
+    sync_operation, async_operation, endpoint = OPERATIONS[name]
+    operation = async_operation if mode == 'async' else sync_operation
+    requests_before = server.request_count
+    start = time.perf_counter()
+    latencies = MODES[mode](operation, count, workers)
+    seconds = time.perf_counter() - start
+    requests = server.request_count - requests_before
+    return {
+        'operations': count,
+        'requests': requests,
+        'seconds': seconds,
+        'operations_per_second': count / seconds,
+        'requests_per_second': requests / seconds,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+    }
+
+
+def compare(results, baseline, tolerance):
+    '''The names whose requests per second dropped by more than tolerance'''
+    regressions = []
+    for key, result in results['runs'].items():
+        previous = baseline.get('runs', {}).get(key)
+        if previous is None:
+            continue
+        floor = previous['requests_per_second'] * (1 - tolerance)
+        if result['requests_per_second'] < floor:
+            regressions.append(
+                f"{ key }: { result['requests_per_second']:.0f} requests/s, "
+                f"was { previous['requests_per_second']:.0f}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--operations', type=int, default=200,
+                        help='operations per benchmark')
+    parser.add_argument('--workers', type=int, default=8,
+                        help='threads or concurrent tasks')
+    parser.add_argument('--latency', type=float, default=0.005,
+                        help='seconds the stub waits before each response')
+    parser.add_argument('--symbols', type=int, default=5000,
+                        help='symbols listed on an exchange')
+    parser.add_argument('--history-years', type=float, default=5,
+                        help='years of end of day history per symbol')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='share of requests answered with a 500')
+    parser.add_argument('--only', action='append', choices=list(OPERATIONS),
+                        help='run only these operations')
+    parser.add_argument('--modes', nargs='+', choices=list(MODES),
+                        default=list(MODES))
+    parser.add_argument('--json', help='write the results to this file')
+    parser.add_argument('--compare', help='results file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2)
+    args = parser.parse_args()
+
+    if aio.aiohttp is None and 'async' in args.modes:
+        print('aiohttp is not installed, skipping async', file=sys.stderr)
+        args.modes.remove('async')
+
+    history_start = datetime.date(2020, 3, 31) - datetime.timedelta(
+        days=int(args.history_years * 365))
+    settings = {
+        'operations': args.operations,
+        'workers': args.workers,
+        'latency': args.latency,
+        'symbols': args.symbols,
+        'history_years': args.history_years,
+        'error_rate': args.error_rate,
+    }
+    results = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': settings,
+        'runs': {},
+        'parse': {},
+        'memory': {},
+    }
+    with StubProcess(
+            latency=args.latency,
+            symbol_count=args.symbols,
+            history_start=history_start,
+            error_rate=args.error_rate,
+            seed=0) as server:
+        client = Client(
+            api_key='benchmark',
+            api_url=server.url,
+            pool_maxsize=args.workers,
+            retry_policy=RetryPolicy(backoff=0.01)
+        )
+        set_client(client)
+        for name in args.only or list(OPERATIONS):
+            parse_seconds, size = parse_time(client, OPERATIONS[name][2])
+            results['parse'][name] = {
+                'bytes': size, 'parse_ms': parse_seconds * 1000}
+            results['memory'][name] = {
+                'peak_bytes': peak_memory(
+                    OPERATIONS[name][0], min(args.operations, 10))}
+            for mode in args.modes:
+                run = benchmark(
+                    server, name, mode, args.operations, args.workers)
+                results['runs'][f'{ name } { mode }'] = run
+                print(f"{ name:<26} { mode:<9}"
+                      f"{ run['requests_per_second']:9.0f} req/s"
+                      f"  p50 { run['p50_ms']:8.2f} ms"
+                      f"  p99 { run['p99_ms']:8.2f} ms")
+            print(f"{ name:<26} parse    "
+                  f"{ results['parse'][name]['parse_ms']:9.3f} ms"
+                  f"  { size / 1024:9.1f} KiB"
+                  f"  peak { results['memory'][name]['peak_bytes'] / 2**20:.1f}"
+                  ' MiB')
+        client.close()
+
+    if args.json:
+        with open(args.json, 'w') as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(
+                results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f'regression { regression }')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,57 @@
-'''Initialise the eod client with api tokem in session'''
+'''Initialise the eod client
 
+Importing the package is cheap: submodules are loaded when their names are
+first used and the http session is created by the Client on the first
+request'''
+
+import importlib
 import os
-import requests
 
-from .errors import APIKeyMissingError
+from .client import Client, get_client, set_client
 
-__all__ = []
+__all__ = ['Client', 'get_client', 'set_client']
 
 EOD_API_KEY = os.environ.get('EOD_API_KEY', None)
 
-if EOD_API_KEY is None:
-    raise APIKeyMissingError(
-        "All methods require an EOD_API_KEY env variable from "
-        "https://eodhistoricaldata.com/"
-    )
+_LAZY_NAMES = {
+    'Symbol': 'symbol',
+    'SymbolSet': 'symbol',
+    'Exchange': 'exchange',
+    'exchange_for_symbol': 'exchange',
+    'EODPanel': 'series',
+    'EODSeries': 'series',
+    'EODTable': 'series',
+    'SymbolUniverse': 'universe',
+}
+_CLIENT_ATTRIBUTES = ('session', 'rate_limiter', 'retry_policy')
+_SUBMODULES = (
+    'adapter', 'adjust', 'aio', 'backfill', 'cache', 'chunking', 'client',
+    'concurrency', 'dates', 'decoding', 'errors', 'exchange', 'instrument',
+    'parquet', 'poller', 'quotes', 'ratelimit', 'retry', 'series', 'shared',
+    'stream', 'symbol', 'universe'
+)
+
+__all__ += list(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    '''Load submodules and their public names on first use
+
+    session, rate_limiter, retry_policy and API_URL are those of the
+    default client'''
+    if name in _LAZY_NAMES:
+        module = importlib.import_module(f'.{ _LAZY_NAMES[name] }', __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    if name in _CLIENT_ATTRIBUTES:
+        return getattr(get_client(), name)
+    if name == 'API_URL':
+        return get_client().api_url
+    if name in _SUBMODULES:
+        return importlib.import_module(f'.{ name }', __name__)
+    raise AttributeError(f'module { __name__ !r} has no attribute { name !r}')
 
-session = requests.Session()
-session.params = {}
-session.params['api_token'] = EOD_API_KEY
 
-from .symbol import *
-__all__ += symbol.__all__
-from .exchange import *
-__all__ += exchange.__all__
\ No newline at end of file
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_SUBMODULES))
@@ -0,0 +1,134 @@
+'''Transport adapter applying rate limits and retries to every request'''
+
+import socket
+import threading
+import time
+
+from requests.adapters import HTTPAdapter
+from requests.exceptions import ConnectionError, Timeout
+from urllib3.connection import HTTPConnection
+
+from .client import DEFAULT_TIMEOUT
+from .ratelimit import request_cost
+
+__all__ = ['PoolStats']
+
+KEEPALIVE_OPTIONS = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+
+
+class PoolStats(object):
+    '''Counts of connections opened and requests sent through the pools
+
+    A reuse ratio near 1 means requests are riding on pooled connections,
+    a low one under load means pool_maxsize is smaller than the number of
+    workers and connections are being thrown away'''
+    def __init__(self):
+        self.connections_opened = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def opened(self):
+        with self._lock:
+            self.connections_opened += 1
+
+    def sent(self):
+        with self._lock:
+            self.requests += 1
+
+    @property
+    def reused(self):
+        '''Requests sent on a connection opened for an earlier one'''
+        return max(self.requests - self.connections_opened, 0)
+
+    @property
+    def reuse_ratio(self):
+        '''The share of requests that reused a pooled connection'''
+        if not self.requests:
+            return 0.0
+        return self.reused / self.requests
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'connections_opened': self.connections_opened,
+                'requests': self.requests,
+                'reused': self.reused,
+                'reuse_ratio': self.reuse_ratio,
+            }
+
+
+def counting_pool_class(pool_class, stats):
+    '''A subclass of a urllib3 connection pool counting into stats'''
+    class CountingPool(pool_class):
+        def _new_conn(self):
+            stats.opened()
+            return super()._new_conn()
+
+        def _make_request(self, *args, **kwargs):
+            stats.sent()
+            return super()._make_request(*args, **kwargs)
+
+    CountingPool.__name__ = f'Counting{ pool_class.__name__ }'
+    return CountingPool
+
+
+class EODAdapter(HTTPAdapter):
+    '''Wait on a RateLimiter before each attempt and retry transient
+    failures with a RetryPolicy
+
+    Each request is retried on its own, so one failed chunk of a set is
+    sent again rather than the whole set. Requests made without a timeout
+    use DEFAULT_TIMEOUT (connect, read) seconds. Connections are counted
+    into pool_stats and keepalive turns on TCP keep-alive probes so idle
+    pooled connections are not silently dropped by middleboxes'''
+    def __init__(self, rate_limiter, retry_policy=None,
+                 timeout=DEFAULT_TIMEOUT, *, pool_stats=None, keepalive=True,
+                 **kwargs):
+        self.rate_limiter = rate_limiter
+        self.retry_policy = retry_policy
+        self.timeout = timeout
+        self.pool_stats = pool_stats or PoolStats()
+        self.keepalive = keepalive
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **pool_kwargs):
+        if self.keepalive:
+            pool_kwargs.setdefault(
+                'socket_options',
+                HTTPConnection.default_socket_options + KEEPALIVE_OPTIONS
+            )
+        super().init_poolmanager(*args, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: counting_pool_class(pool_class, self.pool_stats)
+            for scheme, pool_class
+            in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+    def send(self, request, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout
+        cost = request_cost(request.url)
+        policy = self.retry_policy
+        if policy is None:
+            self.rate_limiter.acquire(cost)
+            return super().send(request, **kwargs)
+
+        deadline = policy.start()
+        attempt = 0
+        while True:
+            self.rate_limiter.acquire(cost)
+            try:
+                response = super().send(request, **kwargs)
+            except (ConnectionError, Timeout):
+                delay = policy.delay(attempt)
+                if not policy.should_retry(attempt, delay, deadline):
+                    raise
+            else:
+                if response.status_code not in policy.statuses:
+                    return response
+                delay = policy.delay(attempt, response.headers)
+                if not policy.should_retry(attempt, delay, deadline):
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
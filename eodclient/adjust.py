@@ -0,0 +1,169 @@
+'''Split and dividend adjustment of end of day history computed locally
+
+Requires numpy, install with ``pip install eodclient[numpy]``'''
+
+from .series import EODSeries, np, require_numpy
+
+__all__ = ['AdjustmentFactors', 'adjustment_drift', 'readjust']
+
+PRICE_FIELDS = ('open', 'high', 'low', 'close')
+DRIFT_TOLERANCE = 1e-5
+
+
+def split_ratio(split):
+    '''The shares after a split per share before, from the api's
+    4.000000/1.000000 form or a number'''
+    if isinstance(split, str):
+        after, separator, before = split.partition('/')
+        return float(after) / float(before or 1)
+    return float(split)
+
+
+def dividend_amount(dividend):
+    '''The cash paid per share in the prices of the day, the api's value
+    is itself adjusted for later splits'''
+    value = dividend.get('unadjustedValue')
+    if value is None:
+        value = dividend['value']
+    return float(value)
+
+
+def cumulative_factors(count, positions, factors):
+    '''The product of the factors of every event after each of count bars
+
+    positions is the index of the first bar on or after each event's ex
+    date, that bar and the ones after it are not affected'''
+    steps = np.ones(count + 1)
+    np.multiply.at(steps, positions, factors)
+    return np.cumprod(steps[::-1])[::-1][1:]
+
+
+class AdjustmentFactors(object):
+    '''Cumulative split and dividend factors of each bar of a history
+
+    split and dividend are float64 arrays the raw prices of each bar are
+    multiplied by to adjust for the events after it, total is their
+    product. A split divides the earlier prices by its ratio, a dividend
+    multiplies them by one less its amount over the last close before its
+    ex date, the method behind the api's adjusted_close'''
+    __slots__ = ('dates', 'split', 'dividend')
+
+    def __init__(self, dates, split, dividend):
+        require_numpy()
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        self.split = np.asarray(split, dtype=np.float64)
+        self.dividend = np.asarray(dividend, dtype=np.float64)
+
+    @classmethod
+    def from_events(cls, series, splits=(), dividends=()):
+        '''The factors of an EODSeries of raw bars for the split and
+        dividend dicts Symbol.get_splits and get_dividends return'''
+        require_numpy()
+        dates = series.dates
+        count = len(dates)
+
+        def positions(events):
+            return np.searchsorted(
+                dates,
+                np.array([event['date'] for event in events],
+                         dtype='datetime64[D]'),
+                side='left'
+            )
+
+        split = cumulative_factors(
+            count,
+            positions(splits),
+            [1 / split_ratio(event['split']) for event in splits]
+        )
+        dividend_positions = positions(dividends)
+        amounts = np.array(
+            [dividend_amount(event) for event in dividends], dtype=np.float64)
+        previous_close = series.close[np.maximum(dividend_positions - 1, 0)] \
+            if count else np.ones(len(amounts))
+        dividend = cumulative_factors(
+            count,
+            dividend_positions,
+            np.where(dividend_positions > 0, 1 - amounts / previous_close, 1.0)
+        )
+        return cls(dates, split, dividend)
+
+    @property
+    def total(self):
+        '''The split and dividend factor of each bar'''
+        return self.split * self.dividend
+
+    def apply(self, series):
+        '''An EODSeries of raw bars adjusted for splits and dividends
+
+        open, high, low and close are adjusted, adjusted_close is the
+        adjusted close and volume is multiplied by the split ratios so
+        the traded value stays the same'''
+        total = self.total
+        close = series.close * total
+        return EODSeries(
+            series.dates,
+            series.open * total,
+            series.high * total,
+            series.low * total,
+            close,
+            close,
+            series.volume / self.split
+        )
+
+
+def drift_ratios(stored, fresh, tolerance=DRIFT_TOLERANCE):
+    '''The close and adjusted_close ratios of a fresh bar to the stored
+    bar of the same date, None when both agree within tolerance'''
+    ratios = {}
+    for field in ('close', 'adjusted_close'):
+        if stored[field] and fresh[field]:
+            ratios[field] = fresh[field] / stored[field]
+        else:
+            ratios[field] = 1.0
+    if all(abs(ratio - 1) <= tolerance for ratio in ratios.values()):
+        return None
+    return ratios
+
+
+def adjustment_drift(stored, fresh, *, tolerance=DRIFT_TOLERANCE):
+    '''How stored history drifted from freshly fetched bars after a new
+    split or dividend
+
+    fresh is an EODSeries of recent bars overlapping the end of stored.
+    Every stored bar before the first date they share has to be
+    multiplied by the same ratios, returned as a dict of that date and
+    the close and adjusted_close ratios. None when they agree within the
+    relative tolerance. Raises ValueError when they share no date'''
+    shared, stored_index, fresh_index = np.intersect1d(
+        stored.dates, fresh.dates, assume_unique=True, return_indices=True)
+    if not len(shared):
+        raise ValueError('The fresh bars do not overlap the stored ones')
+    ratios = drift_ratios(
+        stored[int(stored_index[0])], fresh[int(fresh_index[0])], tolerance)
+    if ratios is None:
+        return None
+    return dict(ratios, date=str(shared[0]))
+
+
+def readjust(stored, fresh, *, tolerance=DRIFT_TOLERANCE):
+    '''Join stored history and fresh bars, rescaling the stored bars
+    before the overlap for any drift instead of downloading them again
+
+    The stored columns are rescaled in place unless they are read only,
+    such as when memory mapped. Returns the joined EODSeries and the
+    drift, see adjustment_drift'''
+    drift = adjustment_drift(stored, fresh, tolerance=tolerance)
+    if drift is None:
+        return EODSeries.concatenate([stored, fresh]), None
+    end = int(np.searchsorted(
+        stored.dates, np.datetime64(drift['date'], 'D'), side='left'))
+    scales = dict.fromkeys(PRICE_FIELDS, drift['close'])
+    scales['volume'] = 1 / drift['close']
+    scales['adjusted_close'] = drift['adjusted_close']
+    for field, scale in scales.items():
+        column = getattr(stored, field)
+        if not column.flags.writeable:
+            column = column.copy()
+            setattr(stored, field, column)
+        column[:end] *= scale
+    return EODSeries.concatenate([stored[:end], fresh]), drift
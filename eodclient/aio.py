@@ -0,0 +1,327 @@
+'''Asyncio versions of Symbol, SymbolSet and Exchange
+
+Requires aiohttp, install with ``pip install eodclient[async]``'''
+
+import asyncio
+import datetime
+import time
+import weakref
+from json.decoder import JSONDecodeError
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+from .chunking import CHUNK_SIZE, MAX_URL_LENGTH
+from .client import get_client
+from .dates import check_period, date_string, date_windows
+from .errors import Error, SymbolNotFoundError
+from .exchange import Exchange
+from .ratelimit import request_cost
+from .series import EODPanel, EODSeries
+from .symbol import Symbol, SymbolSet, join_end_of_day
+
+__all__ = ['AsyncSession', 'AsyncSymbol', 'AsyncSymbolSet', 'AsyncExchange']
+
+
+class AsyncSession(object):
+    '''A shared aiohttp connection pool with keep-alive
+
+    At most concurrency requests are in flight at once, callers over the
+    limit wait on a semaphore. The api key, url, timeouts, rate limiter
+    and retry policy are those of client, the default client if None.
+    Use as an async context manager or close it when done'''
+    def __init__(self, concurrency=20, pool_size=100, keepalive_timeout=30,
+                 client=None):
+        if aiohttp is None:
+            raise ImportError(
+                'The async client requires aiohttp: '
+                'pip install eodclient[async]'
+            )
+        self.concurrency = concurrency
+        self.pool_size = pool_size
+        self.keepalive_timeout = keepalive_timeout
+        self.client = client or get_client()
+        connect, read = self.client.timeout
+        self.timeout = aiohttp.ClientTimeout(
+            sock_connect=connect, sock_read=read)
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def _open(self):
+        '''Create the aiohttp session inside the running loop
+
+        The session belongs to the loop it was opened in, using it from
+        another loop raises RuntimeError until it is closed. A session
+        left open in a loop that has since closed is dropped and opened
+        again, its connections went with that loop'''
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed \
+                and self._loop.is_closed():
+            self._session.detach()
+        if self._session is not None and not self._session.closed:
+            if self._loop is not loop:
+                raise RuntimeError(
+                    'The AsyncSession is open in another event loop, '
+                    'close it there first or use a session per loop'
+                )
+            return self._session
+        connector = aiohttp.TCPConnector(
+            limit=self.pool_size,
+            keepalive_timeout=self.keepalive_timeout
+        )
+        self._session = aiohttp.ClientSession(connector=connector)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._loop = loop
+        return self._session
+
+    async def get(self, endpoint, params):
+        '''Get an endpoint and return the status code and the raw body
+
+        Transient failures are retried with the client's retry policy.
+        The client's hooks see each request'''
+        hooks = self.client.hooks
+        if not hooks:
+            return await self._get(endpoint, params)
+
+        from .instrument import RequestEvent
+
+        event = RequestEvent(endpoint, params)
+        for hook in hooks:
+            hook.before_request(event)
+        start = time.perf_counter()
+        try:
+            status, body = await self._get(endpoint, params)
+        except Exception as error:
+            event.error = error
+            raise
+        else:
+            event.status = status
+            event.bytes = len(body)
+        finally:
+            event.latency = time.perf_counter() - start
+            for hook in hooks:
+                hook.after_request(event)
+        return status, body
+
+    async def _get(self, endpoint, params):
+        session = self._open()
+        path = self.client.url(endpoint)
+        params = dict(params, api_token=self.client.api_token)
+        cost = request_cost(path, params)
+        rate_limiter = self.client.rate_limiter
+        retry_policy = self.client.retry_policy
+        deadline = retry_policy.start()
+        attempt = 0
+        while True:
+            await rate_limiter.acquire_async(cost)
+            try:
+                async with self._semaphore:
+                    async with session.get(
+                            path, params=params,
+                            timeout=self.timeout) as response:
+                        status = response.status
+                        body = await response.read()
+                        headers = response.headers
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                delay = retry_policy.delay(attempt)
+                if not retry_policy.should_retry(attempt, delay, deadline):
+                    raise
+            else:
+                if status not in retry_policy.statuses:
+                    return status, body
+                delay = retry_policy.delay(attempt, headers)
+                if not retry_policy.should_retry(attempt, delay, deadline):
+                    return status, body
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def loads(self, body):
+        '''Decode a json body with the client's decoder'''
+        return self.client.decoder.loads(body)
+
+    async def close(self):
+        '''Close the connection pool'''
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+            self._loop = None
+
+
+_default_sessions = weakref.WeakKeyDictionary()
+
+
+async def _close_at_shutdown(session):
+    '''An async generator closing session when the loop shuts down its
+    async generators, as asyncio.run does before closing the loop'''
+    try:
+        yield
+    finally:
+        await session.close()
+
+
+def get_session():
+    '''Get the session shared by async objects created without one
+
+    Each event loop gets its own, closed when asyncio.run shuts the loop
+    down'''
+    loop = asyncio.get_running_loop()
+    session = _default_sessions.get(loop)
+    if session is None:
+        session = _default_sessions[loop] = AsyncSession()
+        session._closer = _close_at_shutdown(session)
+        loop.create_task(session._closer.__anext__())
+    return session
+
+
+class AsyncSymbol(Symbol):
+    '''Class representing a single stock symbol with coroutine methods'''
+    def __init__(self, code, exchange_code, *, session=None):
+        '''Set the code, exchange code and optional AsyncSession'''
+        super().__init__(code, exchange_code)
+        self.session = session
+
+    async def get_real_time(self):
+        '''Get the real time data for a symbol'''
+        session = self.session or get_session()
+        status, body = await session.get(
+            f'real-time/{ self.code }.{ self.exchange_code }',
+            {'fmt': 'json'}
+        )
+        return session.loads(body)
+
+    async def get_end_of_day(self, *, from_date=None, to_date=None,
+                             period=None, window=None, columnar=False):
+        '''Get end of day data for a symbol, as an EODSeries with columnar
+
+        With window the date windows are requested concurrently, see
+        Symbol.get_end_of_day'''
+        check_period(period)
+        from_date = date_string(from_date)
+        to_date = date_string(to_date)
+        if window is None or from_date is None:
+            return await self._get_end_of_day_window(
+                from_date, to_date, period, columnar)
+        windows = date_windows(
+            from_date, to_date or datetime.date.today(), window, period)
+        parts = await asyncio.gather(*[
+            self._get_end_of_day_window(start, end, period, columnar)
+            for start, end in windows
+        ])
+        return join_end_of_day(parts, columnar)
+
+    async def _get_end_of_day_window(self, from_date, to_date, period,
+                                     columnar):
+        '''Get the end of day data between two dates in one request'''
+        session = self.session or get_session()
+        status, body = await session.get(
+            self._end_of_day_path(),
+            self._end_of_day_params(from_date, to_date, period)
+        )
+        if status == 404:
+            raise SymbolNotFoundError()
+        if columnar:
+            return EODSeries.from_json(body, session.client.decoder)
+        return session.loads(body)
+
+
+class AsyncSymbolSet(SymbolSet):
+    '''Class representing many stock symbols with coroutine methods'''
+    session = None
+
+    def __init__(self, symbol_list, *, session=None):
+        '''Ensure the symbol list is a list of dicts'''
+        super().__init__(symbol_list)
+        self.session = session
+
+    async def get_real_time(self, *, chunk_size=CHUNK_SIZE,
+                            max_url_length=MAX_URL_LENGTH):
+        '''Request the chunks of up to chunk_size shares concurrently
+        combine in symbol order at the end'''
+        chunk_results = await asyncio.gather(*[
+            self._get_real_time_chunk(chunk)
+            for chunk in self._real_time_chunks(
+                self.symbols, chunk_size, max_url_length)
+        ])
+        results = []
+        for result in chunk_results:
+            results.extend(result)
+        return results
+
+    async def get_end_of_day(self, *, from_date=None, to_date=None,
+                             period=None, join='outer'):
+        '''Get end of day data for every symbol concurrently
+
+        Returns an EODPanel like SymbolSet.get_end_of_day, a symbol that
+        fails is reported in the panel's errors'''
+        async def fetch(symbol):
+            try:
+                return await AsyncSymbol(
+                    symbol.code, symbol.exchange_code, session=self.session
+                ).get_end_of_day(
+                    from_date=from_date,
+                    to_date=to_date,
+                    period=period,
+                    columnar=True
+                ), None
+            except (Error, aiohttp.ClientError, asyncio.TimeoutError,
+                    ValueError) as error:
+                return None, error
+
+        results = await asyncio.gather(*[
+            fetch(symbol) for symbol in self.symbols])
+        series = {}
+        errors = {}
+        for symbol, (result, error) in zip(self.symbols, results):
+            key = f'{ symbol.code }.{ symbol.exchange_code }'
+            if error is None:
+                series[key] = result
+            else:
+                errors[key] = error
+        return EODPanel(series, errors, join=join)
+
+    async def _get_real_time_chunk(self, chunk):
+        '''Get the real time data for a chunk of up to 20 symbols'''
+        first = chunk[0]
+        path = f'real-time/{ first.code }.{ first.exchange_code }'
+        the_rest_string = ','.join(
+            [f'{s.code}.{s.exchange_code}' for s in chunk[1:]]
+        )
+        session = self.session or get_session()
+        status, body = await session.get(
+            path,
+            {
+                'fmt': 'json',
+                's': the_rest_string
+            }
+        )
+        result = session.loads(body)
+        if isinstance(result, dict):
+            result = [result]
+        return result
+
+
+class AsyncExchange(Exchange):
+    '''Exchange object with coroutine methods'''
+    def __init__(self, exchange_code=None, *, session=None):
+        '''The exchange code is required'''
+        super().__init__(exchange_code)
+        self.session = session
+
+    async def get_symbols(self):
+        '''Get all the symbols in the exchange'''
+        path = f'exchanges/{self.exchange_code}'
+        session = self.session or get_session()
+        status, body = await session.get(path, {'fmt': 'json'})
+        try:
+            return session.loads(body)
+        except JSONDecodeError:
+            return {'message': body.decode("utf-8")}
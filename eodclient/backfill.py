@@ -0,0 +1,274 @@
+'''Backfill the end of day history of whole exchanges into an EODCache'''
+
+import argparse
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .cache import EODCache
+from .client import Client, get_client, set_client
+from .concurrency import fetch_all
+from .ratelimit import RateLimiter
+
+__all__ = ['Backfill']
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def _init_worker(api_key, api_url, timeout, retry_policy, per_second,
+                 per_day):
+    '''Give a worker process its own client and share of the rate budget'''
+    set_client(Client(
+        api_key=api_key,
+        api_url=api_url,
+        timeout=timeout,
+        rate_limiter=RateLimiter(per_second=per_second, per_day=per_day),
+        retry_policy=retry_policy
+    ))
+
+
+def _fetch_shard(keys, from_date, to_date, threads):
+    '''Download the bars of code.exchange_code keys in a worker process
+
+    Returns (key, rows, error) for every key, error is None on success'''
+    from .errors import REQUEST_ERRORS
+    from .symbol import Symbol
+
+    def fetch(key):
+        code, exchange_code = key.rsplit('.', 1)
+        try:
+            rows = Symbol(code, exchange_code).get_end_of_day(
+                from_date=from_date, to_date=to_date)
+        except REQUEST_ERRORS as error:
+            return key, None, f'{ type(error).__name__ }: { error }'
+        return key, rows, None
+
+    return fetch_all(fetch, keys, workers=threads)
+
+
+class Backfill(object):
+    '''Download the full history of every symbol listed on exchanges
+
+    Symbols are sharded across processes, each running threads requests
+    at a time with its own client. per_second and per_day are the budget
+    of the whole run and every process gets an equal share. Workers only
+    download, the parent writes each shard into the EODCache at path and
+    checkpoints the symbols in a backfill table of the same file, so an
+    interrupted run resumes with the symbols that were not finished.
+    Symbols that failed are tried again on the next run'''
+    def __init__(self, path, exchange_codes=None, *, from_date=None,
+                 to_date=None, processes=4, threads=4, shard_size=50,
+                 per_second=None, per_day=None):
+        if exchange_codes is None:
+            from .exchange import EXCHANGES
+            exchange_codes = list(EXCHANGES)
+        self.path = path
+        self.exchange_codes = list(exchange_codes)
+        self.from_date = from_date
+        self.to_date = to_date
+        self.processes = processes
+        self.threads = threads
+        self.shard_size = shard_size
+        self.per_second = per_second
+        self.per_day = per_day
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS backfill ('
+                'symbol TEXT PRIMARY KEY, exchange_code TEXT, status TEXT, '
+                'rows INTEGER, error TEXT)'
+            )
+
+    def plan(self):
+        '''List the symbols of exchanges not yet in the checkpoint
+
+        Exchanges already listed by an earlier run keep their listing so
+        a resumed run works through the same symbols. Returns a dict of
+        the error of each exchange that could not be listed, those are
+        listed again on the next run'''
+        from .errors import REQUEST_ERRORS
+        from .exchange import Exchange
+        from .universe import SymbolUniverse
+
+        listed = {
+            row[0] for row in self._connection.execute(
+                'SELECT DISTINCT exchange_code FROM backfill')
+        }
+        errors = {}
+        for exchange_code in self.exchange_codes:
+            if exchange_code in listed:
+                continue
+            try:
+                universe = SymbolUniverse.from_exchange(
+                    Exchange(exchange_code))
+            except REQUEST_ERRORS as error:
+                errors[exchange_code] = error
+                continue
+            with self._connection:
+                self._connection.executemany(
+                    'INSERT OR IGNORE INTO backfill (symbol, exchange_code, '
+                    'status) VALUES (?, ?, ?)',
+                    [
+                        (f'{ listing["Code"] }.{ exchange_code }',
+                         exchange_code, PENDING)
+                        for listing in universe
+                    ]
+                )
+        return errors
+
+    def pending(self):
+        '''The code.exchange_code keys still to download'''
+        placeholders = ', '.join('?' * len(self.exchange_codes))
+        return [
+            row[0] for row in self._connection.execute(
+                'SELECT symbol FROM backfill WHERE status != ? AND '
+                f'exchange_code IN ({ placeholders }) ORDER BY symbol',
+                [DONE] + self.exchange_codes
+            )
+        ]
+
+    def status(self):
+        '''The number of symbols in each checkpoint status'''
+        return dict(self._connection.execute(
+            'SELECT status, COUNT(*) FROM backfill GROUP BY status'))
+
+    def failures(self):
+        '''The error of each symbol that failed'''
+        return dict(self._connection.execute(
+            'SELECT symbol, error FROM backfill WHERE status = ?', (FAILED,)))
+
+    def run(self, progress=None):
+        '''Download every pending symbol and return the throughput
+
+        progress is called with the report after each shard is stored.
+        The report's exchange_errors holds the error of each exchange
+        that could not be listed'''
+        exchange_errors = self.plan()
+        keys = self.pending()
+        shards = [
+            keys[index:index + self.shard_size]
+            for index in range(0, len(keys), self.shard_size)
+        ]
+        report = {
+            'symbols': 0,
+            'rows': 0,
+            'failed': 0,
+            'remaining': len(keys),
+            'seconds': 0.0,
+            'symbols_per_second': 0.0,
+            'rows_per_second': 0.0,
+            'exchange_errors': exchange_errors,
+        }
+        if not shards:
+            return report
+
+        client = get_client()
+        processes = min(self.processes, len(shards))
+        per_second = self.per_second and self.per_second / processes
+        per_day = self.per_day and self.per_day // processes
+        cache = EODCache(self.path)
+        start = time.monotonic()
+        executor = ProcessPoolExecutor(
+            processes,
+            initializer=_init_worker,
+            initargs=(client.api_token, client.api_url, client.timeout,
+                      client.retry_policy, per_second, per_day)
+        )
+        futures = [
+            executor.submit(
+                _fetch_shard, shard, self.from_date, self.to_date,
+                self.threads)
+            for shard in shards
+        ]
+        try:
+            for future in as_completed(futures):
+                for key, rows, error in future.result():
+                    self._store(cache, key, rows, error)
+                    report['remaining'] -= 1
+                    if error is None:
+                        report['symbols'] += 1
+                        report['rows'] += len(rows)
+                    else:
+                        report['failed'] += 1
+                seconds = time.monotonic() - start
+                report['seconds'] = seconds
+                report['symbols_per_second'] = report['symbols'] / seconds
+                report['rows_per_second'] = report['rows'] / seconds
+                if progress is not None:
+                    progress(dict(report))
+        finally:
+            for future in futures:
+                future.cancel()
+            executor.shutdown()
+            cache.close()
+        return report
+
+    def _store(self, cache, key, rows, error):
+        '''Write a symbol's bars and mark it in the checkpoint'''
+        if error is None:
+            cache.invalidate(key)
+            cache.store(key, rows, from_date=self.from_date)
+            status, count = DONE, len(rows)
+        else:
+            status, count = FAILED, None
+        with self._connection:
+            self._connection.execute(
+                'UPDATE backfill SET status = ?, rows = ?, error = ? '
+                'WHERE symbol = ?',
+                (status, count, error, key)
+            )
+
+    def close(self):
+        '''Close the checkpoint connection'''
+        self._connection.close()
+
+
+def main(argv=None):
+    '''Backfill exchanges from the command line'''
+    parser = argparse.ArgumentParser(
+        prog='python -m eodclient.backfill',
+        description='Download the end of day history of exchanges into an '
+                    'sqlite store, run again to resume')
+    parser.add_argument('exchange_codes', nargs='*',
+                        help='exchanges to backfill, default every exchange')
+    parser.add_argument('--store', default='eod_cache.sqlite')
+    parser.add_argument('--from-date')
+    parser.add_argument('--to-date')
+    parser.add_argument('--processes', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--per-second', type=float)
+    parser.add_argument('--per-day', type=int)
+    args = parser.parse_args(argv)
+
+    def progress(report):
+        print(
+            f'{ report["symbols"] } symbols { report["rows"] } rows '
+            f'{ report["failed"] } failed { report["remaining"] } remaining, '
+            f'{ report["symbols_per_second"]:.1f} symbols/s '
+            f'{ report["rows_per_second"]:.0f} rows/s',
+            file=sys.stderr
+        )
+
+    backfill = Backfill(
+        args.store,
+        args.exchange_codes or None,
+        from_date=args.from_date,
+        to_date=args.to_date,
+        processes=args.processes,
+        threads=args.threads,
+        per_second=args.per_second,
+        per_day=args.per_day
+    )
+    try:
+        report = backfill.run(progress)
+        for exchange_code, error in report['exchange_errors'].items():
+            print(f'{ exchange_code } not listed: { error }', file=sys.stderr)
+    finally:
+        backfill.close()
+
+
+if __name__ == '__main__':
+    main()
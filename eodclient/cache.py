@@ -0,0 +1,189 @@
+'''Persistent on-disk store of end of day bars'''
+
+import datetime
+import sqlite3
+import threading
+
+from .dates import date_string
+
+__all__ = ['EODCache']
+
+EOD_FIELDS = [
+    'date', 'open', 'high', 'low', 'close', 'adjusted_close', 'volume']
+
+
+def symbol_key(symbol):
+    '''The store key for a Symbol or a code.exchange_code string'''
+    if isinstance(symbol, str):
+        return symbol
+    return f'{ symbol.code }.{ symbol.exchange_code }'
+
+
+class EODCache(object):
+    '''Store end of day bars in sqlite keyed by code.exchange_code
+
+    The first request for a symbol downloads its history. Later requests
+    only ask the api for bars after the last stored date and merge them
+    in, past daily bars never change. Safe to share between threads,
+    requests to the api are made outside the store's lock'''
+    def __init__(self, path='eod_cache.sqlite'):
+        '''Open or create the sqlite store at path'''
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.RLock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS symbols ('
+                'symbol TEXT PRIMARY KEY, from_date TEXT)'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS bars ('
+                'symbol TEXT, date TEXT, open REAL, high REAL, low REAL, '
+                'close REAL, adjusted_close REAL, volume INTEGER, '
+                'PRIMARY KEY (symbol, date)) WITHOUT ROWID'
+            )
+
+    @property
+    def stats(self):
+        '''Cache hit and miss counts'''
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def get_end_of_day(self, symbol, *, from_date=None, to_date=None):
+        '''Get end of day data for a Symbol, fetching only missing bars
+
+        Nothing is fetched when the stored bars already reach to_date'''
+        key = symbol_key(symbol)
+        from_date = date_string(from_date)
+        to_date = date_string(to_date)
+        with self._lock:
+            stored = self._connection.execute(
+                'SELECT from_date FROM symbols WHERE symbol = ?', (key,)
+            ).fetchone()
+            last_date = self.last_date(key)
+        if stored is not None and (
+                stored[0] is None
+                or (from_date is not None and from_date >= stored[0])):
+            with self._lock:
+                self.hits += 1
+            if last_date is None:
+                self.store(key, symbol.get_end_of_day(from_date=stored[0]))
+            elif to_date is None or to_date > last_date:
+                next_date = datetime.date.fromisoformat(last_date) + \
+                    datetime.timedelta(days=1)
+                self.store(key, symbol.get_end_of_day(
+                    from_date=next_date.isoformat()))
+        else:
+            with self._lock:
+                self.misses += 1
+            rows = symbol.get_end_of_day(from_date=from_date)
+            with self._lock:
+                self.invalidate(key)
+                self.store(key, rows, from_date=from_date)
+        return self.read(key, from_date=from_date, to_date=to_date)
+
+    def last_date(self, symbol):
+        '''The date of the last stored bar for a symbol or None'''
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT MAX(date) FROM bars WHERE symbol = ?',
+                (symbol_key(symbol),)
+            ).fetchone()
+        return row[0]
+
+    def store(self, symbol, rows, *, from_date=None):
+        '''Merge bars into the store, replacing any on the same date'''
+        key = symbol_key(symbol)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'INSERT OR IGNORE INTO symbols (symbol, from_date) '
+                'VALUES (?, ?)', (key, from_date)
+            )
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO bars VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (key,) + tuple(row[field] for field in EOD_FIELDS)
+                    for row in rows
+                ]
+            )
+
+    def read(self, symbol, *, from_date=None, to_date=None):
+        '''Read the stored bars for a symbol in date order'''
+        fields = ', '.join(EOD_FIELDS)
+        with self._lock:
+            rows = self._connection.execute(
+                f'SELECT { fields } FROM bars WHERE symbol = ? AND date >= ? '
+                'AND date <= ? ORDER BY date',
+                (symbol_key(symbol), from_date or '', to_date or '9999-12-31')
+            ).fetchall()
+        return [dict(zip(EOD_FIELDS, row)) for row in rows]
+
+    def readjust(self, symbol, *, tail_days=30, tolerance=None):
+        '''Rescale the stored history of a Symbol after a split or dividend
+        instead of downloading it again
+
+        The bars of the last tail_days stored days are fetched and
+        compared with the stored ones, see adjust.adjustment_drift. When
+        they drifted the older bars are rescaled in place and the fresh
+        ones stored. Returns the drift or None'''
+        from .adjust import DRIFT_TOLERANCE, drift_ratios
+
+        key = symbol_key(symbol)
+        last_date = self.last_date(key)
+        if last_date is None:
+            return None
+        from_date = (
+            datetime.date.fromisoformat(last_date)
+            - datetime.timedelta(days=tail_days)
+        ).isoformat()
+        fresh = {
+            row['date']: row
+            for row in symbol.get_end_of_day(from_date=from_date)
+        }
+        stored = [
+            row for row in self.read(key, from_date=from_date)
+            if row['date'] in fresh
+        ]
+        if not stored:
+            return None
+        first = stored[0]['date']
+        ratios = drift_ratios(
+            stored[0], fresh[first],
+            DRIFT_TOLERANCE if tolerance is None else tolerance)
+        if ratios is None:
+            self.store(key, fresh.values())
+            return None
+        with self._lock, self._connection:
+            self._connection.execute(
+                'UPDATE bars SET open = open * :close, high = high * :close, '
+                'low = low * :close, close = close * :close, '
+                'adjusted_close = adjusted_close * :adjusted_close, '
+                'volume = CAST(ROUND(volume / :close) AS INTEGER) '
+                'WHERE symbol = :symbol AND date < :date',
+                dict(ratios, symbol=key, date=first)
+            )
+            self.store(key, fresh.values())
+        return dict(ratios, date=first)
+
+    def invalidate(self, symbol):
+        '''Drop a symbol so the next request downloads its full history
+
+        readjust rescales the stored bars after a split or dividend
+        without downloading them again'''
+        key = symbol_key(symbol)
+        with self._lock, self._connection:
+            self._connection.execute(
+                'DELETE FROM bars WHERE symbol = ?', (key,))
+            self._connection.execute(
+                'DELETE FROM symbols WHERE symbol = ?', (key,))
+
+    def clear(self):
+        '''Drop every stored symbol'''
+        with self._lock, self._connection:
+            self._connection.execute('DELETE FROM bars')
+            self._connection.execute('DELETE FROM symbols')
+
+    def close(self):
+        '''Close the sqlite connection'''
+        self._connection.close()
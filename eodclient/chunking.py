@@ -0,0 +1,74 @@
+'''Sizing the chunks of symbols sent in one real time request'''
+
+import threading
+
+__all__ = ['AdaptiveChunkSize']
+
+CHUNK_SIZE = 20
+MAX_URL_LENGTH = 2048
+# fmt=json, s= and the api_token parameter
+PARAMS_LENGTH = 64
+# Commas between the symbols in s= are sent as %2C
+SEPARATOR_LENGTH = 3
+
+
+def split_chunks(symbols, chunk_size=CHUNK_SIZE, *,
+                 max_url_length=MAX_URL_LENGTH, base_length=0):
+    '''Split symbols into chunks of at most chunk_size whose request url
+    stays under max_url_length
+
+    base_length is the length of the url before the first symbol. The
+    first symbol of a chunk goes in the path and the rest in s='''
+    chunk = []
+    length = base_length + PARAMS_LENGTH
+    for symbol in symbols:
+        key_length = len(symbol.code) + len(symbol.exchange_code) + 1
+        if chunk:
+            key_length += SEPARATOR_LENGTH
+        if chunk and (len(chunk) >= chunk_size
+                      or length + key_length > max_url_length):
+            yield chunk
+            chunk = []
+            length = base_length + PARAMS_LENGTH
+            key_length -= SEPARATOR_LENGTH
+        chunk.append(symbol)
+        length += key_length
+    if chunk:
+        yield chunk
+
+
+class AdaptiveChunkSize(object):
+    '''A chunk size tuned from the latency and errors of real time requests
+
+    Pass one as the chunk_size of SymbolSet.get_real_time and keep it
+    between calls. The size grows by step after each request faster than
+    target_latency seconds, shrinks by a quarter after a slower one and
+    halves after a failure, staying within minimum and maximum'''
+    def __init__(self, initial=CHUNK_SIZE, *, minimum=1, maximum=100,
+                 target_latency=1.0, step=2):
+        self.size = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.step = step
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def __int__(self):
+        return self.size
+
+    def __repr__(self):
+        return f'AdaptiveChunkSize({ self.size })'
+
+    def observe(self, size, seconds, error=False):
+        '''Record a request for size symbols that took seconds'''
+        with self._lock:
+            self.requests += 1
+            if error:
+                self.errors += 1
+                self.size = max(self.minimum, min(self.size, size) // 2)
+            elif seconds > self.target_latency:
+                self.size = max(self.minimum, min(self.size, size) * 3 // 4)
+            elif size >= self.size:
+                self.size = min(self.maximum, self.size + self.step)
@@ -0,0 +1,214 @@
+'''The api client owning the key, url and http session'''
+
+import os
+import threading
+import time
+
+from .errors import APIKeyMissingError
+from .ratelimit import RateLimiter
+from .retry import RetryPolicy
+
+__all__ = ['Client', 'get_client', 'set_client']
+
+DEFAULT_API_URL = 'https://eodhistoricaldata.com/api'
+DEFAULT_TIMEOUT = (5, 60)
+
+
+class Client(object):
+    '''A connection to the api
+
+    Nothing is imported or opened until the first request, so creating a
+    client is cheap and needs no api key until then. The api key and url
+    default to the EOD_API_KEY and EOD_API_URL env variables. timeout is
+    (connect, read) seconds for requests that do not set one
+
+    pool_connections is the number of hosts with a pool and pool_maxsize
+    the connections kept open per host, set it to at least the number of
+    workers. With pool_block a request waits for a free connection instead
+    of opening one that is discarded afterwards. compress asks for gzip
+    responses and keepalive turns on TCP keep-alive for pooled sockets
+
+    decoder is the json backend name, orjson, simdjson or json, or a
+    Decoder. By default the fastest one installed is used'''
+    def __init__(self, api_key=None, api_url=None, *, pool_connections=10,
+                 pool_maxsize=10, pool_block=False, timeout=DEFAULT_TIMEOUT,
+                 compress=True, keepalive=True, decoder=None,
+                 rate_limiter=None, retry_policy=None):
+        self.api_key = api_key
+        self.api_url = api_url or os.environ.get('EOD_API_URL', DEFAULT_API_URL)
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.timeout = timeout
+        self.compress = compress
+        self.keepalive = keepalive
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hooks = []
+        self._decoder = decoder
+        self._session = None
+        self._pool_stats = None
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def api_token(self):
+        '''The api key, raising APIKeyMissingError if there is none'''
+        api_key = self.api_key or os.environ.get('EOD_API_KEY')
+        if api_key is None:
+            raise APIKeyMissingError(
+                "All methods require an EOD_API_KEY env variable from "
+                "https://eodhistoricaldata.com/"
+            )
+        return api_key
+
+    @property
+    def session(self):
+        '''The requests session, created on first use'''
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        '''Create a session sending the api key through an EODAdapter'''
+        import requests
+        from .adapter import EODAdapter
+
+        session = requests.Session()
+        session.params = {}
+        session.params['api_token'] = self.api_token
+        if not self.compress:
+            session.headers['Accept-Encoding'] = 'identity'
+        adapter = EODAdapter(
+            self.rate_limiter,
+            self.retry_policy,
+            timeout=self.timeout,
+            pool_stats=self._pool_stats,
+            keepalive=self.keepalive,
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=self.pool_block
+        )
+        self._pool_stats = adapter.pool_stats
+        for prefix in ('https://', 'http://'):
+            session.mount(prefix, adapter)
+        return session
+
+    def pool_stats(self):
+        '''Connections opened, requests sent and the share that reused a
+        pooled connection since the client was created'''
+        if self._pool_stats is None:
+            from .adapter import PoolStats
+            return PoolStats().as_dict()
+        return self._pool_stats.as_dict()
+
+    @property
+    def decoder(self):
+        '''The json Decoder, resolved on first use'''
+        if self._decoder is None or isinstance(self._decoder, str):
+            from .decoding import get_decoder
+            self._decoder = get_decoder(self._decoder)
+        return self._decoder
+
+    def url(self, endpoint):
+        '''The full url of an endpoint such as eod/AAPL.US'''
+        return f'{ self.api_url }/{ endpoint }'
+
+    def add_hook(self, hook):
+        '''Call a Hook around every request, see eodclient.instrument'''
+        self.hooks = self.hooks + [hook]
+
+    def remove_hook(self, hook):
+        self.hooks = [item for item in self.hooks if item is not hook]
+
+    def get(self, endpoint, **kwargs):
+        '''Get an endpoint, keyword arguments are passed to requests
+
+        Without hooks this is a plain session.get'''
+        hooks = self.hooks
+        if not hooks:
+            return self.session.get(self.url(endpoint), **kwargs)
+
+        from .instrument import RequestEvent
+
+        event = RequestEvent(endpoint, kwargs.get('params'))
+        for hook in hooks:
+            hook.before_request(event)
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.url(endpoint), **kwargs)
+        except Exception as error:
+            event.latency = time.perf_counter() - start
+            event.error = error
+            for hook in hooks:
+                hook.after_request(event)
+            raise
+        event.latency = time.perf_counter() - start
+        event.status = response.status_code
+        if kwargs.get('stream'):
+            length = response.headers.get('Content-Length')
+            event.bytes = int(length) if length else None
+        else:
+            event.bytes = len(response.content)
+        for hook in hooks:
+            hook.after_request(event)
+        response.eod_event = event
+        return response
+
+    def parse(self, response, into=None):
+        '''Decode a json response body with the decoder, timed for hooks
+        when there are any
+
+        into is a class with a from_json(data, decoder) constructor such
+        as EODSeries to decode straight into'''
+        if into is None:
+            decode = self.decoder.loads
+        else:
+            def decode(data):
+                return into.from_json(data, self.decoder)
+
+        event = getattr(response, 'eod_event', None)
+        if event is None:
+            return decode(response.content)
+        start = time.perf_counter()
+        result = decode(response.content)
+        event.parse_time = time.perf_counter() - start
+        for hook in self.hooks:
+            hook.after_parse(event)
+        return result
+
+    def close(self):
+        '''Close the session and its pooled connections'''
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+
+_default_client = None
+_default_lock = threading.Lock()
+
+
+def get_client():
+    '''The client used by Symbol, SymbolSet and Exchange'''
+    global _default_client
+    if _default_client is None:
+        with _default_lock:
+            if _default_client is None:
+                _default_client = Client()
+    return _default_client
+
+
+def set_client(client):
+    '''Make client the default for every request, returns the previous'''
+    global _default_client
+    with _default_lock:
+        previous, _default_client = _default_client, client
+    return previous
@@ -0,0 +1,48 @@
+'''Bounded thread pool helpers for sending requests in parallel'''
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+__all__ = []
+
+_host_semaphores = {}
+_host_lock = threading.Lock()
+
+
+def host_semaphore(url, limit):
+    '''Get the semaphore capping concurrent requests to the host of a url
+
+    Semaphores are shared by every caller using the same host and limit
+    so parallel batches together stay under the cap'''
+    key = (urlsplit(url).netloc, limit)
+    with _host_lock:
+        semaphore = _host_semaphores.get(key)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(limit)
+            _host_semaphores[key] = semaphore
+    return semaphore
+
+
+def fetch_all(func, items, *, workers=None, max_per_host=None, url=None):
+    '''Call func for every item and return the results in item order
+
+    Without workers the items are fetched one after the other. With
+    workers they are fetched on a bounded thread pool, and with
+    max_per_host no more than that many run at once against the host
+    of url'''
+    items = list(items)
+    if not workers or workers < 2 or len(items) < 2:
+        return [func(item) for item in items]
+
+    if max_per_host:
+        semaphore = host_semaphore(url, max_per_host)
+
+        def call(item):
+            with semaphore:
+                return func(item)
+    else:
+        call = func
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as pool:
+        return list(pool.map(call, items))
@@ -0,0 +1,71 @@
+'''Dates, periods and date windows of end of day requests'''
+
+import calendar
+import datetime
+
+from .errors import IncorrectDateFormatError, IncorrectPeriodError
+
+__all__ = ['as_date', 'date_windows']
+
+PERIODS = ('d', 'w', 'm')
+ONE_DAY = datetime.timedelta(days=1)
+
+
+def as_date(value):
+    '''Convert a %Y-%m-%d string, date, datetime or numpy datetime64 to
+    a date'''
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    if hasattr(value, 'astype'):
+        value = str(value.astype('datetime64[D]'))
+    try:
+        return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        raise IncorrectDateFormatError('Date must be in format %Y-%m-%d')
+
+
+def date_string(value):
+    '''The api form of a date, None stays None'''
+    if value is None:
+        return None
+    return as_date(value).isoformat()
+
+
+def check_period(period):
+    '''Raise IncorrectPeriodError unless period is d, w, m or None'''
+    if period is not None and period not in PERIODS:
+        raise IncorrectPeriodError(
+            f'Period must be one of { ", ".join(PERIODS) }')
+
+
+def period_end(day, period):
+    '''The last day of the period day falls in'''
+    if period == 'w':
+        return day + datetime.timedelta(days=6 - day.weekday())
+    if period == 'm':
+        return day.replace(day=calendar.monthrange(day.year, day.month)[1])
+    return day
+
+
+def date_windows(start, end, window, period=None):
+    '''Split start to end inclusive into consecutive windows of
+    about window, a timedelta or a number of days
+
+    Returns (start, end) date pairs. Windows end on the last day of a week
+    or month for the w and m periods so no weekly or monthly bar is split
+    between two requests'''
+    if not isinstance(window, datetime.timedelta):
+        window = datetime.timedelta(days=window)
+    if window < ONE_DAY:
+        raise ValueError('window must be at least one day')
+    check_period(period)
+    windows = []
+    start = as_date(start)
+    end = as_date(end)
+    while start <= end:
+        stop = min(period_end(start + window - ONE_DAY, period), end)
+        windows.append((start, stop))
+        start = stop + ONE_DAY
+    return windows
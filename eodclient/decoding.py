@@ -0,0 +1,124 @@
+'''Pluggable json decoders working on the raw response bytes
+
+orjson or pysimdjson are used when installed, install with
+``pip install eodclient[fast]``. Both decode the bytes directly without
+first building a str like the json module'''
+
+import array
+import json
+from json.decoder import JSONDecodeError
+
+__all__ = ['Decoder', 'get_decoder']
+
+PREFERRED = ('orjson', 'simdjson', 'json')
+NAN = float('nan')
+
+
+class Decoder(object):
+    '''Decode json bytes with a named backend
+
+    Every backend raises JSONDecodeError with the body as its doc on
+    invalid json, like the json module'''
+    __slots__ = ('name', '_loads')
+
+    def __init__(self, name, loads):
+        self.name = name
+        self._loads = loads
+
+    def __repr__(self):
+        return f'Decoder({ self.name })'
+
+    def loads(self, data):
+        '''Decode bytes or str'''
+        try:
+            return self._loads(data)
+        except JSONDecodeError:
+            raise
+        except ValueError as error:
+            if isinstance(data, bytes):
+                data = data.decode('utf-8', 'replace')
+            raise JSONDecodeError(str(error), data, 0) from None
+
+    def loads_columns(self, data, fields):
+        '''Decode a json array of objects into a column per field
+
+        fields maps each field to an array.array typecode, or None to
+        collect the values in a list. Only the columns are kept, the
+        decoded rows are freed on return. A missing or null value is nan
+        in float columns and 0 in integer ones. Raises ValueError for a
+        body that is not an array, such as an error message object'''
+        rows = self.loads(data)
+        if not isinstance(rows, list):
+            raise ValueError(f'Expected a json array of rows, got { rows }')
+        columns = {}
+        for field, typecode in fields.items():
+            if typecode is None:
+                columns[field] = [row.get(field) for row in rows]
+                continue
+            missing = NAN if typecode in 'fd' else 0
+            column = array.array(typecode)
+            append = column.append
+            for row in rows:
+                value = row.get(field)
+                append(missing if value is None else value)
+            columns[field] = column
+        return columns
+
+
+def _orjson():
+    import orjson
+    return orjson.loads
+
+
+def _simdjson():
+    import simdjson
+    return simdjson.loads
+
+
+def _json():
+    return json.loads
+
+
+PACKAGES = {
+    'orjson': 'orjson',
+    'simdjson': 'pysimdjson',
+}
+
+BACKENDS = {
+    'orjson': _orjson,
+    'simdjson': _simdjson,
+    'json': _json,
+}
+
+_decoders = {}
+
+
+def get_decoder(name=None):
+    '''The Decoder for a backend name, by default the fastest installed
+
+    Raises ImportError when the named backend is not installed'''
+    if isinstance(name, Decoder):
+        return name
+    decoder = _decoders.get(name)
+    if decoder is not None:
+        return decoder
+    if name is None:
+        for backend in PREFERRED:
+            try:
+                decoder = get_decoder(backend)
+            except ImportError:
+                continue
+            break
+    elif name not in BACKENDS:
+        raise ValueError(
+            f'Unknown json decoder { name }, use one of { list(BACKENDS) }')
+    else:
+        try:
+            decoder = Decoder(name, BACKENDS[name]())
+        except ImportError:
+            raise ImportError(
+                f'The { name } decoder is not installed: '
+                f'pip install { PACKAGES[name] }'
+            ) from None
+    _decoders[name] = decoder
+    return decoder
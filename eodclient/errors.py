@@ -11,6 +11,10 @@ class IncorrectDateFormatError(Error):
     '''The Date entered is formatted incorrectly'''
 
 
+class IncorrectPeriodError(Error):
+    '''The period is not one of d, w or m'''
+
+
 class SymbolListRequiredError(Error):
     '''A symbol list is required'''
 
@@ -23,6 +27,14 @@ class SymbolDictRequiredError(Error):
     '''A symbol dict is required'''
 
 
+class BulkNotAvailableError(Error):
+    '''The bulk api is not available on this plan'''
+
+
+class OverDailyBudgetError(Error):
+    '''A request costs more calls than the whole daily budget'''
+
+
 class ExchangeCodeRequiredError(Error):
     '''An exchange code is required'''
 
@@ -39,3 +51,15 @@ class InvalidExchangeCodeError(Error):
         super().__init__()
         self.expression = expression
         self.message = message
+
+
+def __getattr__(name):
+    '''REQUEST_ERRORS, the errors a single request can fail with, built on
+    first use so importing the package does not import requests'''
+    if name == 'REQUEST_ERRORS':
+        from requests.exceptions import RequestException
+
+        global REQUEST_ERRORS
+        REQUEST_ERRORS = (Error, RequestException, ValueError)
+        return REQUEST_ERRORS
+    raise AttributeError(f'module { __name__ } has no attribute { name }')
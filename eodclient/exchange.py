@@ -1,9 +1,26 @@
+import datetime
+import json
+import os
+import threading
+import time
+from contextlib import closing
+from types import MappingProxyType
 from json.decoder import JSONDecodeError
-from .errors import InvalidExchangeCodeError, ExchangeCodeRequiredError
+from .concurrency import fetch_all
+from .errors import (
+    BulkNotAvailableError,
+    InvalidExchangeCodeError,
+    ExchangeCodeRequiredError,
+    OverDailyBudgetError
+)
+from .stream import CHUNK_SIZE, iter_json_array
+from .symbol import Symbol
 
-from . import session
+from .client import get_client
 
-__all__ = ['Exchange']
+__all__ = ['Exchange', 'exchange_for_symbol']
+
+BULK_NOT_AVAILABLE_STATUSES = (401, 403, 404)
 
 EXCHANGE_CODES = [
     {'code': 'US', 'name': 'USA Stocks'},
@@ -78,9 +95,35 @@ EXCHANGE_CODES = [
     {'code': 'LU', 'name': 'Luxembourg Stock Exchange'}
 ]
 
+BUILTIN_EXCHANGE_CODES = EXCHANGE_CODES
+
+EXCHANGE_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), '.cache', 'eodclient', 'exchanges.json')
+
+
+def build_registry(exchange_codes):
+    '''Build the read only indexes of exchange_codes
+
+    Returns code to name, name to codes and the invalid code message'''
+    by_code = {}
+    by_name = {}
+    for exchange in exchange_codes:
+        by_code[exchange['code']] = exchange['name']
+        by_name[exchange['name']] = \
+            by_name.get(exchange['name'], ()) + (exchange['code'],)
+    message = f"Ensure exchange code is in: { ', '.join(by_code) }"
+    return MappingProxyType(by_code), MappingProxyType(by_name), message
+
+
+EXCHANGES, EXCHANGES_BY_NAME, _INVALID_CODE_MESSAGE = \
+    build_registry(EXCHANGE_CODES)
+_registry_lock = threading.Lock()
+
 
 class Exchange(object):
     '''Exchange object for interacting with the EOD exchange'''
+    _instances = {}
+
     def __init__(self, exchange_code=None):
         '''The exchange code from
         https://eodhistoricaldata.com/knowledgebase/list-supported-exchanges/
@@ -89,24 +132,201 @@ class Exchange(object):
             raise ExchangeCodeRequiredError(
                 message='An exchange code is required to initiatile an exchange'
             )
-        codes = [exchange['code'] for exchange in EXCHANGE_CODES]
-        if exchange_code not in codes:
-            codes = ', '.join(codes)
+        if exchange_code not in EXCHANGES:
             raise InvalidExchangeCodeError(
                 expression=exchange_code,
-                message=f'Ensure exchange code is in: { codes }'
+                message=_INVALID_CODE_MESSAGE
             )
         self.exchange_code = exchange_code
 
+    @classmethod
+    def get(cls, exchange_code):
+        '''The shared instance for an exchange code, created once'''
+        key = (cls, exchange_code)
+        try:
+            return cls._instances[key]
+        except KeyError:
+            return cls._instances.setdefault(key, cls(exchange_code))
+
+    @property
+    def name(self):
+        '''The name of the exchange'''
+        return EXCHANGES[self.exchange_code]
+
     def get_symbols(self):
         '''Get all the symbols in the exchange'''
-        path = f'https://eodhistoricaldata.com/api/exchanges/{self.exchange_code}'
-        response = session.get(
+        path = f'exchanges/{self.exchange_code}'
+        client = get_client()
+        response = client.get(
             path,
             params={'fmt': 'json'}
         )
         try:
-            return response.json()
+            return client.parse(response)
         except JSONDecodeError:
             return {'message': response.content.decode("utf-8")}
 
+    def iter_symbols(self, *, chunk_size=CHUNK_SIZE):
+        '''Yield the symbols in the exchange one at a time
+
+        The response is parsed as it downloads so memory stays flat
+        however large the exchange. A plain text error body is yielded
+        as {'message': ...} like get_symbols'''
+        path = f'exchanges/{self.exchange_code}'
+        response = get_client().get(
+            path,
+            params={'fmt': 'json'},
+            stream=True
+        )
+        with closing(response):
+            yielded = False
+            try:
+                for symbol in iter_json_array(
+                        response.iter_content(chunk_size)):
+                    yielded = True
+                    yield symbol
+            except JSONDecodeError as error:
+                if yielded:
+                    raise
+                yield {'message': error.doc}
+
+    def get_bulk_end_of_day(self, *, date=None, columnar=False,
+                            fallback=True, workers=8, max_per_host=None):
+        '''Get the end of day bar of every symbol in the exchange
+
+        One bulk request replaces a request per symbol. If the bulk api is
+        not on the plan or costs more than the rate limiter's daily
+        budget, fallback fetches every symbol's bar on workers
+        threads instead. Rows are dicts, or an EODTable with columnar'''
+        from .series import EODTable
+
+        try:
+            records = self.iter_bulk_end_of_day(date=date)
+            if columnar:
+                return EODTable.from_records(records)
+            return list(records)
+        except (BulkNotAvailableError, OverDailyBudgetError):
+            if not fallback:
+                raise
+        records = self._fan_out_end_of_day(
+            date, workers=workers, max_per_host=max_per_host)
+        if columnar:
+            return EODTable.from_records(records)
+        return records
+
+    def iter_bulk_end_of_day(self, *, date=None, chunk_size=CHUNK_SIZE):
+        '''Yield the end of day bar of every symbol in the exchange
+
+        The bulk response is parsed as it downloads. Raises
+        BulkNotAvailableError if the plan does not include the bulk api'''
+        params = {'fmt': 'json'}
+        if date:
+            params['date'] = Symbol.get_date(date).strftime('%Y-%m-%d')
+        path = f'eod-bulk-last-day/{self.exchange_code}'
+        response = get_client().get(
+            path,
+            params=params,
+            stream=True
+        )
+        with closing(response):
+            if response.status_code in BULK_NOT_AVAILABLE_STATUSES:
+                raise BulkNotAvailableError(
+                    response.content.decode('utf-8', 'replace'))
+            yield from iter_json_array(response.iter_content(chunk_size))
+
+    def _fan_out_end_of_day(self, date, *, workers, max_per_host):
+        '''Get the last bar of every symbol with a request per symbol
+
+        Symbols whose request fails are left out'''
+        from .errors import REQUEST_ERRORS
+
+        symbols = self.get_symbols()
+        if isinstance(symbols, dict):
+            return []
+        if date:
+            date = Symbol.get_date(date).strftime('%Y-%m-%d')
+            from_date = date
+        else:
+            from_date = (
+                datetime.date.today() - datetime.timedelta(days=7)
+            ).isoformat()
+
+        def last_bar(listing):
+            symbol = Symbol.get(listing['Code'], self.exchange_code)
+            try:
+                bars = symbol.get_end_of_day(
+                    from_date=from_date, to_date=date)
+            except REQUEST_ERRORS:
+                return None
+            if date:
+                bars = [bar for bar in bars[:1] if bar['date'] == date]
+            if not bars:
+                return None
+            record = {
+                'code': symbol.code,
+                'exchange_short_name': self.exchange_code
+            }
+            record.update(bars[-1])
+            return record
+
+        results = fetch_all(
+            last_bar,
+            symbols,
+            workers=workers,
+            max_per_host=max_per_host,
+            url=get_client().api_url
+        )
+        return [record for record in results if record is not None]
+
+
+def exchange_for_symbol(symbol):
+    '''The shared Exchange of a code.exchange_code symbol such as AAPL.US'''
+    code, separator, exchange_code = symbol.rpartition('.')
+    if not separator:
+        raise InvalidExchangeCodeError(
+            expression=symbol,
+            message='Symbol must be in the format code.exchange_code'
+        )
+    return Exchange.get(exchange_code)
+
+
+def refresh_exchanges(*, path=EXCHANGE_CACHE_PATH, max_age=24 * 60 * 60):
+    '''Replace the exchange registry with the api's exchange list
+
+    The list is cached on disk at path and only downloaded again when
+    older than max_age seconds. Returns EXCHANGE_CODES'''
+    exchange_codes = None
+    if path and os.path.exists(path) and \
+            time.time() - os.path.getmtime(path) < max_age:
+        with open(path) as cache_file:
+            exchange_codes = json.load(cache_file)
+    if exchange_codes is None:
+        client = get_client()
+        response = client.get(
+            'exchanges-list/',
+            params={'fmt': 'json'}
+        )
+        exchange_codes = [
+            {'code': exchange['Code'], 'name': exchange['Name']}
+            for exchange in client.parse(response)
+        ]
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as cache_file:
+                json.dump(exchange_codes, cache_file)
+
+    return load_exchanges(exchange_codes)
+
+
+def load_exchanges(exchange_codes):
+    '''Replace the exchange registry with a list of code and name dicts
+
+    Load BUILTIN_EXCHANGE_CODES to go back to the packaged list'''
+    global EXCHANGE_CODES, EXCHANGES, EXCHANGES_BY_NAME, _INVALID_CODE_MESSAGE
+
+    with _registry_lock:
+        EXCHANGES, EXCHANGES_BY_NAME, _INVALID_CODE_MESSAGE = \
+            build_registry(exchange_codes)
+        EXCHANGE_CODES = exchange_codes
+        Exchange._instances.clear()
+    return EXCHANGE_CODES
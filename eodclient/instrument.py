@@ -0,0 +1,234 @@
+'''Hooks observing every api request and in-process request metrics'''
+
+import bisect
+import threading
+
+__all__ = ['Hook', 'Metrics', 'OpenTelemetryHook', 'RequestEvent']
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PARSE_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0)
+
+
+class RequestEvent(object):
+    '''What is known about one api request
+
+    endpoint is the first part of the path such as eod or real-time and
+    path the whole of it. symbols is the number of symbols requested,
+    bytes the size of the body and latency the seconds until the response
+    including retries. parse_time is set once the body is decoded'''
+    __slots__ = (
+        'endpoint', 'path', 'symbols', 'status', 'bytes', 'latency',
+        'parse_time', 'error')
+
+    def __init__(self, path, params=None):
+        self.path = path
+        self.endpoint = path.split('/', 1)[0]
+        self.symbols = symbol_count(self.endpoint, params)
+        self.status = None
+        self.bytes = None
+        self.latency = None
+        self.parse_time = None
+        self.error = None
+
+    def __repr__(self):
+        return f'RequestEvent({ self.path }, status={ self.status }, ' \
+            f'latency={ self.latency })'
+
+
+def symbol_count(endpoint, params):
+    '''The number of symbols a request is for'''
+    if endpoint not in ('real-time', 'eod'):
+        return 0
+    if params and params.get('s'):
+        return 1 + len(params['s'].split(','))
+    return 1
+
+
+class Hook(object):
+    '''Base class of request hooks, override the methods you need
+
+    before_request is called before a request is sent, after_request
+    when its response or error arrived and after_parse when its json
+    body has been decoded. The same RequestEvent is passed to each'''
+    def before_request(self, event):
+        pass
+
+    def after_request(self, event):
+        pass
+
+    def after_parse(self, event):
+        pass
+
+
+class Histogram(object):
+    '''Cumulative bucket counts, sum and count of observed values'''
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        '''(upper bound, count at or below it) pairs ending with +Inf'''
+        total = 0
+        result = []
+        for bound, count in zip(self.buckets + (float('inf'),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class EndpointMetrics(object):
+    '''Counters and histograms of the requests to one endpoint'''
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.statuses = {}
+        self.bytes = 0
+        self.symbols = 0
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.parse_time = Histogram(PARSE_BUCKETS)
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'statuses': dict(self.statuses),
+            'bytes': self.bytes,
+            'symbols': self.symbols,
+            'latency_seconds': self.latency.sum,
+            'parse_seconds': self.parse_time.sum,
+        }
+
+
+class Metrics(Hook):
+    '''Count requests, errors, bytes, symbols and time per endpoint
+
+    Add to a client with client.add_hook(metrics). An error is a request
+    that raised or got a status of 400 or more'''
+    def __init__(self):
+        self.endpoints = {}
+        self._lock = threading.Lock()
+
+    def _endpoint(self, event):
+        metrics = self.endpoints.get(event.endpoint)
+        if metrics is None:
+            metrics = self.endpoints.setdefault(
+                event.endpoint, EndpointMetrics())
+        return metrics
+
+    def after_request(self, event):
+        with self._lock:
+            metrics = self._endpoint(event)
+            metrics.requests += 1
+            if event.error is not None or (event.status or 0) >= 400:
+                metrics.errors += 1
+            status = str(event.status or 'error')
+            metrics.statuses[status] = metrics.statuses.get(status, 0) + 1
+            metrics.bytes += event.bytes or 0
+            metrics.symbols += event.symbols
+            metrics.latency.observe(event.latency)
+
+    def after_parse(self, event):
+        with self._lock:
+            self._endpoint(event).parse_time.observe(event.parse_time)
+
+    def snapshot(self):
+        '''The totals of each endpoint as plain dicts'''
+        with self._lock:
+            return {
+                endpoint: metrics.as_dict()
+                for endpoint, metrics in sorted(self.endpoints.items())
+            }
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+
+    def to_prometheus(self, prefix='eodclient'):
+        '''The metrics in the Prometheus text exposition format'''
+        lines = []
+
+        def family(name, kind, text):
+            lines.append(f'# HELP { prefix }_{ name } { text }')
+            lines.append(f'# TYPE { prefix }_{ name } { kind }')
+
+        def histogram(name, field):
+            for endpoint, metrics in endpoints:
+                values = getattr(metrics, field)
+                for bound, count in values.cumulative():
+                    le = '+Inf' if bound == float('inf') else repr(bound)
+                    lines.append(
+                        f'{ prefix }_{ name }_bucket{{endpoint="{ endpoint }",'
+                        f'le="{ le }"}} { count }')
+                lines.append(
+                    f'{ prefix }_{ name }_sum{{endpoint="{ endpoint }"}} '
+                    f'{ values.sum!r}')
+                lines.append(
+                    f'{ prefix }_{ name }_count{{endpoint="{ endpoint }"}} '
+                    f'{ values.count }')
+
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            family('requests_total', 'counter', 'Api requests by status')
+            for endpoint, metrics in endpoints:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(
+                        f'{ prefix }_requests_total{{endpoint="{ endpoint }",'
+                        f'status="{ status }"}} { count }')
+            for name, field, text in (
+                    ('errors_total', 'errors', 'Api requests that failed'),
+                    ('response_bytes_total', 'bytes', 'Response body bytes'),
+                    ('symbols_total', 'symbols', 'Symbols requested')):
+                family(name, 'counter', text)
+                for endpoint, metrics in endpoints:
+                    lines.append(
+                        f'{ prefix }_{ name }{{endpoint="{ endpoint }"}} '
+                        f'{ getattr(metrics, field) }')
+            family('request_seconds', 'histogram',
+                   'Seconds until the response including retries')
+            histogram('request_seconds', 'latency')
+            family('parse_seconds', 'histogram', 'Seconds decoding json')
+            histogram('parse_seconds', 'parse_time')
+        return '\n'.join(lines) + '\n'
+
+
+class OpenTelemetryHook(Hook):
+    '''Record requests with an OpenTelemetry meter
+
+    meter comes from opentelemetry.metrics.get_meter, nothing is imported
+    here so OpenTelemetry is only needed by the application using it'''
+    def __init__(self, meter):
+        self.requests = meter.create_counter(
+            'eodclient.requests', description='Api requests')
+        self.response_bytes = meter.create_counter(
+            'eodclient.response.bytes', unit='By',
+            description='Response body bytes')
+        self.duration = meter.create_histogram(
+            'eodclient.request.duration', unit='s',
+            description='Seconds until the response including retries')
+        self.parse_duration = meter.create_histogram(
+            'eodclient.parse.duration', unit='s',
+            description='Seconds decoding json')
+
+    def after_request(self, event):
+        attributes = {
+            'endpoint': event.endpoint,
+            'status': str(event.status or 'error'),
+        }
+        self.requests.add(1, attributes)
+        self.response_bytes.add(event.bytes or 0, attributes)
+        self.duration.record(event.latency, attributes)
+
+    def after_parse(self, event):
+        self.parse_duration.record(
+            event.parse_time, {'endpoint': event.endpoint})
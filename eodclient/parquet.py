@@ -0,0 +1,345 @@
+'''Partitioned Parquet files of end of day and real time data
+
+Requires pyarrow and numpy, install with ``pip install eodclient[parquet]``'''
+
+import array
+import itertools
+import os
+import tempfile
+import threading
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover
+    pa = None
+
+from .cache import symbol_key
+from .series import (
+    FIELDS,
+    NAN,
+    EODSeries,
+    np,
+    pack_columns,
+    require_numpy
+)
+
+__all__ = ['ParquetStore', 'record_batches']
+
+BATCH_SIZE = 64 * 1024
+REAL_TIME_FIELDS = (
+    'open', 'high', 'low', 'close', 'volume', 'previousClose', 'change',
+    'change_p')
+
+
+def require_pyarrow():
+    '''Raise a helpful error when pyarrow is not installed'''
+    require_numpy()
+    if pa is None:
+        raise ImportError(
+            'Parquet files require pyarrow: pip install eodclient[parquet]'
+        )
+
+
+def end_of_day_schema():
+    '''The schema of end of day bars, prices and volume are float64 with
+    nan for missing values like EODSeries so reads can share buffers'''
+    return pa.schema(
+        [('date', pa.date32())] + [(field, pa.float64()) for field in FIELDS]
+    )
+
+
+def real_time_schema():
+    '''The schema of real time quotes'''
+    return pa.schema(
+        [('code', pa.string()), ('timestamp', pa.int64()),
+         ('gmtoffset', pa.int64())]
+        + [(field, pa.float64()) for field in REAL_TIME_FIELDS]
+    )
+
+
+def number(value):
+    '''A float for an api value, the api sends 'NA' for missing quotes'''
+    if value is None or isinstance(value, str):
+        return NAN
+    return value
+
+
+def integer(value):
+    '''An int for an api value, 0 for the 'NA' of missing quotes'''
+    if isinstance(value, (int, float)):
+        return int(value)
+    return 0
+
+
+def date_scalar(date):
+    '''An arrow date32 of a date or an ISO date string'''
+    return pa.scalar(np.datetime64(date, 'D').item(), pa.date32())
+
+
+def record_batches(records, batch_size=BATCH_SIZE):
+    '''Pack the end of day dicts the api returns into RecordBatches
+
+    records may be a generator, rows are packed into typed buffers as
+    they arrive and handed to arrow without a copy every batch_size rows'''
+    require_pyarrow()
+    schema = end_of_day_schema()
+    records = iter(records)
+    while True:
+        columns = pack_columns(itertools.islice(records, batch_size))
+        if not columns['date']:
+            return
+        yield pa.RecordBatch.from_arrays(
+            [pa.array(np.array(columns['date'], dtype='datetime64[D]'),
+                      pa.date32())]
+            + [pa.array(np.frombuffer(columns[field], dtype=np.float64))
+               for field in FIELDS],
+            schema=schema
+        )
+
+
+def year_parts(table):
+    '''Split an end of day table into the rows of each year'''
+    years = pc.year(table['date'])
+    for year in pc.unique(years).to_pylist():
+        yield year, table.filter(pc.equal(years, year))
+
+
+def real_time_table(quotes):
+    '''A Table of the quote dicts the real time api returns'''
+    codes = []
+    timestamps = []
+    offsets = []
+    columns = [array.array('d') for field in REAL_TIME_FIELDS]
+    for quote in quotes:
+        codes.append(quote['code'])
+        timestamps.append(integer(quote.get('timestamp')))
+        offsets.append(integer(quote.get('gmtoffset')))
+        for column, field in zip(columns, REAL_TIME_FIELDS):
+            column.append(number(quote.get(field)))
+    return pa.Table.from_arrays(
+        [pa.array(codes, pa.string()), pa.array(timestamps, pa.int64()),
+         pa.array(offsets, pa.int64())]
+        + [pa.array(np.frombuffer(column, dtype=np.float64))
+           for column in columns],
+        schema=real_time_schema()
+    )
+
+
+class ParquetStore(object):
+    '''End of day bars and real time quotes as hive partitioned Parquet
+
+    Bars are written to root/eod/exchange=US/symbol=AAPL/year=2020 and
+    quotes to root/real-time/exchange=US/date=2020-08-20, so the tree can
+    be read as a dataset by pyarrow, pandas, duckdb or spark. Appending
+    merges with the rows already in a partition and keeps the newest row
+    for each date, files are replaced atomically'''
+    def __init__(self, root):
+        require_pyarrow()
+        self.root = root
+        self._lock = threading.Lock()
+
+    def partition(self, symbol, year):
+        '''The directory of a symbol's bars for a year'''
+        code, exchange_code = symbol_key(symbol).rsplit('.', 1)
+        return os.path.join(
+            self.root, 'eod', f'exchange={ exchange_code }',
+            f'symbol={ code }', f'year={ year }'
+        )
+
+    def write_end_of_day(self, symbol, records, *, append=True):
+        '''Write end of day dicts, a generator or an EODSeries for a
+        Symbol or code.exchange_code, returns the number of rows written
+
+        Dicts are written batch by batch to a staging file per year as
+        they arrive, so only a year of bars is held at a time. Without
+        append the symbol's existing years are replaced'''
+        if isinstance(records, EODSeries):
+            table = self.series_table(records)
+            if not append:
+                self.delete_end_of_day(symbol)
+            for year, part in year_parts(table):
+                self._merge(self.partition(symbol, year), part, ['date'])
+            return len(table)
+        os.makedirs(self.root, exist_ok=True)
+        with tempfile.TemporaryDirectory(
+                prefix='_staging', dir=self.root) as staging:
+            rows = self._stage(records, staging)
+            if not append:
+                self.delete_end_of_day(symbol)
+            for name in sorted(os.listdir(staging)):
+                year = int(name.partition('.')[0])
+                self._merge(
+                    self.partition(symbol, year),
+                    pq.read_table(os.path.join(staging, name)),
+                    ['date']
+                )
+        return rows
+
+    @staticmethod
+    def _stage(records, staging):
+        '''Write the batches of records to a file per year in staging,
+        returns the number of rows'''
+        writers = {}
+        rows = 0
+        try:
+            for batch in record_batches(records):
+                rows += len(batch)
+                for year, part in year_parts(pa.Table.from_batches([batch])):
+                    writer = writers.get(year)
+                    if writer is None:
+                        writer = writers[year] = pq.ParquetWriter(
+                            os.path.join(staging, f'{ year }.parquet'),
+                            end_of_day_schema()
+                        )
+                    writer.write_table(part)
+        finally:
+            for writer in writers.values():
+                writer.close()
+        return rows
+
+    def write_table(self, exchange_code, table, *, append=True):
+        '''Write an EODTable of a bulk download, one partition per symbol'''
+        for code in np.unique(table.codes):
+            rows = table.codes == code
+            self.write_end_of_day(
+                f'{ code }.{ exchange_code }',
+                EODSeries(
+                    table.dates[rows],
+                    *[getattr(table, field)[rows] for field in FIELDS]
+                ),
+                append=append
+            )
+
+    def write_real_time(self, quotes):
+        '''Append real time quotes, a quote already stored for the same
+        code and timestamp is replaced'''
+        table = real_time_table(quotes)
+        if not len(table):
+            return 0
+        exchanges = pa.array([
+            code.rsplit('.', 1)[-1] for code in table['code'].to_pylist()
+        ])
+        days = pc.strftime(
+            pc.cast(table['timestamp'], pa.timestamp('s')), format='%Y-%m-%d')
+        keys = pc.binary_join_element_wise(exchanges, days, '/')
+        for key in pc.unique(keys).to_pylist():
+            exchange_code, day = key.split('/')
+            self._merge(
+                os.path.join(
+                    self.root, 'real-time', f'exchange={ exchange_code }',
+                    f'date={ day }'
+                ),
+                table.filter(pc.equal(keys, key)),
+                ['code', 'timestamp']
+            )
+        return len(table)
+
+    def _merge(self, directory, table, keys):
+        '''Merge table into the partition file of directory, keeping the
+        last row for each key'''
+        path = os.path.join(directory, 'data.parquet')
+        with self._lock:
+            if os.path.exists(path):
+                existing = pq.read_table(path, schema=table.schema)
+                table = pa.concat_tables([existing, table])
+            table = self._dedup(table, keys)
+            os.makedirs(directory, exist_ok=True)
+            temporary = f'{ path }.tmp'
+            pq.write_table(table, temporary)
+            os.replace(temporary, path)
+
+    @staticmethod
+    def _dedup(table, keys):
+        '''Keep the last row for each key, sorted by the keys'''
+        table = table.append_column(
+            '_row', pa.array(np.arange(len(table)), pa.int64()))
+        last = table.group_by(keys, use_threads=False).aggregate(
+            [('_row', 'max')])
+        table = table.take(last['_row_max']).drop_columns(['_row'])
+        return table.sort_by([(key, 'ascending') for key in keys])
+
+    def delete_end_of_day(self, symbol):
+        '''Remove every stored year of a symbol'''
+        directory = os.path.dirname(self.partition(symbol, 0))
+        if os.path.isdir(directory):
+            for name in os.listdir(directory):
+                path = os.path.join(directory, name, 'data.parquet')
+                if os.path.exists(path):
+                    os.remove(path)
+                    os.rmdir(os.path.join(directory, name))
+
+    def years(self, symbol):
+        '''The years stored for a symbol in ascending order'''
+        directory = os.path.dirname(self.partition(symbol, 0))
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            int(name.split('=', 1)[1]) for name in os.listdir(directory)
+            if name.startswith('year=')
+        )
+
+    def read_table(self, symbol, *, from_date=None, to_date=None):
+        '''The stored bars of a symbol as an arrow Table
+
+        Files are memory mapped so only the pages that are used are read'''
+        years = self.years(symbol)
+        if from_date is not None:
+            years = [year for year in years if year >= int(str(from_date)[:4])]
+        if to_date is not None:
+            years = [year for year in years if year <= int(str(to_date)[:4])]
+        schema = end_of_day_schema()
+        tables = [
+            pq.read_table(
+                os.path.join(self.partition(symbol, year), 'data.parquet'),
+                schema=schema, memory_map=True)
+            for year in years
+        ]
+        table = pa.concat_tables(tables) if tables else schema.empty_table()
+        if from_date is not None:
+            table = table.filter(
+                pc.greater_equal(table['date'], date_scalar(from_date)))
+        if to_date is not None:
+            table = table.filter(
+                pc.less_equal(table['date'], date_scalar(to_date)))
+        return table
+
+    def read_end_of_day(self, symbol, *, from_date=None, to_date=None):
+        '''The stored bars of a symbol as an EODSeries
+
+        Price columns of a single year share the memory mapped buffers'''
+        return self.table_series(self.read_table(
+            symbol, from_date=from_date, to_date=to_date))
+
+    def read_real_time(self, exchange_code, day):
+        '''The quotes stored for an exchange on a day as an arrow Table'''
+        path = os.path.join(
+            self.root, 'real-time', f'exchange={ exchange_code }',
+            f'date={ day }', 'data.parquet'
+        )
+        return pq.read_table(path, schema=real_time_schema(), memory_map=True)
+
+    @staticmethod
+    def series_table(series):
+        '''An arrow Table sharing the column arrays of an EODSeries'''
+        return pa.Table.from_arrays(
+            [pa.array(series.dates, pa.date32())]
+            + [pa.array(getattr(series, field)) for field in FIELDS],
+            schema=end_of_day_schema()
+        )
+
+    @staticmethod
+    def table_series(table):
+        '''An EODSeries of an arrow Table, float columns in one chunk are
+        not copied'''
+        def column(name):
+            chunked = table[name]
+            if chunked.num_chunks == 1:
+                return chunked.chunk(0).to_numpy(zero_copy_only=False)
+            return chunked.to_numpy()
+
+        return EODSeries(
+            column('date').astype('datetime64[D]'),
+            *[column(field) for field in FIELDS]
+        )
@@ -0,0 +1,115 @@
+'''Poll real time quotes on a schedule and emit only the ones that changed'''
+
+import heapq
+import threading
+import time
+
+from .chunking import CHUNK_SIZE, MAX_URL_LENGTH
+from .client import get_client
+from .concurrency import fetch_all
+from .symbol import SymbolSet
+
+__all__ = ['QuotePoller']
+
+
+class QuotePoller(object):
+    '''Poll the real time quotes of a watchlist in priority tiers
+
+    tiers maps an interval in seconds to the symbols polled at that rate,
+    a SymbolSet or Symbols, for example {5: active, 300: the_rest}. Each
+    tier is split into chunks of chunk_size whose requests are spread
+    evenly over the interval instead of all going out at the start of a
+    cycle. A quote is emitted the first time it is seen and afterwards
+    only when its timestamp or close moved. Chunks that come due together
+    are fetched on up to workers threads'''
+    def __init__(self, tiers, *, chunk_size=CHUNK_SIZE,
+                 max_url_length=MAX_URL_LENGTH, workers=4):
+        self.workers = workers
+        self.last_seen = {}
+        self.stats = {'requests': 0, 'quotes': 0, 'changed': 0, 'errors': 0}
+        self._stopped = threading.Event()
+        self._schedule = []
+        start = time.monotonic()
+        for interval, symbols in sorted(tiers.items()):
+            if isinstance(symbols, SymbolSet):
+                symbols = symbols.symbols
+            tier_chunks = SymbolSet._real_time_chunks(
+                list(symbols), chunk_size, max_url_length)
+            for index, chunk in enumerate(tier_chunks):
+                due = start + interval * index / len(tier_chunks)
+                self._schedule.append(
+                    (due, interval, len(self._schedule), chunk))
+        heapq.heapify(self._schedule)
+
+    def changes(self, quotes):
+        '''The quotes whose timestamp or close differ from the last seen,
+        remembering them'''
+        changed = []
+        for quote in quotes:
+            state = (quote.get('timestamp'), quote.get('close'))
+            code = quote.get('code')
+            if self.last_seen.get(code) != state:
+                self.last_seen[code] = state
+                changed.append(quote)
+        self.stats['quotes'] += len(quotes)
+        self.stats['changed'] += len(changed)
+        return changed
+
+    def poll(self, *, duration=None):
+        '''Yield changed quotes until stop is called or for duration
+        seconds
+
+        Changed quotes of a chunk that were not yielded when polling
+        stops count as seen'''
+        from .errors import REQUEST_ERRORS
+
+        def fetch(chunk):
+            try:
+                return SymbolSet._get_real_time_chunk(chunk)
+            except REQUEST_ERRORS:
+                return None
+
+        self._stopped.clear()
+        deadline = None if duration is None else time.monotonic() + duration
+        while self._schedule and not self._stopped.is_set():
+            now = time.monotonic()
+            due = self._schedule[0][0]
+            if deadline is not None and due > deadline:
+                self._stopped.wait(max(deadline - now, 0))
+                return
+            if due > now:
+                self._stopped.wait(due - now)
+                continue
+
+            entries = []
+            while self._schedule and self._schedule[0][0] <= now:
+                entries.append(heapq.heappop(self._schedule))
+            results = fetch_all(
+                fetch,
+                [entry[3] for entry in entries],
+                workers=self.workers,
+                url=get_client().api_url
+            )
+            for due, interval, order, chunk in entries:
+                heapq.heappush(
+                    self._schedule,
+                    (max(due + interval, now), interval, order, chunk)
+                )
+            for quotes in results:
+                self.stats['requests'] += 1
+                if quotes is None:
+                    self.stats['errors'] += 1
+                    continue
+                for quote in self.changes(quotes):
+                    if self._stopped.is_set():
+                        return
+                    yield quote
+
+    def run(self, callback, *, duration=None):
+        '''Call callback with each changed quote, see poll'''
+        for quote in self.poll(duration=duration):
+            callback(quote)
+
+    def stop(self):
+        '''Stop polling, safe to call from another thread or the callback'''
+        self._stopped.set()
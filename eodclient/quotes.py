@@ -0,0 +1,132 @@
+'''In-process cache of real time quotes'''
+
+import threading
+import time
+from collections import OrderedDict
+
+__all__ = ['QuoteCache']
+
+
+def symbol_key(symbol):
+    '''The cache key of a Symbol, code.exchange_code as in the quote'''
+    return f'{ symbol.code }.{ symbol.exchange_code }'
+
+
+class _Flight(object):
+    '''A fetch in progress that other callers can wait on'''
+    def __init__(self):
+        self.done = threading.Event()
+        self.quote = None
+        self.error = None
+
+
+class QuoteCache(object):
+    '''Cache real time quotes for ttl seconds, keeping at most maxsize
+
+    The least recently used quotes are dropped first. Concurrent requests
+    for a symbol that is being fetched wait for that fetch instead of
+    making their own'''
+    def __init__(self, ttl=1.0, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._quotes = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    @property
+    def stats(self):
+        '''Cache hit and miss counts'''
+        return {'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self):
+        return len(self._quotes)
+
+    def _get(self, key, now):
+        '''A fresh cached quote or None, the lock must be held'''
+        item = self._quotes.get(key)
+        if item is None:
+            return None
+        expires, quote = item
+        if expires <= now:
+            del self._quotes[key]
+            return None
+        self._quotes.move_to_end(key)
+        return quote
+
+    def put(self, key, quote):
+        '''Cache a quote under code.exchange_code'''
+        with self._lock:
+            self._quotes[key] = (time.monotonic() + self.ttl, quote)
+            self._quotes.move_to_end(key)
+            while len(self._quotes) > self.maxsize:
+                self._quotes.popitem(last=False)
+
+    def clear(self):
+        '''Drop every cached quote'''
+        with self._lock:
+            self._quotes.clear()
+
+    def get_many(self, symbols, fetch):
+        '''Get quotes for symbols in order, from the cache where fresh
+
+        fetch is called once with the symbols that missed and nobody else
+        is fetching, and returns a dict of quotes by code.exchange_code.
+        Symbols without a quote are left out'''
+        found = {}
+        waiting = {}
+        owned = {}
+        missed = []
+        with self._lock:
+            now = time.monotonic()
+            for symbol in symbols:
+                key = symbol_key(symbol)
+                if key in found or key in waiting or key in owned:
+                    continue
+                quote = self._get(key, now)
+                if quote is not None:
+                    self.hits += 1
+                    found[key] = quote
+                elif key in self._flights:
+                    self.hits += 1
+                    waiting[key] = self._flights[key]
+                else:
+                    self.misses += 1
+                    flight = _Flight()
+                    self._flights[key] = flight
+                    owned[key] = flight
+                    missed.append(symbol)
+
+        if missed:
+            try:
+                fetched = fetch(missed)
+            except BaseException as error:
+                for key, flight in owned.items():
+                    flight.error = error
+                raise
+            else:
+                for key, quote in fetched.items():
+                    if key in owned:
+                        self.put(key, quote)
+                        owned[key].quote = quote
+                        found[key] = quote
+            finally:
+                with self._lock:
+                    for key, flight in owned.items():
+                        del self._flights[key]
+                        flight.done.set()
+
+        for key, flight in waiting.items():
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if flight.quote is not None:
+                found[key] = flight.quote
+
+        results = []
+        for symbol in symbols:
+            quote = found.get(symbol_key(symbol))
+            if quote is not None:
+                results.append(quote)
+        return results
@@ -0,0 +1,123 @@
+'''Token bucket rate limiting of api calls'''
+
+import threading
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from .errors import OverDailyBudgetError
+
+__all__ = ['RateLimiter']
+
+SECONDS_PER_DAY = 24 * 60 * 60
+BULK_COST = 100
+
+
+def request_cost(url, params=None):
+    '''The number of api calls a request uses
+
+    A real time request is charged per symbol, the first in the path and
+    the rest in s=, and a bulk request for an exchange BULK_COST. Query
+    parameters are read from the url unless given'''
+    if '/eod-bulk-last-day/' in url:
+        return BULK_COST
+    if params is None:
+        query = parse_qs(urlsplit(url).query)
+        params = {key: values[0] for key, values in query.items()}
+    if params.get('s'):
+        return 1 + len(params['s'].split(','))
+    return 1
+
+
+class RateLimiter(object):
+    '''Limit api calls per second and per day across threads and tasks
+
+    Calls over the per second rate are queued in order and calls over
+    the daily budget wait for the next day (UTC) rather than fail. A
+    limit of None is unlimited'''
+    def __init__(self, per_second=None, per_day=None, burst=None):
+        self._lock = threading.Lock()
+        self.configure(per_second=per_second, per_day=per_day, burst=burst)
+        self.used_today = 0
+        self._day = self._today()
+
+    def configure(self, *, per_second=None, per_day=None, burst=None):
+        '''Change the limits, burst defaults to one second of calls'''
+        with self._lock:
+            self.per_second = per_second
+            self.per_day = per_day
+            self.burst = burst or per_second or 0
+            self._tokens = self.burst
+            self._updated = time.monotonic()
+
+    @staticmethod
+    def _today():
+        return int(time.time() // SECONDS_PER_DAY)
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.per_second:
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._updated) * self.per_second
+            )
+        self._updated = now
+        today = self._today()
+        if today != self._day:
+            self._day = today
+            self.used_today = 0
+
+    def _reserve(self, cost):
+        '''Reserve cost calls, return if granted and how long to wait
+
+        Raises OverDailyBudgetError for a cost over the daily budget, it
+        would never be granted'''
+        with self._lock:
+            if self.per_day is not None and cost > self.per_day:
+                raise OverDailyBudgetError(
+                    f'A cost of { cost } calls is over the daily budget '
+                    f'of { self.per_day }'
+                )
+            self._refill()
+            if self.per_day is not None and \
+                    self.used_today + cost > self.per_day:
+                reset = (self._day + 1) * SECONDS_PER_DAY
+                return False, max(reset - time.time(), 0.01)
+            self.used_today += cost
+            if not self.per_second:
+                return True, 0
+            self._tokens -= cost
+            if self._tokens >= 0:
+                return True, 0
+            return True, -self._tokens / self.per_second
+
+    def acquire(self, cost=1):
+        '''Block until cost calls are allowed
+
+        Raises OverDailyBudgetError if cost is over the daily budget'''
+        while True:
+            granted, wait = self._reserve(cost)
+            if wait:
+                time.sleep(wait)
+            if granted:
+                return
+
+    async def acquire_async(self, cost=1):
+        '''Wait without blocking the event loop until cost calls are allowed'''
+        import asyncio
+
+        while True:
+            granted, wait = self._reserve(cost)
+            if wait:
+                await asyncio.sleep(wait)
+            if granted:
+                return
+
+    @property
+    def remaining(self):
+        '''Calls left in today's budget, None when unlimited'''
+        with self._lock:
+            self._refill()
+            if self.per_day is None:
+                return None
+            return self.per_day - self.used_today
+
@@ -0,0 +1,67 @@
+'''Retry policy for transient api failures'''
+
+import datetime
+import random
+import time
+
+__all__ = ['RetryPolicy']
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+class RetryPolicy(object):
+    '''Retry timeouts, connection errors, 429 and 5xx responses
+
+    Waits grow exponentially from backoff up to cap with full jitter, a
+    429 waits at least its Retry-After. No retry starts after deadline
+    seconds from the first attempt. attempts counts the first try'''
+    def __init__(self, attempts=4, backoff=0.5, cap=30.0, deadline=120.0,
+                 statuses=RETRY_STATUSES):
+        self.attempts = attempts
+        self.backoff = backoff
+        self.cap = cap
+        self.deadline = deadline
+        self.statuses = frozenset(statuses)
+
+    def start(self):
+        '''The monotonic time after which no retry starts, or None'''
+        if self.deadline is None:
+            return None
+        return time.monotonic() + self.deadline
+
+    def delay(self, attempt, headers=None):
+        '''Seconds to wait before retrying after attempt failed
+
+        attempt counts from 0 for the first try'''
+        delay = random.uniform(0, min(self.cap, self.backoff * 2 ** attempt))
+        retry_after = self.retry_after(headers or {})
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def should_retry(self, attempt, delay, deadline):
+        '''Whether to retry after attempt failed and waiting delay'''
+        if attempt + 1 >= self.attempts:
+            return False
+        return deadline is None or time.monotonic() + delay < deadline
+
+    @staticmethod
+    def retry_after(headers):
+        '''Seconds from a Retry-After header, in seconds or a http date'''
+        value = headers.get('Retry-After')
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0)
+        except ValueError:
+            pass
+        from email.utils import parsedate_to_datetime
+
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=datetime.timezone.utc)
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return max((when - now).total_seconds(), 0)
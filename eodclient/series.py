@@ -0,0 +1,318 @@
+'''Columnar end of day history backed by numpy arrays
+
+Requires numpy, install with ``pip install eodclient[numpy]``'''
+
+import array
+import functools
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+__all__ = ['EODPanel', 'EODSeries', 'EODTable']
+
+NAN = float('nan')
+FIELDS = ('open', 'high', 'low', 'close', 'adjusted_close', 'volume')
+
+
+def require_numpy():
+    '''Raise a helpful error when numpy is not installed'''
+    if np is None:
+        raise ImportError(
+            'Columnar results require numpy: pip install eodclient[numpy]'
+        )
+
+
+def pack_columns(records, fields=FIELDS, keys=('date',)):
+    '''Pack the dicts the api returns into a list of each key and a
+    float64 array.array of each field, mapped by name
+
+    records may be a generator, each row is packed as it arrives so the
+    dicts never all exist at once. None and the api's 'NA' are nan'''
+    lists = {key: [] for key in keys}
+    columns = {field: array.array('d') for field in fields}
+    for record in records:
+        for key, values in lists.items():
+            values.append(record[key])
+        for field, column in columns.items():
+            value = record[field]
+            column.append(
+                NAN if value is None or isinstance(value, str) else value)
+    return dict(lists, **columns)
+
+
+class EODSeries(object):
+    '''End of day history for a symbol as contiguous numpy columns
+
+    dates is a datetime64[D] array in ascending order, the price fields
+    and volume are float64 arrays with nan for missing values'''
+    __slots__ = ('dates',) + FIELDS
+
+    def __init__(self, dates, open, high, low, close, adjusted_close, volume):
+        '''Wrap the column arrays, they must all be the same length'''
+        require_numpy()
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        columns = (open, high, low, close, adjusted_close, volume)
+        for field, column in zip(FIELDS, columns):
+            column = np.ascontiguousarray(column, dtype=np.float64)
+            if len(column) != len(self.dates):
+                raise ValueError(f'{ field } does not match the dates length')
+            setattr(self, field, column)
+
+    @classmethod
+    def from_records(cls, records):
+        '''Build a series from the dicts the api returns
+
+        records may be a generator, each row is packed into typed buffers
+        as it arrives so the dicts never all exist at once'''
+        require_numpy()
+        columns = pack_columns(records)
+        return cls(
+            np.array(columns['date'], dtype='datetime64[D]'),
+            *[np.frombuffer(columns[field], dtype=np.float64)
+              for field in FIELDS]
+        )
+
+    @classmethod
+    def from_json(cls, data, decoder=None):
+        '''Build a series from a raw json body of the end of day api
+
+        The body is decoded with decoder, by default the fastest json
+        backend installed, straight into typed columns'''
+        from .decoding import get_decoder
+
+        require_numpy()
+        fields = {'date': None}
+        fields.update((field, 'd') for field in FIELDS)
+        columns = get_decoder(decoder).loads_columns(data, fields)
+        return cls(
+            np.array(columns['date'], dtype='datetime64[D]'),
+            *[np.frombuffer(columns[field], dtype=np.float64)
+              if len(columns[field]) else np.empty(0)
+              for field in FIELDS]
+        )
+
+    @classmethod
+    def concatenate(cls, series):
+        '''Join series given in date order into one
+
+        A date already covered by an earlier series is dropped, so
+        overlapping windows of the same history join without repeats'''
+        require_numpy()
+        series = [part for part in series if len(part)]
+        if not series:
+            return cls(*[np.empty(0)] * (len(FIELDS) + 1))
+        dates = np.concatenate([part.dates for part in series])
+        keep = np.ones(len(dates), dtype=bool)
+        keep[1:] = dates[1:] > np.maximum.accumulate(dates)[:-1]
+        return cls(
+            dates[keep],
+            *[np.concatenate([getattr(part, field) for part in series])[keep]
+              for field in FIELDS]
+        )
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __getitem__(self, index):
+        '''Index positions or slice, slices return views'''
+        if isinstance(index, slice):
+            return EODSeries(
+                self.dates[index],
+                *[getattr(self, field)[index] for field in FIELDS]
+            )
+        record = {'date': str(self.dates[index])}
+        for field in FIELDS:
+            record[field] = getattr(self, field)[index].item()
+        return record
+
+    def __repr__(self):
+        if not len(self):
+            return 'EODSeries(empty)'
+        return f'EODSeries({ len(self) } bars, ' \
+            f'{ self.dates[0] } to { self.dates[-1] })'
+
+    def to_records(self):
+        '''Convert back to the list of dicts the api returns'''
+        return [self[index] for index in range(len(self))]
+
+    def slice(self, start=None, end=None):
+        '''The bars from start to end inclusive as a view
+
+        Dates may be strings, dates or datetime64 and are found by binary
+        search'''
+        first = 0
+        last = len(self)
+        if start is not None:
+            first = np.searchsorted(
+                self.dates, np.datetime64(start, 'D'), side='left')
+        if end is not None:
+            last = np.searchsorted(
+                self.dates, np.datetime64(end, 'D'), side='right')
+        return self[first:last]
+
+    def returns(self, field='adjusted_close', periods=1):
+        '''Simple returns over periods bars, one shorter than the series'''
+        values = self._lagged(field, periods)
+        return values[periods:] / values[:-periods] - 1
+
+    def log_returns(self, field='adjusted_close', periods=1):
+        '''Log returns over periods bars'''
+        values = self._lagged(field, periods)
+        return np.log(values[periods:] / values[:-periods])
+
+    def _lagged(self, field, periods):
+        if periods < 1:
+            raise ValueError('periods must be at least 1')
+        return getattr(self, field)
+
+    def rolling(self, window, field='adjusted_close'):
+        '''A read only 2-D view of every window of window bars, empty when
+        the series is shorter than window'''
+        if window < 1:
+            raise ValueError('window must be at least 1')
+        values = getattr(self, field)
+        if window > len(values):
+            return np.empty((0, window))
+        return np.lib.stride_tricks.sliding_window_view(values, window)
+
+    def rolling_mean(self, window, field='adjusted_close'):
+        '''The mean of every window of window bars, nan only for the
+        windows holding a nan'''
+        return self.rolling(window, field).mean(axis=1)
+
+    def to_pandas(self):
+        '''A pandas DataFrame indexed by date sharing the column arrays'''
+        import pandas as pd
+
+        index = pd.DatetimeIndex(self.dates.astype('datetime64[ns]'), name='date')
+        return pd.DataFrame(
+            {field: getattr(self, field) for field in FIELDS},
+            index=index,
+            copy=False
+        )
+
+
+class EODTable(object):
+    '''End of day bars for many symbols as numpy columns
+
+    Each row is one bar of the symbol in codes, as returned by the bulk
+    api for a whole exchange'''
+    __slots__ = ('codes', 'dates') + FIELDS
+
+    def __init__(self, codes, dates, open, high, low, close, adjusted_close,
+                 volume):
+        '''Wrap the column arrays, they must all be the same length'''
+        require_numpy()
+        self.codes = np.asarray(codes, dtype=str)
+        self.dates = np.asarray(dates, dtype='datetime64[D]')
+        columns = (open, high, low, close, adjusted_close, volume)
+        for field, column in zip(FIELDS, columns):
+            column = np.ascontiguousarray(column, dtype=np.float64)
+            if len(column) != len(self.codes):
+                raise ValueError(f'{ field } does not match the codes length')
+            setattr(self, field, column)
+
+    @classmethod
+    def from_records(cls, records):
+        '''Build a table from the dicts the bulk api returns
+
+        records may be a generator and are packed as they arrive'''
+        require_numpy()
+        columns = pack_columns(records, keys=('code', 'date'))
+        return cls(
+            columns['code'],
+            np.array(columns['date'], dtype='datetime64[D]'),
+            *[np.frombuffer(columns[field], dtype=np.float64)
+              for field in FIELDS]
+        )
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __getitem__(self, index):
+        '''The record at a position'''
+        record = {'code': str(self.codes[index]),
+                  'date': str(self.dates[index])}
+        for field in FIELDS:
+            record[field] = getattr(self, field)[index].item()
+        return record
+
+    def __repr__(self):
+        return f'EODTable({ len(self) } bars)'
+
+    def to_records(self):
+        '''Convert to a list of dicts'''
+        return [self[index] for index in range(len(self))]
+
+    def to_pandas(self):
+        '''A pandas DataFrame indexed by code sharing the column arrays'''
+        import pandas as pd
+
+        columns = {'date': self.dates.astype('datetime64[ns]')}
+        columns.update({field: getattr(self, field) for field in FIELDS})
+        return pd.DataFrame(
+            columns,
+            index=pd.Index(self.codes, name='code'),
+            copy=False
+        )
+
+
+class EODPanel(object):
+    '''End of day history for many symbols on a common date index
+
+    series maps code.exchange_code to each symbol's EODSeries and errors
+    maps it to the exception raised for symbols that could not be
+    fetched. dates is the union of the series dates with an outer join
+    or their intersection with an inner join'''
+    def __init__(self, series, errors=None, join='outer'):
+        require_numpy()
+        self.series = series
+        self.errors = errors or {}
+        self.codes = list(series)
+        date_arrays = [item.dates for item in series.values()]
+        if not date_arrays:
+            self.dates = np.array([], dtype='datetime64[D]')
+        elif join == 'outer':
+            self.dates = np.unique(np.concatenate(date_arrays))
+        elif join == 'inner':
+            self.dates = functools.reduce(np.intersect1d, date_arrays)
+        else:
+            raise ValueError("join must be 'outer' or 'inner'")
+
+    def __len__(self):
+        return len(self.dates)
+
+    def __repr__(self):
+        return f'EODPanel({ len(self.codes) } symbols, ' \
+            f'{ len(self.dates) } dates, { len(self.errors) } errors)'
+
+    def to_dict(self):
+        '''The EODSeries of each symbol keyed by code.exchange_code'''
+        return dict(self.series)
+
+    def to_array(self, field='adjusted_close'):
+        '''A wide float64 array of field with a row per date and a column
+        per code in codes, nan where a symbol has no bar on a date'''
+        result = np.full((len(self.dates), len(self.codes)), np.nan)
+        for column, code in enumerate(self.codes):
+            series = self.series[code]
+            positions = np.searchsorted(self.dates, series.dates)
+            found = positions < len(self.dates)
+            found[found] = self.dates[positions[found]] == series.dates[found]
+            result[positions[found], column] = getattr(series, field)[found]
+        return result
+
+    def to_pandas(self, field='adjusted_close'):
+        '''A pandas DataFrame of field indexed by date with a column per
+        symbol'''
+        import pandas as pd
+
+        return pd.DataFrame(
+            self.to_array(field),
+            index=pd.DatetimeIndex(
+                self.dates.astype('datetime64[ns]'), name='date'),
+            columns=self.codes,
+            copy=False
+        )
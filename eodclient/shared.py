@@ -0,0 +1,223 @@
+'''Real time quotes shared between processes through a memory mapped table
+
+One fetcher process keeps the table up to date while any number of
+processes on the host read the quotes from it without network calls'''
+
+import mmap
+import os
+import struct
+import threading
+import time
+
+from .quotes import symbol_key
+from .symbol import SymbolSet
+
+__all__ = ['QuoteFetcher', 'SharedQuoteTable']
+
+MAGIC = b'EODQ'
+VERSION = 1
+# magic, version, capacity, row size
+HEADER = struct.Struct('<4sIII')
+HEADER_SIZE = 64
+CODE_SIZE = 32
+# sequence, then the quote fields after code in REALTIME_KEYS
+ROW = struct.Struct('<Qqq4dq3d')
+SEQUENCE = struct.Struct('<Q')
+REALTIME_KEYS = (
+    'code', 'timestamp', 'gmtoffset', 'open', 'high', 'low', 'close',
+    'volume', 'previousClose', 'change', 'change_p')
+INTEGER_KEYS = ('timestamp', 'gmtoffset', 'volume')
+NAN = float('nan')
+
+
+def field_value(quote, key):
+    '''The value of a quote field as stored, the api sends 'NA' when there
+    is none which is stored as 0 or nan'''
+    value = quote.get(key)
+    if key in INTEGER_KEYS:
+        return int(value) if isinstance(value, (int, float)) else 0
+    return float(value) if isinstance(value, (int, float)) else NAN
+
+
+class SharedQuoteTable(object):
+    '''A fixed layout table of the latest quote of each symbol in a file
+
+    Create the table once with create, then open it by path in every
+    process. Put the file on a memory backed file system such as /dev/shm
+    to keep it off disk. Each row holds the REALTIME_KEYS fields of one
+    symbol behind a sequence number that is odd while the row is written,
+    readers retry until they see the same even number before and after
+    reading the row so they never get half of two quotes. Only one
+    process should write'''
+    def __init__(self, path, *, writable=False):
+        '''Open an existing table, read only unless writable'''
+        self.path = path
+        with open(path, 'r+b' if writable else 'rb') as table_file:
+            self._mmap = mmap.mmap(
+                table_file.fileno(), 0,
+                access=mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ)
+        magic, version, capacity, row_size = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION or row_size != ROW.size:
+            self._mmap.close()
+            raise ValueError(f'{ path } is not a version { VERSION } table')
+        self.capacity = capacity
+        self.writable = writable
+        self._rows_offset = HEADER_SIZE + capacity * CODE_SIZE
+        self._index = {}
+        for row in range(capacity):
+            offset = HEADER_SIZE + row * CODE_SIZE
+            code = bytes(self._mmap[offset:offset + CODE_SIZE]).rstrip(b'\0')
+            self._index[code.decode()] = row
+        self._lock = threading.Lock()
+
+    @classmethod
+    def create(cls, path, symbols):
+        '''Create a table with a row for each Symbol or code.exchange_code
+        and open it for writing, replacing any existing file'''
+        keys = list(dict.fromkeys(cls._key(symbol) for symbol in symbols))
+        for key in keys:
+            if len(key.encode()) > CODE_SIZE:
+                raise ValueError(f'{ key } is longer than { CODE_SIZE } bytes')
+        size = HEADER_SIZE + len(keys) * (CODE_SIZE + ROW.size)
+        temporary = f'{ path }.{ os.getpid() }.tmp'
+        with open(temporary, 'wb') as table_file:
+            table_file.truncate(size)
+            table_file.write(HEADER.pack(MAGIC, VERSION, len(keys), ROW.size))
+            table_file.seek(HEADER_SIZE)
+            for key in keys:
+                table_file.write(key.encode().ljust(CODE_SIZE, b'\0'))
+        os.replace(temporary, path)
+        return cls(path, writable=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.capacity
+
+    def __contains__(self, key):
+        return self._key(key) in self._index
+
+    def keys(self):
+        '''The code.exchange_code of every row in row order'''
+        return list(self._index)
+
+    @staticmethod
+    def _key(symbol):
+        return symbol if isinstance(symbol, str) else symbol_key(symbol)
+
+    def _offset(self, symbol):
+        return self._rows_offset + self._index[self._key(symbol)] * ROW.size
+
+    def write(self, quote, symbol=None):
+        '''Store a quote in the row of symbol, by default that of its code,
+        returning False when the table has no row for it'''
+        row = self._index.get(
+            quote.get('code') if symbol is None else self._key(symbol))
+        if row is None:
+            return False
+        offset = self._rows_offset + row * ROW.size
+        values = [field_value(quote, key) for key in REALTIME_KEYS[1:]]
+        with self._lock:
+            sequence = SEQUENCE.unpack_from(self._mmap, offset)[0]
+            SEQUENCE.pack_into(self._mmap, offset, sequence + 1)
+            ROW.pack_into(self._mmap, offset, sequence + 1, *values)
+            SEQUENCE.pack_into(self._mmap, offset, sequence + 2)
+        return True
+
+    def write_many(self, quotes):
+        '''Store quotes, returning how many had a row'''
+        return sum(self.write(quote) for quote in quotes)
+
+    def version(self, symbol):
+        '''A number that changes every time the symbol's quote is written,
+        0 before the first quote'''
+        return SEQUENCE.unpack_from(self._mmap, self._offset(symbol))[0] // 2
+
+    def read(self, symbol, *, retries=1000):
+        '''The latest quote of a Symbol or code.exchange_code as a dict,
+        None before the first quote
+
+        Raises KeyError for a symbol without a row'''
+        offset = self._offset(symbol)
+        for _ in range(retries):
+            values = ROW.unpack_from(self._mmap, offset)
+            sequence = values[0]
+            if sequence & 1 or SEQUENCE.unpack_from(
+                    self._mmap, offset)[0] != sequence:
+                time.sleep(0)
+                continue
+            if sequence == 0:
+                return None
+            quote = dict(zip(REALTIME_KEYS[1:], values[1:]))
+            quote['code'] = self._key(symbol)
+            return quote
+        raise TimeoutError(f'The quote of { symbol } kept changing')
+
+    def read_many(self, symbols=None):
+        '''The latest quotes of symbols, by default every row, by
+        code.exchange_code leaving out those without a quote yet'''
+        quotes = {}
+        for symbol in self._index if symbols is None else symbols:
+            quote = self.read(symbol)
+            if quote is not None:
+                quotes[quote['code']] = quote
+        return quotes
+
+    def close(self):
+        self._mmap.close()
+
+
+class QuoteFetcher(object):
+    '''Keep a SharedQuoteTable up to date from one process
+
+    Every interval seconds the quotes of every row are requested with
+    SymbolSet.get_real_time, extra keyword arguments such as workers or
+    chunk_size are passed on to it. Quotes the api has none for are left
+    as they were'''
+    def __init__(self, table, *, interval=1.0, **options):
+        self.table = table
+        self.interval = interval
+        self.options = options
+        self.symbol_set = SymbolSet([
+            dict(zip(('code', 'exchange_code'), key.rsplit('.', 1)))
+            for key in table.keys()
+        ])
+        self.stats = {'refreshes': 0, 'quotes': 0, 'errors': 0}
+        self._stopped = threading.Event()
+
+    def refresh(self):
+        '''Fetch every quote once and store it, returning how many were
+        stored'''
+        quotes = self.symbol_set.get_real_time(by_symbol=True, **self.options)
+        written = sum(
+            self.table.write(quote, symbol)
+            for symbol, quote in quotes.items() if quote is not None)
+        self.stats['refreshes'] += 1
+        self.stats['quotes'] += written
+        return written
+
+    def run(self, *, duration=None):
+        '''Refresh every interval until stop is called or for duration
+        seconds, a refresh that fails is counted and retried next time'''
+        from .errors import REQUEST_ERRORS
+
+        self._stopped.clear()
+        deadline = None if duration is None else time.monotonic() + duration
+        while not self._stopped.is_set():
+            start = time.monotonic()
+            try:
+                self.refresh()
+            except REQUEST_ERRORS:
+                self.stats['errors'] += 1
+            wait = max(self.interval - (time.monotonic() - start), 0)
+            if deadline is not None and time.monotonic() + wait >= deadline:
+                return
+            self._stopped.wait(wait)
+
+    def stop(self):
+        '''Stop running, safe to call from another thread'''
+        self._stopped.set()
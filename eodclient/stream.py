@@ -0,0 +1,73 @@
+'''Incremental parsing of large json array responses'''
+
+import codecs
+import json
+from json.decoder import JSONDecodeError
+
+__all__ = []
+
+WHITESPACE = ' \t\n\r'
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_json_array(chunks):
+    '''Yield the items of a top level json array from byte chunks
+
+    Only the item being parsed is held in memory. A body that is not an
+    array is parsed whole and yielded as one item, if it is not json
+    JSONDecodeError is raised with the full body as doc'''
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8')()
+    chunks = iter(chunks)
+    buffer = ''
+    position = 0
+    started = False
+    finished = False
+
+    while not finished:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            buffer += text_decoder.decode(b'', final=True)
+            finished = True
+        else:
+            buffer += text_decoder.decode(chunk)
+
+        if not started:
+            stripped = buffer.lstrip(WHITESPACE)
+            if not stripped:
+                if finished:
+                    raise JSONDecodeError('Expecting value', buffer, 0)
+                continue
+            if stripped[0] != '[':
+                text = buffer + ''.join(
+                    text_decoder.decode(chunk) for chunk in chunks
+                ) + text_decoder.decode(b'', final=True)
+                yield json.loads(text)
+                return
+            started = True
+            position = len(buffer) - len(stripped) + 1
+
+        while True:
+            while position < len(buffer) and buffer[position] in WHITESPACE + ',':
+                position += 1
+            if position == len(buffer):
+                break
+            if buffer[position] == ']':
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, position)
+            except JSONDecodeError:
+                if finished:
+                    raise
+                break
+            if end == len(buffer) and not finished:
+                # a number or literal may continue in the next chunk
+                break
+            position = end
+            yield item
+
+        buffer = buffer[position:]
+        position = 0
+
+    raise JSONDecodeError('Unterminated array', buffer, position)
@@ -1,8 +1,17 @@
 import datetime
+import time
+import weakref
+from contextlib import closing
 
-from . import session
+from .chunking import CHUNK_SIZE as REAL_TIME_CHUNK_SIZE
+from .chunking import MAX_URL_LENGTH, split_chunks
+from .quotes import symbol_key
+from .client import get_client
+from .concurrency import fetch_all
+from .dates import as_date, check_period, date_string, date_windows
+from .stream import CHUNK_SIZE, iter_json_array
 from .errors import (
-    IncorrectDateFormatError,
+    IncorrectPeriodError,
     SymbolDictRequiredError,
     SymbolListRequiredError,
     SymbolNotFoundError
@@ -13,48 +22,164 @@ __all__ = ['Symbol', 'SymbolSet']
 
 class Symbol(object):
     '''Class representing a single stock symbol'''
+    __slots__ = ('code', 'exchange_code', '__weakref__')
+
+    _instances = weakref.WeakValueDictionary()
+
     def __init__(self, code, exchange_code):
         '''Set the code and exchange code'''
         self.code = code
         self.exchange_code = exchange_code
 
-    def get_real_time(self):
-        '''Get the real time data for a symbol'''
-        path = 'https://eodhistoricaldata.com/api/real-time/' \
-               f'{ self.code }.{ self.exchange_code }'
-        response = session.get(
-            path,
+    def __repr__(self):
+        return f'{ type(self).__name__ }({ self.code }.{ self.exchange_code })'
+
+    @classmethod
+    def get(cls, code, exchange_code):
+        '''The shared instance for a code and exchange code
+
+        Instances are reused while anything still refers to them'''
+        key = (cls, code, exchange_code)
+        symbol = cls._instances.get(key)
+        if symbol is None:
+            symbol = cls(code, exchange_code)
+            symbol = cls._instances.setdefault(key, symbol)
+        return symbol
+
+    def get_real_time(self, *, cache=None):
+        '''Get the real time data for a symbol
+
+        With a QuoteCache a fresh cached quote is returned instead and
+        concurrent callers share one request'''
+        if cache is not None:
+            quotes = cache.get_many(
+                [self],
+                lambda missed: quotes_by_code([self.get_real_time()], missed)
+            )
+            return quotes[0] if quotes else None
+
+        client = get_client()
+        response = client.get(
+            f'real-time/{ self.code }.{ self.exchange_code }',
             params={'fmt': 'json'}
         )
-        return response.json()
+        return client.parse(response)
 
     @staticmethod
     def get_date(date):
-        '''Convert a string date to a datetime'''
-        try:
-            date_object = datetime.datetime.strptime(date, '%Y-%m-%d')
-        except ValueError:
-            raise IncorrectDateFormatError('Date must be in format %Y-%m-%d')
-        else:
-            return date_object
-
-    def get_end_of_day(self, *, from_date=None, **kwargs):
-        '''Get end of day data for a symbol'''
-        params = {'fmt': 'json'}
+        '''Convert a %Y-%m-%d string, date or numpy datetime64 to a
+        datetime'''
+        return datetime.datetime.combine(as_date(date), datetime.time())
 
-        if from_date:
-            date_object = self.get_date(from_date)
-            params['from'] = date_object.strftime('%Y-%m-%d')
+    def get_end_of_day(self, *, from_date=None, to_date=None, period=None,
+                       window=None, workers=4, cache=None, columnar=False):
+        '''Get end of day data for a symbol, from and to dates inclusive
 
-        path = 'https://eodhistoricaldata.com/api/eod/' \
-               f'{ self.code }.{ self.exchange_code }'
-        response = session.get(
-            path,
-            params=params
+        Dates may be %Y-%m-%d strings, dates or numpy datetime64 and
+        period is d, w or m for daily, weekly or monthly bars. With window,
+        a timedelta or a number of days, a range with a from_date is split
+        into windows requested on up to workers threads and joined in date
+        order without repeated dates, to_date defaults to today then.
+
+        With an EODCache only the daily bars after the last stored date
+        are requested in one request, passing a window as well raises
+        ValueError. With columnar an EODSeries is returned instead of
+        a list of dicts, decoded from the body straight into its columns'''
+        check_period(period)
+        from_date = date_string(from_date)
+        to_date = date_string(to_date)
+        if cache is not None:
+            if period not in (None, 'd'):
+                raise IncorrectPeriodError('The cache only stores daily bars')
+            if window is not None:
+                raise ValueError('A window cannot be used with a cache')
+            bars = cache.get_end_of_day(
+                self, from_date=from_date, to_date=to_date)
+            if columnar:
+                from .series import EODSeries
+                return EODSeries.from_records(bars)
+            return bars
+        if window is None or from_date is None:
+            return self._get_end_of_day_window(
+                from_date, to_date, period, columnar)
+
+        def fetch(dates):
+            return self._get_end_of_day_window(*dates, period, columnar)
+
+        windows = date_windows(
+            from_date, to_date or datetime.date.today(), window, period)
+        return join_end_of_day(
+            fetch_all(
+                fetch, windows, workers=workers, url=get_client().api_url),
+            columnar
+        )
+
+    def _get_end_of_day_window(self, from_date, to_date, period, columnar):
+        '''Get the end of day data between two dates in one request'''
+        if columnar:
+            from .series import EODSeries
+        client = get_client()
+        response = client.get(
+            self._end_of_day_path(),
+            params=self._end_of_day_params(from_date, to_date, period)
         )
         if response.status_code == 404:
             raise SymbolNotFoundError()
-        return response.json()
+        return client.parse(response, EODSeries if columnar else None)
+
+    def iter_end_of_day(self, *, from_date=None, to_date=None, period=None,
+                        chunk_size=CHUNK_SIZE):
+        '''Yield end of day bars one at a time
+
+        The response is parsed as it downloads so memory stays flat
+        however long the history'''
+        response = get_client().get(
+            self._end_of_day_path(),
+            params=self._end_of_day_params(from_date, to_date, period),
+            stream=True
+        )
+        with closing(response):
+            if response.status_code == 404:
+                raise SymbolNotFoundError()
+            yield from iter_json_array(response.iter_content(chunk_size))
+
+    def get_splits(self, *, from_date=None, to_date=None):
+        '''Get the splits of a symbol, dicts of the ex date and the split
+        such as 4.000000/1.000000 for four shares per share'''
+        return self._get_events('splits', from_date, to_date)
+
+    def get_dividends(self, *, from_date=None, to_date=None):
+        '''Get the dividends of a symbol, dicts of the ex date, the value
+        adjusted for later splits and the unadjustedValue paid'''
+        return self._get_events('div', from_date, to_date)
+
+    def _get_events(self, endpoint, from_date, to_date):
+        '''Get the corporate actions of a symbol from an endpoint'''
+        client = get_client()
+        response = client.get(
+            f'{ endpoint }/{ self.code }.{ self.exchange_code }',
+            params=self._end_of_day_params(from_date, to_date)
+        )
+        if response.status_code == 404:
+            raise SymbolNotFoundError()
+        return client.parse(response)
+
+    def _end_of_day_path(self):
+        '''The endpoint of the end of day data for a symbol'''
+        return f'eod/{ self.code }.{ self.exchange_code }'
+
+    @staticmethod
+    def _end_of_day_params(from_date, to_date=None, period=None):
+        '''The query parameters for the end of day data'''
+        check_period(period)
+        params = {'fmt': 'json'}
+        if from_date is not None:
+            params['from'] = date_string(from_date)
+        if to_date is not None:
+            params['to'] = date_string(to_date)
+        if period is not None:
+            params['period'] = period
+        return params
 
 
 class SymbolSet(object):
@@ -71,32 +196,246 @@ class SymbolSet(object):
                     f"(found at index { index })"
                     )
             else:
-                self.symbols.append(Symbol(**symbol))
+                self.symbols.append(Symbol.get(**symbol))
 
-    def get_real_time(self):
+    @classmethod
+    def from_symbols(cls, symbols):
+        '''Create a set from Symbol instances without validating dicts'''
+        symbol_set = cls.__new__(cls)
+        symbol_set.symbols = list(symbols)
+        return symbol_set
+
+    def get_real_time(self, *, chunk_size=REAL_TIME_CHUNK_SIZE,
+                      max_url_length=MAX_URL_LENGTH, workers=None,
+                      max_per_host=None, cache=None, by_symbol=False):
         '''Split the data into chunks of 20 shares and make requests
-        combine at the end'''
-        results = []
-        for chunk in chunks(self.symbols, 20):
-            first = chunk[0]
-            path = 'https://eodhistoricaldata.com/api/real-time/' \
-                f'{ first.code }.{ first.exchange_code }'
-            the_rest_string = ','.join(
-                [f'{s.code}.{s.exchange_code}' for s in chunk[1:]]
-            )
-            response = session.get(
-                path,
-                params={
-                    'fmt': 'json',
-                    's': the_rest_string
+        combine at the end
+
+        chunk_size is the most symbols per request, or an
+        AdaptiveChunkSize tuned from the latency and errors of each
+        request. Chunks are split further to keep the url under
+        max_url_length. With workers the chunks are sent in parallel on
+        a thread pool, at most max_per_host at a time. Results keep the
+        symbol order. With a QuoteCache only the symbols that miss the
+        cache are requested, regrouped into chunks
+
+        With by_symbol a dict of each requested Symbol to its quote is
+        returned instead, None for a symbol the api has no quote for. A
+        chunk that fails is split in half and retried so one bad symbol
+        does not lose the quotes of the rest'''
+        options = dict(
+            chunk_size=chunk_size,
+            max_url_length=max_url_length,
+            workers=workers,
+            max_per_host=max_per_host
+        )
+        if by_symbol:
+            if cache is None:
+                return self._get_real_time_by_symbol(self.symbols, **options)
+            quotes = cache.get_many(
+                self.symbols,
+                lambda missed: {
+                    symbol_key(symbol): quote
+                    for symbol, quote in self._get_real_time_by_symbol(
+                        missed, **options).items()
+                    if quote is not None
                 }
             )
-            result = response.json()
-            if isinstance(result, dict):
-                result = [result]
-            results = results + result
+            found = {quote.get('code'): quote for quote in quotes}
+            return {
+                symbol: found.get(symbol_key(symbol))
+                for symbol in self.symbols
+            }
+        if cache is not None:
+            return cache.get_many(
+                self.symbols,
+                lambda missed: quotes_by_code(
+                    self._get_real_time(missed, **options),
+                    missed
+                )
+            )
+        return self._get_real_time(self.symbols, **options)
+
+    @classmethod
+    def _get_real_time(cls, symbols, *, chunk_size=REAL_TIME_CHUNK_SIZE,
+                       max_url_length=MAX_URL_LENGTH, workers=None,
+                       max_per_host=None):
+        '''Get the real time data for symbols in chunks'''
+        def fetch(chunk):
+            return cls._get_real_time_timed(chunk, chunk_size)
+
+        results = []
+        chunk_results = fetch_all(
+            fetch,
+            cls._real_time_chunks(symbols, chunk_size, max_url_length),
+            workers=workers,
+            max_per_host=max_per_host,
+            url=get_client().api_url
+        )
+        for result in chunk_results:
+            results.extend(result)
         return results
 
+    @classmethod
+    def _get_real_time_by_symbol(cls, symbols, *,
+                                 chunk_size=REAL_TIME_CHUNK_SIZE,
+                                 max_url_length=MAX_URL_LENGTH, workers=None,
+                                 max_per_host=None):
+        '''Get the quote of each Symbol, None where there is none'''
+        from .errors import REQUEST_ERRORS
+
+        def fetch(chunk):
+            try:
+                quotes = cls._get_real_time_timed(chunk, chunk_size)
+            except REQUEST_ERRORS:
+                if len(chunk) == 1:
+                    return {chunk[0]: None}
+                middle = len(chunk) // 2
+                return {**fetch(chunk[:middle]), **fetch(chunk[middle:])}
+            return match_quotes(quotes, chunk)
+
+        results = {}
+        for result in fetch_all(
+                fetch,
+                cls._real_time_chunks(symbols, chunk_size, max_url_length),
+                workers=workers,
+                max_per_host=max_per_host,
+                url=get_client().api_url):
+            results.update(result)
+        return {symbol: results.get(symbol) for symbol in symbols}
+
+    @staticmethod
+    def _real_time_chunks(symbols, chunk_size, max_url_length):
+        '''Split symbols for real time requests'''
+        return list(split_chunks(
+            symbols,
+            int(chunk_size),
+            max_url_length=max_url_length,
+            base_length=len(get_client().url('real-time/'))
+        ))
+
+    @classmethod
+    def _get_real_time_timed(cls, chunk, chunk_size):
+        '''Get a chunk, telling an AdaptiveChunkSize how it went'''
+        observe = getattr(chunk_size, 'observe', None)
+        if observe is None:
+            return cls._get_real_time_chunk(chunk)
+        start = time.monotonic()
+        try:
+            result = cls._get_real_time_chunk(chunk)
+        except Exception:
+            observe(len(chunk), time.monotonic() - start, error=True)
+            raise
+        observe(len(chunk), time.monotonic() - start)
+        return result
+
+    def get_end_of_day(self, *, from_date=None, to_date=None, period=None,
+                       workers=8, max_per_host=None, cache=None,
+                       join='outer'):
+        '''Get end of day data for every symbol concurrently
+
+        Returns an EODPanel of each symbol's EODSeries aligned on a common
+        date index. A symbol that fails, for example a delisted ticker
+        raising SymbolNotFoundError, is reported in the panel's errors
+        instead of aborting the batch'''
+        from .errors import REQUEST_ERRORS
+        from .series import EODPanel
+
+        def fetch(symbol):
+            try:
+                return symbol.get_end_of_day(
+                    from_date=from_date,
+                    to_date=to_date,
+                    period=period,
+                    cache=cache,
+                    columnar=True
+                ), None
+            except REQUEST_ERRORS as error:
+                return None, error
+
+        results = fetch_all(
+            fetch,
+            self.symbols,
+            workers=workers,
+            max_per_host=max_per_host,
+            url=get_client().api_url
+        )
+        series = {}
+        errors = {}
+        for symbol, (result, error) in zip(self.symbols, results):
+            key = f'{ symbol.code }.{ symbol.exchange_code }'
+            if error is None:
+                series[key] = result
+            else:
+                errors[key] = error
+        return EODPanel(series, errors, join=join)
+
+    @staticmethod
+    def _get_real_time_chunk(chunk):
+        '''Get the real time data for a chunk of up to 20 symbols'''
+        first = chunk[0]
+        path = f'real-time/{ first.code }.{ first.exchange_code }'
+        the_rest_string = ','.join(
+            [f'{s.code}.{s.exchange_code}' for s in chunk[1:]]
+        )
+        client = get_client()
+        response = client.get(
+            path,
+            params={
+                'fmt': 'json',
+                's': the_rest_string
+            }
+        )
+        result = client.parse(response)
+        if isinstance(result, dict):
+            result = [result]
+        return result
+
+
+def join_end_of_day(parts, columnar=False):
+    '''Join the bars of consecutive date windows, dropping the dates an
+    earlier window already had'''
+    if columnar:
+        from .series import EODSeries
+        return EODSeries.concatenate(parts)
+    bars = []
+    for part in parts:
+        if bars:
+            last = bars[-1]['date']
+            part = [bar for bar in part if bar['date'] > last]
+        bars.extend(part)
+    return bars
+
+
+def quotes_by_code(quotes, symbols):
+    '''Key quotes by code.exchange_code
+
+    Quotes come back in the order requested, if any are missing they are
+    matched on their code instead'''
+    keys = [f'{ s.code }.{ s.exchange_code }' for s in symbols]
+    if len(quotes) == len(keys):
+        return dict(zip(keys, quotes))
+    return {quote.get('code'): quote for quote in quotes}
+
+
+def match_quotes(quotes, symbols):
+    '''Map each requested Symbol to its quote or None
+
+    The api leaves out unknown symbols or sends them with a timestamp of
+    NA, quotes are matched in order when none are missing'''
+    if len(quotes) == len(symbols):
+        pairs = zip(symbols, quotes)
+    else:
+        by_code = {quote.get('code'): quote for quote in quotes}
+        pairs = [
+            (symbol, by_code.get(symbol_key(symbol))) for symbol in symbols
+        ]
+    return {
+        symbol: None if quote is None or quote.get('timestamp') == 'NA'
+        else quote
+        for symbol, quote in pairs
+    }
+
 
 def chunks(list_, number):
     '''Split the list into chunks of n'''
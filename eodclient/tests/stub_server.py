@@ -0,0 +1,306 @@
+'''A local stub of the EOD Historical Data api for offline tests'''
+
+import datetime
+import hashlib
+import json
+import random
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import parse_qs, urlsplit
+
+from eodclient.client import Client, get_client, set_client
+
+
+def quote(code):
+    '''A fake real time quote for code'''
+    return {
+        'code': code,
+        'timestamp': 1597953600,
+        'gmtoffset': 0,
+        'open': 10.0,
+        'high': 11.0,
+        'low': 9.5,
+        'close': 10.5,
+        'volume': 1000,
+        'previousClose': 10.0,
+        'change': 0.5,
+        'change_p': 5.0
+    }
+
+
+def bars(start=datetime.date(2020, 1, 1), end=datetime.date(2020, 3, 31)):
+    '''Fake end of day bars for every weekday between start and end'''
+    results = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            price = 100.0 + day.toordinal() % 50
+            results.append({
+                'date': day.isoformat(),
+                'open': price,
+                'high': price + 2,
+                'low': price - 1,
+                'close': price + 1,
+                'adjusted_close': price + 1,
+                'volume': 1000 + day.day
+            })
+        day += datetime.timedelta(days=1)
+    return results
+
+
+def period_bars(daily, period='d'):
+    '''Combine daily bars into weekly or monthly ones dated by their
+    first day'''
+    if period == 'd':
+        return daily
+    results = []
+    key = None
+    for bar in daily:
+        day = datetime.date.fromisoformat(bar['date'])
+        if period == 'w':
+            bar_key = day.isocalendar()[:2]
+        else:
+            bar_key = (day.year, day.month)
+        if bar_key != key:
+            key = bar_key
+            results.append(dict(bar))
+            continue
+        last = results[-1]
+        last['high'] = max(last['high'], bar['high'])
+        last['low'] = min(last['low'], bar['low'])
+        last['close'] = bar['close']
+        last['adjusted_close'] = bar['adjusted_close']
+        last['volume'] += bar['volume']
+    return results
+
+
+def symbols(exchange_code, count=50):
+    '''Fake symbol listings for an exchange'''
+    return [
+        {
+            'Code': f'S{ index }',
+            'Name': f'Stock { index }',
+            'Country': 'USA',
+            'Exchange': exchange_code,
+            'Currency': 'USD',
+            'Type': 'Common Stock'
+        }
+        for index in range(count)
+    ]
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class StubServer(object):
+    '''Serve fake api responses on localhost in a background thread
+
+    Use as a context manager, url is the api root to use in place of the
+    default client's api_url, see route. Payload sizes are set by the
+    number of symbols listed on an exchange and the first date of the
+    end of day history. error_rate is the share of requests answered
+    with a 500 at random, seeded by seed
+
+    splits and dividends are the corporate actions of code.exchange_code
+    symbols. adjustments multiplies the adjusted_close of a symbol's bars
+    before each ex date by its factor, a list of (date, factor) pairs.
+    listings replaces the symbols of an exchange by code. With etags
+    exchange listings are sent with an ETag and answered with a 304 when
+    it matches the request's If-None-Match'''
+
+    def __init__(self, latency=0.0, *, symbol_count=50,
+                 history_start=datetime.date(2020, 1, 1), error_rate=0.0,
+                 seed=None, etags=True):
+        self.latency = latency
+        self.symbol_count = symbol_count
+        self.splits = {}
+        self.dividends = {}
+        self.adjustments = {}
+        self.listings = {}
+        self.etags = etags
+        self.history_start = history_start
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.requests = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.faults = []
+        self.server = _HTTPServer(('127.0.0.1', 0), self.handler())
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address
+        return f'http://{ host }:{ port }/api'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def route(self, client=None):
+        '''A patcher sending client's requests, by default the default
+        client's, to the stub'''
+        return mock.patch.object(client or get_client(), 'api_url', self.url)
+
+    def inject(self, match, status=None, *, times=1, headers=None, delay=0):
+        '''Fail the next times requests whose path contains match
+
+        The fault responds with status and headers after delay seconds, a
+        status of None only delays the normal response'''
+        with self.lock:
+            self.faults.append([match, status, times, headers or {}, delay])
+
+    def fault(self, path):
+        '''Take the first injected fault matching path, or a random one
+        at error_rate'''
+        with self.lock:
+            for fault in self.faults:
+                if fault[0] in path and fault[2] > 0:
+                    fault[2] -= 1
+                    return fault
+            if self.error_rate and self.random.random() < self.error_rate:
+                return [path, 500, 0, {}, 0]
+        return None
+
+    def respond(self, path, query):
+        '''Return the status and body for a request'''
+        parts = path.strip('/').split('/')
+        if parts[:2] == ['api', 'real-time']:
+            codes = [parts[2]]
+            if query.get('s'):
+                codes += query['s'][0].split(',')
+            if len(codes) == 1:
+                return 200, quote(codes[0])
+            return 200, [quote(code) for code in codes]
+        if parts[:2] == ['api', 'eod']:
+            if parts[2].startswith('MISSING'):
+                return 404, None
+            start = self.history_start
+            end = datetime.date(2020, 3, 31)
+            if query.get('from'):
+                start = max(start, datetime.date.fromisoformat(query['from'][0]))
+            if query.get('to'):
+                end = min(end, datetime.date.fromisoformat(query['to'][0]))
+            results = bars(start, end)
+            for ex_date, factor in self.adjustments.get(parts[2], ()):
+                for bar in results:
+                    if bar['date'] < ex_date:
+                        bar['adjusted_close'] *= factor
+            period = query.get('period', ['d'])[0]
+            return 200, period_bars(results, period)
+        if parts[:2] == ['api', 'splits']:
+            return 200, self.splits.get(parts[2], [])
+        if parts[:2] == ['api', 'div']:
+            return 200, self.dividends.get(parts[2], [])
+        if parts[:2] == ['api', 'eod-bulk-last-day']:
+            date = datetime.date(2020, 3, 31)
+            if query.get('date'):
+                date = datetime.date.fromisoformat(query['date'][0])
+            return 200, [
+                dict(
+                    {'code': listing['Code'],
+                     'exchange_short_name': parts[2]},
+                    **bar
+                )
+                for listing in symbols(parts[2], self.symbol_count)
+                for bar in bars(date, date)
+            ]
+        if parts[:2] == ['api', 'exchanges-list']:
+            return 200, [
+                {'Name': 'USA Stocks', 'Code': 'US', 'OperatingMIC': 'XNAS',
+                 'Country': 'USA', 'Currency': 'USD'},
+                {'Name': 'New Exchange', 'Code': 'NEW', 'OperatingMIC': None,
+                 'Country': 'Nowhere', 'Currency': 'XXX'},
+            ]
+        if parts[:2] == ['api', 'exchanges']:
+            if parts[2] == 'NZ':
+                return 404, None
+            if parts[2] in self.listings:
+                return 200, self.listings[parts[2]]
+            return 200, symbols(parts[2], self.symbol_count)
+        return 404, None
+
+    def handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                with stub.lock:
+                    stub.requests.append(self.path)
+                    stub.active += 1
+                    stub.max_active = max(stub.max_active, stub.active)
+                headers = {}
+                try:
+                    if stub.latency:
+                        time.sleep(stub.latency)
+                    url = urlsplit(self.path)
+                    status, body = stub.respond(url.path, parse_qs(url.query))
+                    fault = stub.fault(self.path)
+                    if fault is not None:
+                        match, fault_status, times, headers, delay = fault
+                        time.sleep(delay)
+                        if fault_status is not None:
+                            status, body = fault_status, None
+                finally:
+                    with stub.lock:
+                        stub.active -= 1
+                if body is None:
+                    content = b'Ticker Not Found'
+                else:
+                    content = json.dumps(body).encode('utf-8')
+                if stub.etags and status == 200 and \
+                        url.path.startswith('/api/exchanges/'):
+                    etag = f'"{ hashlib.sha1(content).hexdigest() }"'
+                    headers = dict(headers, ETag=etag)
+                    if self.headers.get('If-None-Match') == etag:
+                        status, content = 304, b''
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+class StubServerTestCase(unittest.TestCase):
+    '''A test case with a StubServer the default client is routed to
+
+    server_options are the StubServer arguments. use_client makes a
+    client of the stub's own the default client for one test'''
+    server_options = {}
+
+    def setUp(self):
+        self.server = StubServer(**self.server_options)
+        self.server.__enter__()
+        self.addCleanup(self.server.__exit__)
+        patcher = self.server.route()
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def use_client(self, **options):
+        '''Set a Client of the stub with options as the default client
+        until the test ends'''
+        client = Client(api_key='key', api_url=self.server.url, **options)
+        self.addCleanup(client.close)
+        self.addCleanup(set_client, set_client(client))
+        return client
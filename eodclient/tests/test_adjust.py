@@ -0,0 +1,148 @@
+import unittest
+
+from eodclient.adjust import (
+    AdjustmentFactors,
+    adjustment_drift,
+    readjust,
+    split_ratio
+)
+from eodclient.retry import RetryPolicy
+from eodclient.series import EODSeries, np
+from eodclient.symbol import Symbol
+from eodclient.tests.stub_server import StubServerTestCase
+
+DATES = ['2020-01-06', '2020-01-07', '2020-01-08', '2020-01-09', '2020-01-10']
+CLOSES = [100.0, 100.0, 102.0, 51.0, 50.0]
+SPLITS = [{'date': '2020-01-09', 'split': '2.000000/1.000000'}]
+DIVIDENDS = [{'date': '2020-01-08', 'value': 1.0, 'unadjustedValue': 2.0}]
+
+
+def raw_series(closes=CLOSES, adjusted=None):
+    return EODSeries.from_records([
+        {'date': date, 'open': close, 'high': close + 1, 'low': close - 1,
+         'close': close, 'adjusted_close': close if adjusted is None
+         else adjusted[index], 'volume': 1000}
+        for index, (date, close) in enumerate(zip(DATES, closes))
+    ])
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class AdjustmentFactorsTests(unittest.TestCase):
+    '''Tests for the local split and dividend adjustment'''
+
+    def test_split_ratio(self):
+        '''Ensure the api's split format is read as shares after per before'''
+        self.assertEqual(split_ratio('4.000000/1.000000'), 4.0)
+        self.assertEqual(split_ratio('1/10'), 0.1)
+        self.assertEqual(split_ratio(3), 3.0)
+
+    def test_factors(self):
+        '''Ensure each bar gets the factors of the events after it'''
+        factors = AdjustmentFactors.from_events(
+            raw_series(), SPLITS, DIVIDENDS)
+        np.testing.assert_allclose(factors.split, [0.5, 0.5, 0.5, 1, 1])
+        np.testing.assert_allclose(
+            factors.dividend, [0.98, 0.98, 1, 1, 1])
+        np.testing.assert_allclose(
+            factors.total, [0.49, 0.49, 0.5, 1, 1])
+
+    def test_apply(self):
+        '''Ensure prices and volume are adjusted'''
+        adjusted = AdjustmentFactors.from_events(
+            raw_series(), SPLITS, DIVIDENDS).apply(raw_series())
+        np.testing.assert_allclose(adjusted.close, [49, 49, 51, 51, 50])
+        np.testing.assert_allclose(adjusted.adjusted_close, adjusted.close)
+        np.testing.assert_allclose(
+            adjusted.high, [49.49, 49.49, 51.5, 52, 51])
+        np.testing.assert_allclose(
+            adjusted.volume, [2000, 2000, 2000, 1000, 1000])
+
+    def test_events_outside(self):
+        '''Ensure events before the first bar change nothing and events
+        after the last bar change every bar'''
+        factors = AdjustmentFactors.from_events(
+            raw_series(),
+            [{'date': '2019-01-02', 'split': '2/1'},
+             {'date': '2020-02-03', 'split': '4/1'}],
+            [{'date': '2019-06-03', 'value': 5.0}])
+        np.testing.assert_allclose(factors.total, [0.25] * 5)
+        empty = AdjustmentFactors.from_events(raw_series())
+        np.testing.assert_allclose(empty.total, [1] * 5)
+        self.assertEqual(
+            len(AdjustmentFactors.from_events(
+                EODSeries.from_records([]), SPLITS, DIVIDENDS).total), 0)
+
+    def test_drift(self):
+        '''Ensure drift is measured at the first shared date'''
+        stored = raw_series()
+        fresh = raw_series(adjusted=[90.0, 90.0, 91.8, 51.0, 50.0])[1:]
+        self.assertEqual(
+            adjustment_drift(stored, fresh),
+            {'close': 1.0, 'adjusted_close': 0.9, 'date': '2020-01-07'})
+        self.assertIsNone(adjustment_drift(stored, raw_series()[3:]))
+        with self.assertRaises(ValueError):
+            adjustment_drift(stored[:2], stored[3:])
+
+    def test_readjust(self):
+        '''Ensure stored bars before the overlap are rescaled in place'''
+        stored = raw_series()[:4]
+        adjusted_close = stored.adjusted_close
+        fresh = raw_series(adjusted=[0, 0, 0, 45.9, 50.0])[3:]
+        joined, drift = readjust(stored, fresh)
+
+        self.assertEqual(drift['adjusted_close'], 0.9)
+        np.testing.assert_allclose(
+            joined.adjusted_close, [90, 90, 91.8, 45.9, 50])
+        np.testing.assert_allclose(joined.close, CLOSES)
+        np.testing.assert_allclose(adjusted_close[:3], [90, 90, 91.8])
+
+    def test_readjust_read_only(self):
+        '''Ensure read only stored columns are copied before rescaling'''
+        stored = raw_series()
+        for field in ('open', 'high', 'low', 'close', 'adjusted_close',
+                      'volume'):
+            getattr(stored, field).flags.writeable = False
+        fresh = raw_series(adjusted=[0, 0, 0, 0, 25.0])[4:]
+        joined, drift = readjust(stored, fresh)
+        self.assertEqual(drift['adjusted_close'], 0.5)
+        self.assertEqual(joined.adjusted_close[0], 50)
+        self.assertTrue(stored.adjusted_close.flags.writeable)
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class CorporateActionTests(StubServerTestCase):
+    '''Tests for getting splits and dividends from the api'''
+
+    def setUp(self):
+        super().setUp()
+        self.use_client(retry_policy=RetryPolicy(backoff=0.01))
+        self.server.splits['AAPL.US'] = SPLITS
+        self.server.dividends['AAPL.US'] = DIVIDENDS
+
+    def test_events(self):
+        '''Ensure splits and dividends are requested with the dates'''
+        symbol = Symbol('AAPL', 'US')
+        self.assertEqual(symbol.get_splits(), SPLITS)
+        self.assertEqual(
+            symbol.get_dividends(from_date='2020-01-01'), DIVIDENDS)
+        self.assertTrue(
+            self.server.requests[0].startswith('/api/splits/AAPL.US?'))
+        self.assertIn('from=2020-01-01', self.server.requests[1])
+        self.assertEqual(Symbol('MSFT', 'US').get_splits(), [])
+
+    def test_adjust_history(self):
+        '''Ensure fetched history adjusts with the fetched events'''
+        symbol = Symbol('AAPL', 'US')
+        series = symbol.get_end_of_day(columnar=True)
+        factors = AdjustmentFactors.from_events(
+            series, symbol.get_splits(), symbol.get_dividends())
+        adjusted = factors.apply(series)
+        first = series.slice(end='2020-01-07')
+        self.assertTrue(np.allclose(
+            adjusted.slice(end='2020-01-07').close,
+            first.close * 0.5 * (1 - 2.0 / series.slice(
+                '2020-01-07', '2020-01-07').close[0])))
+
+
+if __name__ == '__main__':
+    unittest.main()
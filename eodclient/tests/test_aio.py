@@ -0,0 +1,145 @@
+import asyncio
+import unittest
+
+from eodclient import aio
+from eodclient.errors import SymbolNotFoundError
+from eodclient.exchange import Exchange
+from eodclient.series import np
+from eodclient.symbol import Symbol, SymbolSet
+from eodclient.tests.stub_server import StubServerTestCase
+
+
+@unittest.skipIf(aio.aiohttp is None, 'aiohttp is not installed')
+class AsyncClientTests(StubServerTestCase):
+    '''Tests for the asyncio client against the stub server'''
+
+    server_options = {'latency': 0.01}
+
+    def run_with_session(self, coroutine_function, **kwargs):
+        '''Run the coroutine function with a fresh AsyncSession'''
+        async def main():
+            async with aio.AsyncSession(**kwargs) as session:
+                return await coroutine_function(session)
+        return asyncio.run(main())
+
+    def test_results_match_sync(self):
+        '''Ensure every async method returns what the sync one does'''
+        symbol_list = [
+            {'code': f'S{ index }', 'exchange_code': 'US'}
+            for index in range(45)
+        ]
+
+        async def fetch(session):
+            return await asyncio.gather(
+                aio.AsyncSymbol('AAPL', 'US', session=session).get_real_time(),
+                aio.AsyncSymbol('AAPL', 'US', session=session).get_end_of_day(
+                    from_date='2020-02-01'),
+                aio.AsyncSymbolSet(
+                    symbol_list, session=session).get_real_time(),
+                aio.AsyncExchange('JSE', session=session).get_symbols(),
+            )
+
+        real_time, end_of_day, real_time_set, symbols = \
+            self.run_with_session(fetch)
+        self.assertEqual(real_time, Symbol('AAPL', 'US').get_real_time())
+        self.assertEqual(
+            end_of_day,
+            Symbol('AAPL', 'US').get_end_of_day(from_date='2020-02-01')
+        )
+        self.assertEqual(
+            real_time_set, SymbolSet(symbol_list).get_real_time())
+        self.assertEqual(symbols, Exchange('JSE').get_symbols())
+
+    def test_gather_respects_concurrency(self):
+        '''Ensure the semaphore caps requests in flight'''
+        async def fetch(session):
+            return await asyncio.gather(*[
+                aio.AsyncSymbol(
+                    f'S{ index }', 'US', session=session).get_end_of_day()
+                for index in range(100)
+            ])
+
+        results = self.run_with_session(fetch, concurrency=5)
+        self.assertEqual(len(results), 100)
+        self.assertEqual(len(self.server.requests), 100)
+        self.assertLessEqual(self.server.max_active, 5)
+
+    def test_symbol_not_found(self):
+        '''Ensure a 404 raises SymbolNotFoundError'''
+        async def fetch(session):
+            return await aio.AsyncSymbol(
+                'MISSING', 'US', session=session).get_end_of_day()
+
+        with self.assertRaises(SymbolNotFoundError):
+            self.run_with_session(fetch)
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_set_end_of_day(self):
+        '''Ensure a symbol set's history matches the sync panel'''
+        symbol_list = [
+            {'code': code, 'exchange_code': 'US'}
+            for code in ('AAPL', 'MSFT', 'MISSING')
+        ]
+
+        async def fetch(session):
+            return await aio.AsyncSymbolSet(
+                symbol_list, session=session).get_end_of_day(
+                    from_date='2020-02-01')
+
+        panel = self.run_with_session(fetch)
+        expected = SymbolSet(symbol_list).get_end_of_day(
+            from_date='2020-02-01')
+        self.assertEqual(panel.codes, ['AAPL.US', 'MSFT.US'])
+        self.assertIsInstance(panel.errors['MISSING.US'], SymbolNotFoundError)
+        np.testing.assert_array_equal(panel.dates, expected.dates)
+
+    def test_default_session(self):
+        '''Ensure the default session serves one asyncio.run after another
+        and is closed with each loop'''
+        async def fetch():
+            quote = await aio.AsyncSymbol('AAPL', 'US').get_real_time()
+            return quote, aio.get_session()
+
+        first, session = asyncio.run(fetch())
+        second, other = asyncio.run(fetch())
+        self.assertEqual(first, second)
+        self.assertIsNot(session, other)
+        self.assertIsNone(session._session)
+        self.assertIsNone(other._session)
+
+    def test_closed_loop(self):
+        '''Ensure a session left open in a closed loop opens again'''
+        session = aio.AsyncSession()
+
+        async def fetch():
+            return await aio.AsyncSymbol(
+                'AAPL', 'US', session=session).get_real_time()
+
+        loop = asyncio.new_event_loop()
+        expected = loop.run_until_complete(fetch())
+        loop.close()
+        self.addCleanup(asyncio.run, session.close())
+        self.assertEqual(asyncio.run(fetch()), expected)
+
+    def test_one_loop(self):
+        '''Ensure an open session refuses another loop until closed'''
+        session = aio.AsyncSession()
+
+        async def fetch():
+            return await aio.AsyncSymbol(
+                'AAPL', 'US', session=session).get_real_time()
+
+        async def fetch_and_close():
+            try:
+                return await fetch()
+            finally:
+                await session.close()
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        expected = loop.run_until_complete(fetch())
+        with self.assertRaises(RuntimeError):
+            asyncio.run(fetch())
+        loop.run_until_complete(session.close())
+        self.assertEqual(asyncio.run(fetch_and_close()), expected)
+        self.assertEqual(asyncio.run(fetch_and_close()), expected)
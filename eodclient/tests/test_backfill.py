@@ -0,0 +1,91 @@
+import os
+import tempfile
+
+from eodclient.backfill import Backfill
+from eodclient.cache import EODCache
+from eodclient.exchange import EXCHANGES
+from eodclient.tests.stub_server import StubServerTestCase, bars
+
+
+class Interrupted(Exception):
+    '''Stands in for a crash part way through a run'''
+
+
+class BackfillTests(StubServerTestCase):
+    '''Tests for the multi-process backfill'''
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'eod.sqlite')
+
+    def backfill(self, **kwargs):
+        backfill = Backfill(
+            self.path, ['US', 'JSE'], processes=2, shard_size=10, **kwargs)
+        self.addCleanup(backfill.close)
+        return backfill
+
+    def eod_requests(self):
+        return [path for path in self.server.requests if '/eod/' in path]
+
+    def test_backfill(self):
+        '''Ensure every listed symbol is stored with throughput reported'''
+        reports = []
+        report = self.backfill().run(reports.append)
+
+        self.assertEqual(report['symbols'], 100)
+        self.assertEqual(report['rows'], 100 * len(bars()))
+        self.assertEqual(report['remaining'], 0)
+        self.assertGreater(report['rows_per_second'], 0)
+        self.assertEqual(len(reports), 10)
+        self.assertEqual(len(self.eod_requests()), 100)
+        cache = EODCache(self.path)
+        self.addCleanup(cache.close)
+        self.assertEqual(cache.read('S7.JSE'), bars())
+
+    def test_resume_after_crash(self):
+        '''Ensure a second run only downloads what the first did not store'''
+        def crash(report):
+            raise Interrupted()
+
+        with self.assertRaises(Interrupted):
+            self.backfill().run(crash)
+        stored = self.backfill().status()['done']
+        self.assertGreaterEqual(stored, 10)
+
+        report = self.backfill().run()
+        self.assertEqual(report['symbols'], 100 - stored)
+        self.assertEqual(self.backfill().status(), {'done': 100})
+
+        before = len(self.server.requests)
+        report = self.backfill().run()
+        self.assertEqual(report['symbols'], 0)
+        self.assertEqual(len(self.server.requests), before)
+
+    def test_failures_are_retried(self):
+        '''Ensure failed symbols are recorded and tried again next run'''
+        self.server.inject('/eod/S3.US', 404)
+        report = self.backfill().run()
+
+        self.assertEqual(report['failed'], 1)
+        self.assertEqual(report['symbols'], 99)
+        self.assertIn('S3.US', self.backfill().failures())
+
+        report = self.backfill().run()
+        self.assertEqual(report['symbols'], 1)
+        self.assertEqual(self.backfill().failures(), {})
+
+    def test_every_exchange(self):
+        '''Ensure every exchange is planned by default and one that fails
+        to list does not stop the others'''
+        backfill = Backfill(self.path)
+        self.addCleanup(backfill.close)
+        self.assertEqual(backfill.exchange_codes, list(EXCHANGES))
+
+        errors = backfill.plan()
+        self.assertEqual(list(errors), ['NZ'])
+        pending = backfill.pending()
+        self.assertEqual(len(pending), 50 * (len(EXCHANGES) - 1))
+        self.assertIn('S0.JSE', pending)
+        self.assertEqual(list(backfill.plan()), ['NZ'])
@@ -0,0 +1,95 @@
+import os
+import tempfile
+
+from eodclient.cache import EODCache
+from eodclient.symbol import Symbol
+from eodclient.tests.stub_server import StubServerTestCase
+
+
+class EODCacheTests(StubServerTestCase):
+    '''Tests for the on-disk end of day store'''
+
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = EODCache(os.path.join(directory.name, 'eod.sqlite'))
+        self.addCleanup(self.cache.close)
+        self.symbol = Symbol(code='AAPL', exchange_code='US')
+
+    def test_incremental_refresh(self):
+        '''Ensure a stored symbol only requests bars after the last date'''
+        first = self.symbol.get_end_of_day(cache=self.cache)
+        second = self.symbol.get_end_of_day(cache=self.cache)
+
+        self.assertEqual(first, self.symbol.get_end_of_day())
+        self.assertEqual(first, second)
+        self.assertNotIn('from=', self.server.requests[0])
+        self.assertIn('from=2020-04-01', self.server.requests[1])
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 1})
+
+    def test_stored_range_covered(self):
+        '''Ensure nothing is requested when the store reaches to_date'''
+        self.symbol.get_end_of_day(cache=self.cache)
+        response = self.symbol.get_end_of_day(
+            from_date='2020-02-03', to_date='2020-03-31', cache=self.cache)
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(response[0]['date'], '2020-02-03')
+        self.assertEqual(response[-1]['date'], '2020-03-31')
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 1})
+
+        self.symbol.get_end_of_day(to_date='2020-04-02', cache=self.cache)
+        self.assertIn('from=2020-04-01', self.server.requests[-1])
+
+    def test_merges_new_rows(self):
+        '''Ensure bars missing from the store are fetched and merged'''
+        self.symbol.get_end_of_day(cache=self.cache)
+        with self.cache._connection:
+            self.cache._connection.execute(
+                "DELETE FROM bars WHERE date >= '2020-03-01'")
+        response = self.symbol.get_end_of_day(cache=self.cache)
+
+        self.assertIn('from=2020-02-29', self.server.requests[-1])
+        self.assertEqual(response, self.symbol.get_end_of_day())
+
+    def test_from_date(self):
+        '''Ensure an earlier from date than stored downloads again'''
+        response = self.symbol.get_end_of_day(
+            from_date='2020-03-02', cache=self.cache)
+        self.assertEqual(response[0]['date'], '2020-03-02')
+
+        response = self.symbol.get_end_of_day(
+            from_date='2020-03-16', cache=self.cache)
+        self.assertEqual(response[0]['date'], '2020-03-16')
+
+        response = self.symbol.get_end_of_day(
+            from_date='2020-02-03', cache=self.cache)
+        self.assertEqual(response[0]['date'], '2020-02-03')
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 2})
+
+    def test_invalidate(self):
+        '''Ensure an invalidated symbol downloads its full history'''
+        self.symbol.get_end_of_day(cache=self.cache)
+        self.cache.invalidate('AAPL.US')
+        self.assertIsNone(self.cache.last_date(self.symbol))
+
+        self.symbol.get_end_of_day(cache=self.cache)
+        self.assertNotIn('from=', self.server.requests[-1])
+        self.assertEqual(self.cache.stats, {'hits': 0, 'misses': 2})
+
+    def test_readjust(self):
+        '''Ensure a new dividend rescales stored bars without a download'''
+        before = self.symbol.get_end_of_day(cache=self.cache)
+        self.server.adjustments['AAPL.US'] = [('2020-03-20', 0.5)]
+
+        drift = self.cache.readjust(self.symbol, tail_days=20)
+        self.assertEqual(
+            drift, {'close': 1.0, 'adjusted_close': 0.5, 'date': '2020-03-11'})
+        self.assertIn('from=2020-03-11', self.server.requests[-1])
+        self.assertEqual(self.cache.read(self.symbol), [
+            dict(bar, adjusted_close=bar['adjusted_close'] * factor)
+            for bar in before
+            for factor in [0.5 if bar['date'] < '2020-03-20' else 1.0]
+        ])
+        self.assertIsNone(self.cache.readjust(self.symbol))
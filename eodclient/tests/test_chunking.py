@@ -0,0 +1,103 @@
+import unittest
+
+from eodclient.chunking import AdaptiveChunkSize, split_chunks
+from eodclient.symbol import Symbol, SymbolSet, match_quotes
+from eodclient.tests.stub_server import StubServerTestCase, quote
+
+
+def symbols(count, prefix='S'):
+    return [Symbol.get(f'{ prefix }{ index }', 'US') for index in range(count)]
+
+
+class SplitChunksTests(unittest.TestCase):
+    '''Tests for splitting symbols into real time requests'''
+
+    def test_chunk_size(self):
+        '''Ensure chunks hold at most chunk_size symbols in order'''
+        result = list(split_chunks(symbols(45), 20))
+        self.assertEqual([len(chunk) for chunk in result], [20, 20, 5])
+        self.assertEqual(sum(result, []), symbols(45))
+
+    def test_url_length(self):
+        '''Ensure long codes start a new chunk before the url is too long'''
+        long_symbols = symbols(30, prefix='X' * 40)
+        result = list(split_chunks(
+            long_symbols, 100, max_url_length=500, base_length=100))
+        for chunk in result:
+            keys = [f'{ s.code }.{ s.exchange_code }' for s in chunk]
+            length = 100 + 64 + len(keys[0]) + sum(
+                len(key) + 3 for key in keys[1:])
+            self.assertLessEqual(length, 500)
+        self.assertEqual(sum(result, []), long_symbols)
+        self.assertGreater(len(result), 3)
+
+
+class AdaptiveChunkSizeTests(unittest.TestCase):
+    '''Tests for tuning the chunk size from requests'''
+
+    def test_grows_when_fast(self):
+        size = AdaptiveChunkSize(20, maximum=24, step=2)
+        for request in range(5):
+            size.observe(size.size, 0.1)
+        self.assertEqual(size.size, 24)
+
+    def test_shrinks_when_slow_or_failing(self):
+        size = AdaptiveChunkSize(20, target_latency=1.0)
+        size.observe(20, 2.0)
+        self.assertEqual(size.size, 15)
+        size.observe(15, 0.1, error=True)
+        self.assertEqual(size.size, 7)
+        for request in range(10):
+            size.observe(size.size, 0.1, error=True)
+        self.assertEqual(size.size, 1)
+        self.assertEqual(size.errors, 11)
+
+    def test_partial_chunk_does_not_grow(self):
+        size = AdaptiveChunkSize(20)
+        size.observe(5, 0.1)
+        self.assertEqual(size.size, 20)
+
+
+class RealTimeChunkTests(StubServerTestCase):
+    '''Tests for chunked real time requests against the stub server'''
+
+    server_options = {'latency': 0.02}
+
+    def test_chunk_size(self):
+        '''Ensure chunk_size sets the number of requests'''
+        symbol_set = SymbolSet.from_symbols(symbols(120))
+        response = symbol_set.get_real_time(chunk_size=50)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(response, SymbolSet.from_symbols(
+            symbols(120)).get_real_time())
+
+    def test_adaptive(self):
+        '''Ensure an adaptive size shrinks on slow requests'''
+        size = AdaptiveChunkSize(20, target_latency=0.001)
+        SymbolSet.from_symbols(symbols(60)).get_real_time(chunk_size=size)
+        self.assertLess(size.size, 20)
+        self.assertEqual(size.requests, len(self.server.requests))
+
+    def test_by_symbol(self):
+        '''Ensure quotes map to the requested Symbols and a failing symbol
+        only loses its own quote'''
+        requested = symbols(40)
+        requested[13] = Symbol('BAD', 'US')
+        self.server.inject('BAD.US', 404, times=10)
+
+        response = SymbolSet.from_symbols(requested).get_real_time(
+            by_symbol=True)
+        self.assertEqual(list(response), requested)
+        self.assertIsNone(response[requested[13]])
+        self.assertEqual(response[requested[0]]['code'], 'S0.US')
+        self.assertEqual(
+            sum(quote is not None for quote in response.values()), 39)
+
+    def test_match_quotes(self):
+        '''Ensure missing and NA quotes map to None'''
+        requested = symbols(3)
+        quotes = [quote('S2.US'), dict(quote('S0.US'), timestamp='NA')]
+        self.assertEqual(
+            match_quotes(quotes, requested),
+            {requested[0]: None, requested[1]: None, requested[2]: quotes[0]}
+        )
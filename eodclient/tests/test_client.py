@@ -0,0 +1,126 @@
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+import eodclient
+from eodclient.client import Client, get_client, set_client
+from eodclient.concurrency import fetch_all
+from eodclient.errors import APIKeyMissingError
+from eodclient.symbol import Symbol
+from eodclient.tests.stub_server import StubServer, StubServerTestCase
+
+IMPORT_CHECK = '''
+import sys
+import eodclient
+from eodclient.exchange import EXCHANGE_CODES
+print(','.join(
+    name for name in ('requests', 'numpy', 'asyncio', 'eodclient.symbol')
+    if name in sys.modules
+))
+'''
+
+
+class ClientTests(unittest.TestCase):
+    '''Tests for the lazily connected client'''
+
+    def test_import_without_key(self):
+        '''Ensure importing needs no api key and loads nothing heavy'''
+        env = dict(os.environ)
+        env.pop('EOD_API_KEY', None)
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_CHECK],
+            env=env,
+            check=True,
+            stdout=subprocess.PIPE,
+            universal_newlines=True
+        ).stdout.strip()
+        self.assertEqual(output, 'eodclient.symbol')
+
+    def test_missing_key_on_request(self):
+        '''Ensure a missing key is raised on the first request'''
+        client = Client()
+        with mock.patch.dict(os.environ):
+            os.environ.pop('EOD_API_KEY', None)
+            with self.assertRaises(APIKeyMissingError):
+                client.session
+
+    def test_lazy_session(self):
+        '''Ensure the session is created once on first use'''
+        client = Client(api_key='key', pool_maxsize=4)
+        self.assertIsNone(client._session)
+        session = client.session
+        self.assertIs(client.session, session)
+        self.assertEqual(session.params['api_token'], 'key')
+        self.assertEqual(session.get_adapter('https://x')._pool_maxsize, 4)
+        client.close()
+        self.assertIsNone(client._session)
+
+    def test_set_client(self):
+        '''Ensure symbols use the default client'''
+        with StubServer() as server, \
+                Client(api_key='key', api_url=server.url) as client:
+            previous = set_client(client)
+            self.addCleanup(set_client, previous)
+            self.assertIs(get_client(), client)
+            self.assertIs(eodclient.session, client.session)
+            Symbol('AAPL', 'US').get_real_time()
+        self.assertIn('api_token=key', server.requests[0])
+
+    def test_lazy_names(self):
+        '''Ensure public names resolve from their submodules'''
+        self.assertIs(eodclient.Symbol, Symbol)
+        with self.assertRaises(AttributeError):
+            eodclient.not_a_name
+
+
+class PoolTests(StubServerTestCase):
+    '''Tests for connection pool configuration and stats'''
+
+    server_options = {'latency': 0.02}
+
+    def fetch(self, client, count, workers):
+        '''Get count quotes on workers threads through client'''
+        previous = set_client(client)
+        self.addCleanup(set_client, previous)
+        self.addCleanup(client.close)
+        fetch_all(
+            lambda index: Symbol(f'S{ index }', 'US').get_real_time(),
+            range(count),
+            workers=workers
+        )
+        return client.pool_stats()
+
+    def test_sequential_requests_reuse(self):
+        '''Ensure sequential requests share one connection'''
+        client = Client(api_key='key', api_url=self.server.url)
+        self.assertEqual(client.pool_stats()['requests'], 0)
+        stats = self.fetch(client, 20, workers=1)
+        self.assertEqual(stats['requests'], 20)
+        self.assertEqual(stats['connections_opened'], 1)
+        self.assertEqual(stats['reuse_ratio'], 19 / 20)
+
+    def test_pool_block_caps_connections(self):
+        '''Ensure a blocking pool never opens more than pool_maxsize'''
+        client = Client(
+            api_key='key', api_url=self.server.url,
+            pool_maxsize=2, pool_block=True
+        )
+        stats = self.fetch(client, 40, workers=8)
+        self.assertEqual(stats['requests'], 40)
+        self.assertLessEqual(stats['connections_opened'], 2)
+        self.assertLessEqual(self.server.max_active, 2)
+
+    def test_small_pool_discards_connections(self):
+        '''Ensure an undersized pool shows up as a low reuse ratio'''
+        client = Client(api_key='key', api_url=self.server.url, pool_maxsize=1)
+        stats = self.fetch(client, 40, workers=8)
+        self.assertGreater(stats['connections_opened'], 2)
+
+    def test_compress(self):
+        '''Ensure compress=False asks for an uncompressed body'''
+        client = Client(api_key='key', compress=False)
+        self.assertEqual(client.session.headers['Accept-Encoding'], 'identity')
+        self.assertIn('gzip', Client(api_key='key').session.headers[
+            'Accept-Encoding'])
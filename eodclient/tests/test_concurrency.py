@@ -0,0 +1,51 @@
+import time
+
+from eodclient.symbol import SymbolSet
+from eodclient.tests.stub_server import StubServerTestCase
+
+
+class ConcurrentRealTimeTests(StubServerTestCase):
+    '''Tests for fetching real time chunks in parallel'''
+
+    server_options = {'latency': 0.05}
+
+    def setUp(self):
+        super().setUp()
+        self.symbol_set = SymbolSet(
+            [
+                {'code': f'S{ index }', 'exchange_code': 'US'}
+                for index in range(200)
+            ]
+        )
+
+    def test_parallel_keeps_symbol_order(self):
+        '''Ensure results come back in the order of the symbols'''
+        response = self.symbol_set.get_real_time(workers=5)
+        self.assertEqual(
+            [quote['code'] for quote in response],
+            [f'S{ index }.US' for index in range(200)]
+        )
+
+    def test_parallel_matches_serial(self):
+        '''Ensure the threaded mode returns the same as the serial mode'''
+        self.assertEqual(
+            self.symbol_set.get_real_time(workers=10),
+            self.symbol_set.get_real_time()
+        )
+
+    def test_parallel_is_faster(self):
+        '''Ensure 10 chunks on 10 workers take about one round trip'''
+        start = time.monotonic()
+        self.symbol_set.get_real_time()
+        serial = time.monotonic() - start
+
+        start = time.monotonic()
+        self.symbol_set.get_real_time(workers=10)
+        parallel = time.monotonic() - start
+        self.assertLess(parallel, serial / 2)
+
+    def test_max_per_host(self):
+        '''Ensure no more than max_per_host requests run at once'''
+        self.symbol_set.get_real_time(workers=10, max_per_host=3)
+        self.assertEqual(len(self.server.requests), 10)
+        self.assertLessEqual(self.server.max_active, 3)
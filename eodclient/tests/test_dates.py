@@ -0,0 +1,213 @@
+import asyncio
+import datetime
+import os
+import tempfile
+import unittest
+from urllib.parse import parse_qs, urlsplit
+
+from eodclient import aio
+from eodclient.cache import EODCache
+from eodclient.dates import as_date, date_windows
+from eodclient.errors import (
+    IncorrectDateFormatError,
+    IncorrectPeriodError,
+    SymbolNotFoundError
+)
+from eodclient.retry import RetryPolicy
+from eodclient.series import EODSeries, np
+from eodclient.symbol import Symbol, join_end_of_day
+from eodclient.tests.stub_server import StubServerTestCase
+
+
+class DateTests(unittest.TestCase):
+    '''Tests for converting dates and splitting ranges'''
+
+    def test_as_date(self):
+        '''Ensure every supported date type converts'''
+        expected = datetime.date(2020, 2, 3)
+        values = [
+            '2020-02-03', expected, datetime.datetime(2020, 2, 3, 15, 30)]
+        if np is not None:
+            values += [
+                np.datetime64('2020-02-03'),
+                np.datetime64('2020-02-03T12:00:00'),
+            ]
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(as_date(value), expected)
+
+    def test_bad_dates(self):
+        '''Ensure anything else raises IncorrectDateFormatError'''
+        for value in ['03-02-2020', '2020/02/03', 2020, None]:
+            with self.subTest(value=value):
+                with self.assertRaises(IncorrectDateFormatError):
+                    as_date(value)
+
+    def test_get_date(self):
+        '''Ensure Symbol.get_date takes dates too'''
+        self.assertEqual(
+            Symbol.get_date(datetime.date(2018, 8, 20)),
+            datetime.datetime(2018, 8, 20))
+
+    def test_windows(self):
+        '''Ensure windows cover the range without gaps or overlaps'''
+        windows = date_windows('2020-01-01', '2020-01-25', 10)
+        self.assertEqual(windows, [
+            (datetime.date(2020, 1, 1), datetime.date(2020, 1, 10)),
+            (datetime.date(2020, 1, 11), datetime.date(2020, 1, 20)),
+            (datetime.date(2020, 1, 21), datetime.date(2020, 1, 25)),
+        ])
+        self.assertEqual(
+            date_windows('2020-01-02', '2020-01-01', 10), [])
+        with self.assertRaises(ValueError):
+            date_windows('2020-01-01', '2020-01-25', 0)
+
+    def test_period_windows(self):
+        '''Ensure weekly and monthly windows end with a whole period'''
+        weekly = date_windows(
+            '2020-01-01', '2020-03-31', datetime.timedelta(days=10), 'w')
+        for start, end in weekly[:-1]:
+            self.assertEqual(end.weekday(), 6)
+        monthly = date_windows('2020-01-15', '2020-06-30', 40, 'm')
+        self.assertEqual(
+            [end.isoformat() for start, end in monthly],
+            ['2020-02-29', '2020-04-30', '2020-06-30'])
+        with self.assertRaises(IncorrectPeriodError):
+            date_windows('2020-01-01', '2020-03-31', 10, 'y')
+
+    def test_join(self):
+        '''Ensure overlapping windows join without repeated dates'''
+        parts = [
+            [{'date': '2020-01-01'}, {'date': '2020-01-02'}],
+            [],
+            [{'date': '2020-01-02'}, {'date': '2020-01-03'}],
+        ]
+        self.assertEqual(
+            [bar['date'] for bar in join_end_of_day(parts)],
+            ['2020-01-01', '2020-01-02', '2020-01-03'])
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_join_columnar(self):
+        '''Ensure series join in date order without repeated dates'''
+        def series(*days):
+            return EODSeries.from_records([
+                {'date': day, 'open': 1.0, 'high': 1.0, 'low': 1.0,
+                 'close': float(index), 'adjusted_close': 1.0, 'volume': 1}
+                for index, day in enumerate(days)
+            ])
+
+        joined = join_end_of_day([
+            series('2020-01-01', '2020-01-02'),
+            series(),
+            series('2020-01-02', '2020-01-03'),
+        ], columnar=True)
+        self.assertEqual(
+            [str(day) for day in joined.dates],
+            ['2020-01-01', '2020-01-02', '2020-01-03'])
+        self.assertEqual(list(joined.close), [0.0, 1.0, 1.0])
+        self.assertEqual(len(EODSeries.concatenate([])), 0)
+
+
+class EndOfDayRangeTests(StubServerTestCase):
+    '''Tests for end of day requests over date ranges'''
+
+    server_options = {'history_start': datetime.date(2018, 1, 1)}
+
+    def setUp(self):
+        super().setUp()
+        self.use_client(retry_policy=RetryPolicy(backoff=0.01))
+
+    def eod_queries(self):
+        '''The query of each end of day request the stub answered'''
+        return [
+            parse_qs(urlsplit(path).query)
+            for path in self.server.requests if path.startswith('/api/eod/')
+        ]
+
+    def test_params(self):
+        '''Ensure dates of any type and the period are sent'''
+        bars = Symbol('AAPL', 'US').get_end_of_day(
+            from_date=datetime.date(2020, 1, 6),
+            to_date=np.datetime64('2020-01-31') if np is not None
+            else '2020-01-31',
+            period='w')
+        query = self.eod_queries()[0]
+        self.assertEqual(query['from'], ['2020-01-06'])
+        self.assertEqual(query['to'], ['2020-01-31'])
+        self.assertEqual(query['period'], ['w'])
+        self.assertEqual(
+            [bar['date'] for bar in bars],
+            ['2020-01-06', '2020-01-13', '2020-01-20', '2020-01-27'])
+
+    def test_bad_period(self):
+        '''Ensure an unknown period is refused before any request'''
+        with self.assertRaises(IncorrectPeriodError):
+            Symbol('AAPL', 'US').get_end_of_day(period='y')
+        with self.assertRaises(TypeError):
+            Symbol('AAPL', 'US').get_end_of_day(order='d')
+        self.assertEqual(self.eod_queries(), [])
+
+    def test_windows(self):
+        '''Ensure windowed requests join to the single request result'''
+        symbol = Symbol('AAPL', 'US')
+        for period in ('d', 'w', 'm'):
+            with self.subTest(period=period):
+                expected = symbol.get_end_of_day(
+                    from_date='2018-01-03', to_date='2020-03-31',
+                    period=period)
+                before = len(self.eod_queries())
+                windowed = symbol.get_end_of_day(
+                    from_date='2018-01-03', to_date='2020-03-31',
+                    period=period, window=100, workers=4)
+                self.assertEqual(windowed, expected)
+                self.assertGreater(len(self.eod_queries()) - before, 6)
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_windows_columnar(self):
+        '''Ensure windowed columnar requests join into one series'''
+        symbol = Symbol('AAPL', 'US')
+        expected = symbol.get_end_of_day(
+            from_date='2018-01-03', to_date='2020-03-31', columnar=True)
+        windowed = symbol.get_end_of_day(
+            from_date='2018-01-03', to_date='2020-03-31', columnar=True,
+            window=datetime.timedelta(days=365))
+        np.testing.assert_array_equal(windowed.dates, expected.dates)
+        np.testing.assert_array_equal(windowed.close, expected.close)
+
+    def test_window_with_cache(self):
+        '''Ensure a window is refused with a cache before any request'''
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        cache = EODCache(os.path.join(directory.name, 'eod.sqlite'))
+        self.addCleanup(cache.close)
+        with self.assertRaises(ValueError):
+            Symbol('AAPL', 'US').get_end_of_day(
+                from_date='2019-01-01', window=100, cache=cache)
+        self.assertEqual(self.eod_queries(), [])
+
+    def test_window_missing_symbol(self):
+        '''Ensure a missing symbol raises from windowed requests too'''
+        with self.assertRaises(SymbolNotFoundError):
+            Symbol('MISSING', 'US').get_end_of_day(
+                from_date='2019-01-01', to_date='2020-01-01', window=100)
+
+    @unittest.skipIf(aio.aiohttp is None, 'aiohttp is not installed')
+    def test_async_windows(self):
+        '''Ensure async windowed requests join to the same result'''
+        async def main():
+            async with aio.AsyncSession() as session:
+                symbol = aio.AsyncSymbol('AAPL', 'US', session=session)
+                return await asyncio.gather(
+                    symbol.get_end_of_day(
+                        from_date='2019-01-01', to_date='2020-03-31'),
+                    symbol.get_end_of_day(
+                        from_date='2019-01-01', to_date='2020-03-31',
+                        window=60),
+                )
+
+        expected, windowed = asyncio.run(main())
+        self.assertEqual(windowed, expected)
+
+
+if __name__ == '__main__':
+    unittest.main()
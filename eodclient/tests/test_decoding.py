@@ -0,0 +1,160 @@
+import json
+import math
+import unittest
+from datetime import date
+from unittest import mock
+
+from eodclient import decoding
+from eodclient.decoding import Decoder, get_decoder
+from eodclient.exchange import Exchange
+from eodclient.retry import RetryPolicy
+from eodclient.series import EODSeries, np
+from eodclient.symbol import Symbol
+from eodclient.tests import stub_server
+from eodclient.tests.stub_server import StubServerTestCase
+
+
+def installed_decoders():
+    '''The decoders whose backend can be imported'''
+    decoders = []
+    for name in decoding.BACKENDS:
+        try:
+            decoders.append(get_decoder(name))
+        except ImportError:
+            pass
+    return decoders
+
+
+class DecoderTests(unittest.TestCase):
+    '''Tests for the json decoders'''
+
+    def test_default(self):
+        '''Ensure the default is the first installed preferred backend'''
+        names = [decoder.name for decoder in installed_decoders()]
+        preferred = [name for name in decoding.PREFERRED if name in names]
+        self.assertEqual(get_decoder().name, preferred[0])
+        self.assertIs(get_decoder(), get_decoder())
+
+    def test_instance(self):
+        '''Ensure a Decoder is passed through'''
+        decoder = Decoder('custom', json.loads)
+        self.assertIs(get_decoder(decoder), decoder)
+
+    def test_unknown(self):
+        '''Ensure an unknown backend name is refused'''
+        with self.assertRaises(ValueError):
+            get_decoder('yaml')
+
+    def test_not_installed(self):
+        '''Ensure a backend that cannot be imported names its package'''
+        def missing():
+            raise ImportError('no module')
+
+        backends = dict(decoding.BACKENDS, simdjson=missing)
+        decoders = dict(decoding._decoders)
+        decoders.pop('simdjson', None)
+        with mock.patch.dict(decoding.BACKENDS, backends), \
+                mock.patch.object(decoding, '_decoders', decoders):
+            with self.assertRaisesRegex(ImportError, 'pysimdjson'):
+                get_decoder('simdjson')
+
+    def test_same_result(self):
+        '''Ensure every backend decodes to the same values'''
+        body = json.dumps(
+            [stub_server.quote('AAPL.US'), {'name': 'é', 'value': None}]
+        ).encode()
+        for decoder in installed_decoders():
+            with self.subTest(decoder=decoder.name):
+                self.assertEqual(decoder.loads(body), json.loads(body))
+                self.assertEqual(
+                    decoder.loads(body.decode()), json.loads(body))
+
+    def test_invalid(self):
+        '''Ensure every backend raises JSONDecodeError on invalid json'''
+        for decoder in installed_decoders():
+            with self.subTest(decoder=decoder.name):
+                with self.assertRaises(json.JSONDecodeError) as context:
+                    decoder.loads(b'<html>Bad gateway</html>')
+                self.assertIn('Bad gateway', context.exception.doc)
+
+    def test_loads_columns(self):
+        '''Ensure rows are packed into typed columns'''
+        body = json.dumps([
+            {'date': '2020-01-01', 'close': 1.5, 'volume': 10},
+            {'date': '2020-01-02', 'close': None},
+        ])
+        for decoder in installed_decoders():
+            with self.subTest(decoder=decoder.name):
+                columns = decoder.loads_columns(
+                    body, {'date': None, 'close': 'd', 'volume': 'q'})
+                self.assertEqual(
+                    columns['date'], ['2020-01-01', '2020-01-02'])
+                self.assertEqual(columns['close'][0], 1.5)
+                self.assertTrue(math.isnan(columns['close'][1]))
+                self.assertEqual(list(columns['volume']), [10, 0])
+                with self.assertRaises(ValueError):
+                    decoder.loads_columns(
+                        b'{"message": "Ticker Not Found"}', {'close': 'd'})
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_series_from_json(self):
+        '''Ensure a series decoded from json matches one from records'''
+        records = stub_server.bars(date(2020, 1, 1), date(2020, 3, 31))
+        records[3]['close'] = None
+        body = json.dumps(records).encode()
+        expected = EODSeries.from_records(records)
+        for decoder in installed_decoders():
+            with self.subTest(decoder=decoder.name):
+                series = EODSeries.from_json(body, decoder)
+                self.assertEqual(list(series.dates), list(expected.dates))
+                np.testing.assert_array_equal(series.close, expected.close)
+                np.testing.assert_array_equal(series.volume, expected.volume)
+        self.assertEqual(len(EODSeries.from_json(b'[]')), 0)
+        with self.assertRaises(ValueError):
+            EODSeries.from_json(b'{"message": "Ticker Not Found"}')
+
+
+class ClientDecoderTests(StubServerTestCase):
+    '''Tests for decoding api responses with a configured backend'''
+
+    def decoding_client(self, decoder):
+        return self.use_client(
+            decoder=decoder, retry_policy=RetryPolicy(backoff=0.01))
+
+    def test_decoder_name(self):
+        '''Ensure the client resolves a backend name once'''
+        client = self.decoding_client('json')
+        self.assertEqual(client.decoder.name, 'json')
+        self.assertIs(client.decoder, get_decoder('json'))
+
+    def test_unknown_decoder(self):
+        '''Ensure an unknown backend fails when it is first used'''
+        client = self.decoding_client('yaml')
+        with self.assertRaises(ValueError):
+            client.decoder
+
+    def test_requests(self):
+        '''Ensure every backend decodes the api responses the same way'''
+        for decoder in installed_decoders():
+            with self.subTest(decoder=decoder.name):
+                self.decoding_client(decoder)
+                quote = Symbol('AAPL', 'US').get_real_time()
+                self.assertEqual(quote, stub_server.quote('AAPL.US'))
+                symbols = Exchange('JSE').get_symbols()
+                self.assertEqual(len(symbols), 50)
+                history = Symbol('AAPL', 'US').get_end_of_day()
+                self.assertEqual(history[0]['date'], '2020-01-01')
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_columnar(self):
+        '''Ensure columnar end of day goes through the client decoder'''
+        for decoder in installed_decoders():
+            with self.subTest(decoder=decoder.name):
+                self.decoding_client(decoder)
+                series = Symbol('AAPL', 'US').get_end_of_day(columnar=True)
+                self.assertEqual(
+                    len(series), len(Symbol('AAPL', 'US').get_end_of_day()))
+
+
+if __name__ == '__main__':
+    unittest.main()
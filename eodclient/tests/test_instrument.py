@@ -0,0 +1,152 @@
+import asyncio
+import unittest
+
+from eodclient import aio
+from eodclient.client import Client
+from eodclient.errors import SymbolNotFoundError
+from eodclient.exchange import Exchange
+from eodclient.instrument import Hook, Metrics, OpenTelemetryHook
+from eodclient.retry import RetryPolicy
+from eodclient.symbol import Symbol, SymbolSet
+from eodclient.tests.stub_server import StubServerTestCase
+
+
+class Recorder(Hook):
+    '''Record the hook calls in order'''
+    def __init__(self):
+        self.calls = []
+
+    def before_request(self, event):
+        self.calls.append(('before', event.path, event.status))
+
+    def after_request(self, event):
+        self.calls.append(('after', event.path, event.status))
+
+    def after_parse(self, event):
+        self.calls.append(('parse', event.path, event.parse_time > 0))
+
+
+class FakeInstrument(object):
+    def __init__(self, name, records):
+        self.name = name
+        self.records = records
+
+    def add(self, value, attributes):
+        self.records.append((self.name, value, attributes))
+
+    record = add
+
+
+class FakeMeter(object):
+    '''Stands in for an OpenTelemetry meter'''
+    def __init__(self):
+        self.records = []
+
+    def create_counter(self, name, **kwargs):
+        return FakeInstrument(name, self.records)
+
+    create_histogram = create_counter
+
+
+class InstrumentTests(StubServerTestCase):
+    '''Tests for request hooks and metrics'''
+
+    def setUp(self):
+        super().setUp()
+        self.client = self.use_client(retry_policy=RetryPolicy(backoff=0.01))
+
+    def test_no_hooks(self):
+        '''Ensure nothing is recorded without hooks'''
+        response = self.client.get('real-time/AAPL.US')
+        self.assertFalse(hasattr(response, 'eod_event'))
+        self.assertEqual(self.client.parse(response)['code'], 'AAPL.US')
+
+    def test_hook_order(self):
+        '''Ensure hooks see the request, its response and the parse'''
+        recorder = Recorder()
+        self.client.add_hook(recorder)
+        Symbol('AAPL', 'US').get_real_time()
+        self.assertEqual(recorder.calls, [
+            ('before', 'real-time/AAPL.US', None),
+            ('after', 'real-time/AAPL.US', 200),
+            ('parse', 'real-time/AAPL.US', True),
+        ])
+        self.client.remove_hook(recorder)
+        Symbol('AAPL', 'US').get_real_time()
+        self.assertEqual(len(recorder.calls), 3)
+
+    def test_metrics(self):
+        '''Ensure metrics are counted per endpoint'''
+        metrics = Metrics()
+        self.client.add_hook(metrics)
+        SymbolSet([
+            {'code': f'S{ index }', 'exchange_code': 'US'}
+            for index in range(45)
+        ]).get_real_time()
+        Symbol('AAPL', 'US').get_end_of_day()
+        with self.assertRaises(SymbolNotFoundError):
+            Symbol('MISSING', 'US').get_end_of_day()
+        Exchange('JSE').get_symbols()
+
+        snapshot = metrics.snapshot()
+        self.assertEqual(list(snapshot), ['eod', 'exchanges', 'real-time'])
+        self.assertEqual(snapshot['real-time']['requests'], 3)
+        self.assertEqual(snapshot['real-time']['symbols'], 45)
+        self.assertEqual(snapshot['eod']['statuses'], {'200': 1, '404': 1})
+        self.assertEqual(snapshot['eod']['errors'], 1)
+        self.assertGreater(snapshot['exchanges']['bytes'], 1000)
+        self.assertEqual(metrics.endpoints['eod'].parse_time.count, 1)
+
+    def test_request_error(self):
+        '''Ensure a request that raises is reported with its error'''
+        metrics = Metrics()
+        client = Client(
+            api_key='key', api_url='http://127.0.0.1:9/api',
+            retry_policy=RetryPolicy(attempts=1))
+        client.add_hook(metrics)
+        with self.assertRaises(Exception):
+            client.get('eod/AAPL.US')
+        self.assertEqual(
+            metrics.snapshot()['eod']['statuses'], {'error': 1})
+
+    def test_prometheus(self):
+        '''Ensure the text exposition has counters and histograms'''
+        metrics = Metrics()
+        self.client.add_hook(metrics)
+        Symbol('AAPL', 'US').get_end_of_day()
+        text = metrics.to_prometheus()
+
+        self.assertIn('# TYPE eodclient_requests_total counter', text)
+        self.assertIn(
+            'eodclient_requests_total{endpoint="eod",status="200"} 1', text)
+        self.assertIn(
+            'eodclient_request_seconds_bucket{endpoint="eod",le="+Inf"} 1',
+            text)
+        self.assertIn('eodclient_parse_seconds_count{endpoint="eod"} 1', text)
+        self.assertTrue(text.endswith('\n'))
+
+    def test_opentelemetry(self):
+        '''Ensure requests are recorded on the meter's instruments'''
+        meter = FakeMeter()
+        self.client.add_hook(OpenTelemetryHook(meter))
+        Symbol('AAPL', 'US').get_real_time()
+        names = [name for name, value, attributes in meter.records]
+        self.assertEqual(names, [
+            'eodclient.requests', 'eodclient.response.bytes',
+            'eodclient.request.duration', 'eodclient.parse.duration'])
+        self.assertEqual(
+            meter.records[0][2], {'endpoint': 'real-time', 'status': '200'})
+
+    @unittest.skipIf(aio.aiohttp is None, 'aiohttp is not installed')
+    def test_async_hooks(self):
+        '''Ensure async requests call the hooks'''
+        metrics = Metrics()
+        self.client.add_hook(metrics)
+
+        async def main():
+            async with aio.AsyncSession() as session:
+                await aio.AsyncSymbol(
+                    'AAPL', 'US', session=session).get_end_of_day()
+
+        asyncio.run(main())
+        self.assertEqual(metrics.snapshot()['eod']['requests'], 1)
@@ -0,0 +1,133 @@
+import math
+import os
+import tempfile
+import unittest
+
+from eodclient import parquet
+from eodclient.series import EODSeries, EODTable
+from eodclient.symbol import Symbol
+from eodclient.tests.stub_server import StubServer, bars, quote
+
+
+@unittest.skipIf(parquet.pa is None, 'pyarrow is not installed')
+class ParquetStoreTests(unittest.TestCase):
+    '''Tests for the partitioned Parquet export'''
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root = directory.name
+        self.store = parquet.ParquetStore(self.root)
+
+    def test_record_batches(self):
+        '''Ensure records are packed into batches of batch_size rows'''
+        batches = list(parquet.record_batches(iter(bars()), batch_size=30))
+        self.assertEqual([len(batch) for batch in batches], [30, 30, 5])
+        self.assertEqual(
+            batches[0].column('close').to_pylist()[:2],
+            [bar['close'] for bar in bars()[:2]]
+        )
+
+    def test_round_trip(self):
+        '''Ensure bars read back as the same series'''
+        self.assertEqual(self.store.write_end_of_day('AAPL.US', bars()), 65)
+        series = self.store.read_end_of_day('AAPL.US')
+        self.assertEqual(series.to_records(), bars())
+        self.assertEqual(
+            self.store.read_end_of_day(
+                'AAPL.US', from_date='2020-03-02', to_date='2020-03-04'
+            ).to_records(),
+            bars()[43:46]
+        )
+
+    def test_zero_copy_read(self):
+        '''Ensure a single partition is read without copying prices'''
+        self.store.write_end_of_day('AAPL.US', bars())
+        table = self.store.read_table('AAPL.US')
+        series = parquet.ParquetStore.table_series(table)
+        buffer = table['close'].chunk(0).buffers()[1]
+        self.assertEqual(series.close.ctypes.data, buffer.address)
+
+    def test_partitions(self):
+        '''Ensure bars are split by exchange, symbol and year'''
+        records = bars() + [dict(bars()[0], date='2021-01-04')]
+        self.store.write_end_of_day(Symbol('AAPL', 'US'), records)
+        self.assertEqual(self.store.years('AAPL.US'), [2020, 2021])
+        dataset = parquet.pq.read_table(f'{ self.root }/eod')
+        self.assertEqual(
+            sorted(set(dataset['year'].to_pylist())), [2020, 2021])
+        self.assertEqual(set(dataset['symbol'].to_pylist()), {'AAPL'})
+        self.assertEqual(os.listdir(self.root), ['eod'])
+
+    def test_append_dedups_by_date(self):
+        '''Ensure appending replaces bars on dates already stored'''
+        self.store.write_end_of_day('AAPL.US', bars()[:40])
+        changed = [dict(bar, close=1.0) for bar in bars()[30:]]
+        self.store.write_end_of_day('AAPL.US', changed)
+
+        series = self.store.read_end_of_day('AAPL.US')
+        self.assertEqual(series.to_records(), bars()[:30] + changed)
+
+        self.store.write_end_of_day('AAPL.US', bars()[:10], append=False)
+        self.assertEqual(
+            self.store.read_end_of_day('AAPL.US').to_records(), bars()[:10])
+
+    def test_write_series_and_table(self):
+        '''Ensure columnar results are written without records'''
+        self.store.write_end_of_day(
+            'AAPL.US', EODSeries.from_records(bars()))
+        table = EODTable.from_records(
+            dict(bar, code=code)
+            for code in ('S1', 'S2') for bar in bars()[:3]
+        )
+        self.store.write_table('JSE', table)
+        self.assertEqual(
+            self.store.read_end_of_day('AAPL.US').to_records(), bars())
+        self.assertEqual(
+            self.store.read_end_of_day('S2.JSE').to_records(), bars()[:3])
+
+    def test_real_time(self):
+        '''Ensure quotes are partitioned by exchange and day and deduped'''
+        quotes = [quote('AAPL.US'), quote('MSFT.US'), quote('VOD.LSE')]
+        quotes[0]['change'] = 'NA'
+        self.assertEqual(self.store.write_real_time(quotes), 3)
+        self.store.write_real_time(quotes)
+
+        table = self.store.read_real_time('US', '2020-08-20')
+        self.assertEqual(table['code'].to_pylist(), ['AAPL.US', 'MSFT.US'])
+        self.assertTrue(math.isnan(table['change'][0].as_py()))
+        self.assertEqual(
+            self.store.read_real_time('LSE', '2020-08-20').num_rows, 1)
+
+    def test_real_time_not_found(self):
+        '''Ensure a quote of 'NA' values for an unknown symbol is stored'''
+        missing = dict.fromkeys(quote('NOPE.US'), 'NA')
+        missing['code'] = 'NOPE.US'
+        self.assertEqual(
+            self.store.write_real_time([quote('AAPL.US'), missing]), 2)
+        table = self.store.read_real_time('US', '1970-01-01')
+        self.assertEqual(table['timestamp'].to_pylist(), [0])
+        self.assertTrue(math.isnan(table['close'][0].as_py()))
+        self.assertEqual(
+            self.store.read_real_time('US', '2020-08-20').num_rows, 1)
+
+    def test_stream_from_api(self):
+        '''Ensure a streamed download is written batch by batch'''
+        with StubServer() as server, server.route():
+            symbol = Symbol('AAPL', 'US')
+            self.store.write_end_of_day(symbol, symbol.iter_end_of_day())
+        self.assertEqual(
+            self.store.read_end_of_day(symbol).to_records(), bars())
+
+    def test_failed_stream(self):
+        '''Ensure a download that fails part way stores nothing'''
+        def records():
+            yield from bars()
+            raise ConnectionError()
+
+        self.store.write_end_of_day('AAPL.US', bars()[:10])
+        with self.assertRaises(ConnectionError):
+            self.store.write_end_of_day('AAPL.US', records(), append=False)
+        self.assertEqual(
+            self.store.read_end_of_day('AAPL.US').to_records(), bars()[:10])
+        self.assertEqual(os.listdir(self.root), ['eod'])
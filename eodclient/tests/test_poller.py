@@ -0,0 +1,86 @@
+import itertools
+from unittest import mock
+
+from eodclient.poller import QuotePoller
+from eodclient.symbol import Symbol
+from eodclient.tests import stub_server
+from eodclient.tests.stub_server import StubServerTestCase
+
+
+def symbols(count, prefix='S'):
+    return [Symbol(f'{ prefix }{ index }', 'US') for index in range(count)]
+
+
+class QuotePollerTests(StubServerTestCase):
+    '''Tests for the change only real time poller'''
+
+    def test_changes(self):
+        '''Ensure only quotes with a new timestamp or close are emitted'''
+        poller = QuotePoller({1: []})
+        quotes = [stub_server.quote('A.US'), stub_server.quote('B.US')]
+        self.assertEqual(poller.changes(quotes), quotes)
+        self.assertEqual(poller.changes(quotes), [])
+
+        moved = [dict(quotes[0], close=11.0), dict(quotes[1], timestamp=1)]
+        self.assertEqual(poller.changes(moved), moved)
+        self.assertEqual(
+            poller.stats, {'requests': 0, 'quotes': 6, 'changed': 4,
+                           'errors': 0})
+
+    def test_unchanged_quotes_are_not_emitted(self):
+        '''Ensure repeated polls of static quotes emit each once'''
+        poller = QuotePoller({0.05: symbols(45)})
+        changed = list(poller.poll(duration=0.3))
+
+        self.assertEqual(len(changed), 45)
+        self.assertGreater(poller.stats['requests'], 3 * 3)
+        self.assertEqual(poller.stats['changed'], 45)
+
+    def test_moving_quotes_are_emitted(self):
+        '''Ensure a quote is emitted again each time it moves'''
+        timestamps = itertools.count()
+        stub_quote = stub_server.quote
+
+        def quote(code):
+            return dict(
+                stub_quote(code),
+                timestamp=0 if code != 'HOT.US' else next(timestamps)
+            )
+
+        poller = QuotePoller(
+            {0.05: [Symbol('HOT', 'US'), Symbol('COLD', 'US')]})
+        with mock.patch.object(stub_server, 'quote', quote):
+            changed = [quote['code'] for quote in poller.poll(duration=0.3)]
+        self.assertEqual(changed.count('COLD.US'), 1)
+        self.assertGreater(changed.count('HOT.US'), 3)
+
+    def test_tiers_and_stagger(self):
+        '''Ensure faster tiers poll more often and chunks are spread out'''
+        poller = QuotePoller(
+            {0.05: symbols(20, 'HOT'), 1: symbols(100, 'COLD')})
+        list(poller.poll(duration=0.5))
+
+        hot = [path for path in self.server.requests if 'HOT' in path]
+        cold = [path for path in self.server.requests if 'COLD' in path]
+        self.assertGreater(len(hot), 5)
+        self.assertEqual(len(cold), 3)
+
+    def test_stop_from_callback(self):
+        '''Ensure stop ends run'''
+        poller = QuotePoller({0.01: symbols(40)})
+        seen = []
+
+        def callback(quote):
+            seen.append(quote)
+            poller.stop()
+
+        poller.run(callback, duration=5)
+        self.assertEqual(len(seen), 1)
+
+    def test_errors_are_counted(self):
+        '''Ensure a failed chunk is skipped and polled again'''
+        self.server.inject('real-time/S0.US', 404)
+        poller = QuotePoller({0.05: symbols(20)})
+        changed = list(poller.poll(duration=0.2))
+        self.assertEqual(len(changed), 20)
+        self.assertEqual(poller.stats['errors'], 1)
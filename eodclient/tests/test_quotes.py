@@ -0,0 +1,72 @@
+import threading
+import time
+
+from eodclient.quotes import QuoteCache
+from eodclient.symbol import Symbol, SymbolSet
+from eodclient.tests.stub_server import StubServerTestCase
+
+
+class QuoteCacheTests(StubServerTestCase):
+    '''Tests for the real time quote cache'''
+
+    server_options = {'latency': 0.1}
+
+    def setUp(self):
+        super().setUp()
+        self.cache = QuoteCache(ttl=0.5)
+
+    def test_ttl(self):
+        '''Ensure a quote is reused until it expires'''
+        symbol = Symbol('AAPL', 'US')
+        first = symbol.get_real_time(cache=self.cache)
+        second = symbol.get_real_time(cache=self.cache)
+        self.assertEqual(first, second)
+        self.assertEqual(first['code'], 'AAPL.US')
+        self.assertEqual(len(self.server.requests), 1)
+
+        time.sleep(0.5)
+        symbol.get_real_time(cache=self.cache)
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 2})
+
+    def test_set_fetches_misses(self):
+        '''Ensure a set only requests the missed symbols in chunks of 20'''
+        symbol_list = [
+            {'code': f'S{ index }', 'exchange_code': 'US'}
+            for index in range(30)
+        ]
+        SymbolSet(symbol_list[:10]).get_real_time(cache=self.cache)
+        self.server.requests.clear()
+
+        response = SymbolSet(symbol_list).get_real_time(cache=self.cache)
+        self.assertEqual(
+            [quote['code'] for quote in response],
+            [f'S{ index }.US' for index in range(30)]
+        )
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertIn('real-time/S10.US', self.server.requests[0])
+
+    def test_single_flight(self):
+        '''Ensure concurrent requests for one symbol share a fetch'''
+        symbol = Symbol('AAPL', 'US')
+        results = []
+
+        def worker():
+            results.append(symbol.get_real_time(cache=self.cache))
+
+        threads = [threading.Thread(target=worker) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_lru(self):
+        '''Ensure the least recently used quotes are dropped'''
+        cache = QuoteCache(ttl=60, maxsize=3)
+        for code in ('A', 'B', 'C'):
+            cache.put(f'{ code }.US', {'code': f'{ code }.US'})
+        cache.get_many([Symbol('A', 'US')], fetch=None)
+        cache.put('D.US', {'code': 'D.US'})
+        self.assertEqual(list(cache._quotes), ['C.US', 'A.US', 'D.US'])
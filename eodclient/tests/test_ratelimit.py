@@ -0,0 +1,95 @@
+import asyncio
+import threading
+import time
+import unittest
+from unittest import mock
+
+from eodclient import rate_limiter
+from eodclient.errors import OverDailyBudgetError
+from eodclient.ratelimit import RateLimiter, request_cost
+from eodclient.symbol import SymbolSet
+from eodclient.tests.stub_server import StubServer
+
+
+class RateLimiterTests(unittest.TestCase):
+    '''Tests for the token bucket rate limiter'''
+
+    def test_request_cost(self):
+        '''Ensure bulk real time requests cost one call per symbol'''
+        self.assertEqual(request_cost('https://x/api/eod/AAPL.US?fmt=json'), 1)
+        self.assertEqual(
+            request_cost('https://x/api/real-time/AAPL.US?fmt=json&s=A.US%2CB.US'),
+            3
+        )
+        self.assertEqual(
+            request_cost('https://x/api/real-time/AAPL.US', {'s': ''}), 1)
+
+    def test_per_second_blocks(self):
+        '''Ensure calls over the rate wait instead of failing'''
+        limiter = RateLimiter(per_second=20, burst=1)
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.monotonic() - start, 0.24)
+
+    def test_threads_share_the_bucket(self):
+        '''Ensure concurrent threads are queued on one bucket'''
+        limiter = RateLimiter(per_second=50, burst=1)
+        threads = [
+            threading.Thread(target=limiter.acquire, args=(2,))
+            for _ in range(10)
+        ]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreaterEqual(time.monotonic() - start, 0.36)
+
+    def test_async_acquire(self):
+        '''Ensure tasks wait on the event loop'''
+        limiter = RateLimiter(per_second=20, burst=1)
+
+        async def main():
+            await asyncio.gather(*[limiter.acquire_async() for _ in range(6)])
+
+        start = time.monotonic()
+        asyncio.run(main())
+        self.assertGreaterEqual(time.monotonic() - start, 0.24)
+
+    def test_daily_budget(self):
+        '''Ensure calls over the daily budget wait for the next day'''
+        limiter = RateLimiter(per_day=5)
+        limiter.acquire(4)
+        self.assertEqual(limiter.remaining, 1)
+        with mock.patch('eodclient.ratelimit.time.sleep') as sleep:
+            sleep.side_effect = lambda seconds: setattr(
+                limiter, '_day', limiter._day - 1)
+            limiter.acquire(2)
+        self.assertEqual(sleep.call_count, 1)
+        self.assertEqual(limiter.remaining, 3)
+
+    def test_over_budget(self):
+        '''Ensure a cost the daily budget can never grant is refused'''
+        limiter = RateLimiter(per_day=5)
+        with self.assertRaises(OverDailyBudgetError):
+            limiter.acquire(6)
+        with self.assertRaises(OverDailyBudgetError):
+            asyncio.run(limiter.acquire_async(6))
+        self.assertEqual(limiter.remaining, 5)
+
+    def test_session_counts_symbols(self):
+        '''Ensure the shared session charges a real time set per symbol'''
+        self.addCleanup(rate_limiter.configure)
+        self.addCleanup(setattr, rate_limiter, 'used_today',
+                        rate_limiter.used_today)
+        rate_limiter.configure(per_day=1000)
+        rate_limiter.used_today = 0
+        symbol_set = SymbolSet(
+            [{'code': f'S{ index }', 'exchange_code': 'US'}
+             for index in range(45)]
+        )
+        with StubServer() as server, \
+                server.route():
+            symbol_set.get_real_time()
+        self.assertEqual(rate_limiter.remaining, 955)
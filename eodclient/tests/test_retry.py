@@ -0,0 +1,104 @@
+import time
+import unittest
+from email.utils import formatdate
+from unittest import mock
+
+from eodclient import retry_policy, session
+from eodclient.retry import RetryPolicy
+from eodclient.symbol import Symbol, SymbolSet
+from eodclient.tests.stub_server import StubServer, StubServerTestCase
+
+
+class RetryPolicyTests(unittest.TestCase):
+    '''Tests for the backoff calculation'''
+
+    def test_capped_backoff(self):
+        '''Ensure delays are jittered below the capped exponential'''
+        policy = RetryPolicy(backoff=1, cap=5)
+        for attempt in range(10):
+            delay = policy.delay(attempt)
+            self.assertGreaterEqual(delay, 0)
+            self.assertLessEqual(delay, min(5, 2 ** attempt))
+
+    def test_retry_after(self):
+        '''Ensure Retry-After in seconds or as a date sets the minimum'''
+        policy = RetryPolicy(backoff=0.001)
+        self.assertEqual(policy.delay(0, {'Retry-After': '3'}), 3)
+        delay = policy.delay(0, {'Retry-After': formatdate(time.time() + 60)})
+        self.assertGreater(delay, 50)
+
+    def test_should_retry(self):
+        '''Ensure attempts and the deadline stop retries'''
+        policy = RetryPolicy(attempts=3, deadline=10)
+        deadline = policy.start()
+        self.assertTrue(policy.should_retry(1, 1, deadline))
+        self.assertFalse(policy.should_retry(2, 1, deadline))
+        self.assertFalse(policy.should_retry(0, 11, deadline))
+
+
+class RetryRequestTests(StubServerTestCase):
+    '''Tests for retries through the shared session'''
+
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(retry_policy, 'backoff', 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_only_failed_chunk_retried(self):
+        '''Ensure a 5xx on one chunk retries only that chunk'''
+        symbol_set = SymbolSet(
+            [{'code': f'S{ index }', 'exchange_code': 'US'}
+             for index in range(45)]
+        )
+        self.server.inject('real-time/S20.US', 503, times=2)
+        response = symbol_set.get_real_time()
+
+        self.assertEqual(len(response), 45)
+        self.assertEqual(len(self.server.requests), 5)
+        self.assertEqual(
+            len([path for path in self.server.requests
+                 if 'real-time/S20.US' in path]),
+            3
+        )
+
+    def test_retry_after(self):
+        '''Ensure a 429 waits for Retry-After'''
+        self.server.inject('eod/AAPL.US', 429, headers={'Retry-After': '0.3'})
+        start = time.monotonic()
+        response = Symbol('AAPL', 'US').get_end_of_day()
+        self.assertGreaterEqual(time.monotonic() - start, 0.3)
+        self.assertEqual(response[0]['date'], '2020-01-01')
+
+    def test_timeout(self):
+        '''Ensure a read timeout is retried'''
+        adapter = session.get_adapter(self.server.url)
+        with mock.patch.object(adapter, 'timeout', (1, 0.2)):
+            self.server.inject('eod/AAPL.US', delay=0.5)
+            response = Symbol('AAPL', 'US').get_end_of_day()
+        self.assertEqual(len(self.server.requests), 2)
+        self.assertEqual(response[0]['date'], '2020-01-01')
+
+    def test_gives_up(self):
+        '''Ensure the last response is returned when attempts run out'''
+        self.server.inject('eod/AAPL.US', 500, times=10)
+        response = session.get(f'{ self.server.url }/eod/AAPL.US')
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(len(self.server.requests), retry_policy.attempts)
+
+    def test_not_found_not_retried(self):
+        '''Ensure a 404 is not retried'''
+        response = session.get(f'{ self.server.url }/eod/MISSING.US')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_random_errors(self):
+        '''Ensure a set completes when a share of requests fail at random'''
+        symbol_set = SymbolSet.from_symbols(
+            Symbol(f'S{ index }', 'US') for index in range(200))
+        with StubServer(error_rate=0.3, seed=1) as server, \
+                server.route(), \
+                mock.patch.object(retry_policy, 'attempts', 10):
+            response = symbol_set.get_real_time(workers=4)
+        self.assertEqual(len(response), 200)
+        self.assertGreater(len(server.requests), 10)
@@ -0,0 +1,151 @@
+import unittest
+
+from eodclient.errors import SymbolNotFoundError
+from eodclient.series import EODPanel, EODSeries, np, pack_columns
+from eodclient.symbol import Symbol, SymbolSet
+from eodclient.tests.stub_server import StubServer, bars
+
+try:
+    import pandas
+except ImportError:
+    pandas = None
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class EODSeriesTests(unittest.TestCase):
+    '''Tests for the columnar end of day series'''
+
+    def setUp(self):
+        self.records = bars()
+        self.series = EODSeries.from_records(self.records)
+
+    def test_columns(self):
+        '''Ensure the columns are contiguous typed arrays'''
+        self.assertEqual(len(self.series), len(self.records))
+        self.assertEqual(self.series.dates.dtype, np.dtype('datetime64[D]'))
+        self.assertEqual(self.series.close.dtype, np.float64)
+        self.assertTrue(self.series.volume.flags['C_CONTIGUOUS'])
+        self.assertEqual(self.series.to_records(), self.records)
+
+    def test_slice(self):
+        '''Ensure date slicing is inclusive and returns views'''
+        window = self.series.slice('2020-02-01', '2020-02-29')
+        self.assertEqual(str(window.dates[0]), '2020-02-03')
+        self.assertEqual(str(window.dates[-1]), '2020-02-28')
+        self.assertEqual(len(window), 20)
+        self.assertTrue(np.shares_memory(window.close, self.series.close))
+
+    def test_returns(self):
+        '''Ensure returns are computed between consecutive bars'''
+        returns = self.series.returns()
+        first = self.records[1]['adjusted_close'] / \
+            self.records[0]['adjusted_close'] - 1
+        self.assertEqual(len(returns), len(self.series) - 1)
+        self.assertAlmostEqual(returns[0], first)
+
+    def test_rolling(self):
+        '''Ensure rolling windows agree with the rolling mean'''
+        windows = self.series.rolling(5)
+        self.assertEqual(windows.shape, (len(self.series) - 4, 5))
+        np.testing.assert_allclose(
+            windows.mean(axis=1), self.series.rolling_mean(5))
+        self.assertEqual(
+            len(self.series.rolling_mean(len(self.series) + 1)), 0)
+
+    def test_rolling_nan(self):
+        '''Ensure a nan only spoils the windows that hold it'''
+        self.series.adjusted_close[3] = np.nan
+        means = self.series.rolling_mean(2)
+        self.assertEqual(list(np.isnan(means[:5])), [0, 0, 1, 1, 0])
+        self.assertFalse(np.isnan(means[4:]).any())
+
+    def test_bad_lengths(self):
+        '''Ensure windows and periods below one are refused'''
+        for call in (
+                lambda: self.series.rolling_mean(0),
+                lambda: self.series.rolling(-1),
+                lambda: self.series.returns(periods=0),
+                lambda: self.series.log_returns(periods=-1)):
+            with self.assertRaises(ValueError):
+                call()
+
+    def test_pack_columns(self):
+        '''Ensure keys are listed and fields packed with nan for missing'''
+        records = [
+            {'code': 'A', 'date': '2020-01-02', 'close': 1.5},
+            {'code': 'B', 'date': '2020-01-03', 'close': 'NA'},
+            {'code': 'C', 'date': '2020-01-06', 'close': None},
+        ]
+        columns = pack_columns(iter(records), ('close',), ('code', 'date'))
+        self.assertEqual(columns['code'], ['A', 'B', 'C'])
+        self.assertEqual(columns['close'].typecode, 'd')
+        self.assertEqual(columns['close'][0], 1.5)
+        self.assertTrue(np.isnan(columns['close'][1:]).all())
+
+    def test_missing_values(self):
+        '''Ensure null fields become nan'''
+        records = bars()[:2]
+        records[0]['volume'] = None
+        series = EODSeries.from_records(records)
+        self.assertTrue(np.isnan(series.volume[0]))
+
+    @unittest.skipIf(pandas is None, 'pandas is not installed')
+    def test_to_pandas(self):
+        '''Ensure the DataFrame shares memory with the series'''
+        frame = self.series.to_pandas()
+        self.assertEqual(len(frame), len(self.series))
+        self.assertTrue(
+            np.shares_memory(frame['close'].to_numpy(), self.series.close))
+
+    def test_symbol_columnar(self):
+        '''Ensure get_end_of_day can return a series'''
+        with StubServer() as server, \
+                server.route():
+            series = Symbol('AAPL', 'US').get_end_of_day(
+                from_date='2020-03-02', columnar=True)
+        self.assertIsInstance(series, EODSeries)
+        self.assertEqual(str(series.dates[0]), '2020-03-02')
+
+
+@unittest.skipIf(np is None, 'numpy is not installed')
+class EODPanelTests(unittest.TestCase):
+    '''Tests for many symbols aligned on a date index'''
+
+    def setUp(self):
+        self.panel = EODPanel({
+            'A.US': EODSeries.from_records(bars()[:3]),
+            'B.US': EODSeries.from_records(bars()[1:4]),
+        })
+
+    def test_outer_join(self):
+        '''Ensure missing bars are nan on the union of dates'''
+        values = self.panel.to_array('close')
+        self.assertEqual(values.shape, (4, 2))
+        self.assertTrue(np.isnan(values[0, 1]))
+        self.assertTrue(np.isnan(values[3, 0]))
+        self.assertEqual(values[1, 0], values[1, 1])
+
+    def test_inner_join(self):
+        '''Ensure an inner join keeps the dates every symbol has'''
+        panel = EODPanel(self.panel.series, join='inner')
+        self.assertEqual(
+            [str(date) for date in panel.dates],
+            ['2020-01-02', '2020-01-03']
+        )
+        self.assertFalse(np.isnan(panel.to_array()).any())
+
+    def test_symbol_set(self):
+        '''Ensure a set fetches every symbol and reports failures'''
+        symbol_set = SymbolSet([
+            {'code': 'AAPL', 'exchange_code': 'US'},
+            {'code': 'MISSING', 'exchange_code': 'US'},
+            {'code': 'MSFT', 'exchange_code': 'US'},
+        ])
+        with StubServer() as server, \
+                server.route():
+            panel = symbol_set.get_end_of_day(
+                from_date='2020-03-02', to_date='2020-03-06', workers=3)
+        self.assertEqual(panel.codes, ['AAPL.US', 'MSFT.US'])
+        self.assertIsInstance(panel.errors['MISSING.US'], SymbolNotFoundError)
+        self.assertEqual(panel.to_array().shape, (5, 2))
+        self.assertEqual(len(panel.to_dict()['MSFT.US']), 5)
@@ -0,0 +1,159 @@
+import math
+import multiprocessing
+import os
+import tempfile
+import threading
+import unittest
+
+from eodclient.retry import RetryPolicy
+from eodclient.shared import QuoteFetcher, SharedQuoteTable
+from eodclient.symbol import Symbol
+from eodclient.tests import stub_server
+from eodclient.tests.stub_server import StubServerTestCase
+
+
+def read_quotes(path, connection):
+    '''Read every quote in another process and send them back'''
+    with SharedQuoteTable(path) as table:
+        connection.send(table.read_many())
+
+
+def read_consistent(path, key, reads, connection):
+    '''Read a row being rewritten, sending back the torn reads seen'''
+    torn = 0
+    try:
+        with SharedQuoteTable(path) as table:
+            connection.send('ready')
+            for _ in range(reads):
+                quote = table.read(key)
+                if quote is None:
+                    continue
+                if not quote['open'] == quote['close'] == quote['timestamp']:
+                    torn += 1
+    finally:
+        connection.send(torn)
+
+
+class SharedQuoteTableTests(unittest.TestCase):
+    '''Tests for the memory mapped quote table'''
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'quotes.table')
+        self.table = SharedQuoteTable.create(
+            self.path, [Symbol('AAPL', 'US'), 'NPN.JSE', 'AAPL.US'])
+        self.addCleanup(self.table.close)
+
+    def test_layout(self):
+        '''Ensure every symbol gets one row and starts without a quote'''
+        self.assertEqual(self.table.keys(), ['AAPL.US', 'NPN.JSE'])
+        self.assertIn(Symbol('NPN', 'JSE'), self.table)
+        self.assertIsNone(self.table.read('NPN.JSE'))
+        self.assertEqual(self.table.version('NPN.JSE'), 0)
+        with self.assertRaises(KeyError):
+            self.table.read('MSFT.US')
+        with self.assertRaises(ValueError):
+            SharedQuoteTable.create(self.path + '2', ['X' * 40 + '.US'])
+
+    def test_write_read(self):
+        '''Ensure a quote reads back with every REALTIME_KEYS field'''
+        quote = stub_server.quote('AAPL.US')
+        self.assertTrue(self.table.write(quote))
+        self.assertFalse(self.table.write(stub_server.quote('MSFT.US')))
+        self.assertEqual(self.table.read('AAPL.US'), quote)
+        self.assertEqual(self.table.version(Symbol('AAPL', 'US')), 1)
+
+        missing = dict(quote, change='NA', volume='NA')
+        self.table.write(missing)
+        stored = self.table.read('AAPL.US')
+        self.assertTrue(math.isnan(stored['change']))
+        self.assertEqual(stored['volume'], 0)
+        self.assertEqual(self.table.version('AAPL.US'), 2)
+
+    def test_read_only(self):
+        '''Ensure readers open the table without being able to write'''
+        self.table.write(stub_server.quote('NPN.JSE'))
+        with SharedQuoteTable(self.path) as reader:
+            self.assertEqual(
+                list(reader.read_many()), ['NPN.JSE'])
+            with self.assertRaises(TypeError):
+                reader.write(stub_server.quote('NPN.JSE'))
+
+    def test_not_a_table(self):
+        '''Ensure other files are refused'''
+        other = self.path + '.other'
+        with open(other, 'wb') as other_file:
+            other_file.write(b'\0' * 64)
+        with self.assertRaises(ValueError):
+            SharedQuoteTable(other)
+
+    def test_other_process(self):
+        '''Ensure another process reads the quotes written here'''
+        self.table.write_many([
+            stub_server.quote('AAPL.US'), stub_server.quote('NPN.JSE')])
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=read_quotes, args=(self.path, child))
+        process.start()
+        quotes = parent.recv()
+        process.join()
+        self.assertEqual(quotes['NPN.JSE'], stub_server.quote('NPN.JSE'))
+
+    def test_no_torn_reads(self):
+        '''Ensure a reader in another process never sees half a write'''
+        parent, child = multiprocessing.Pipe()
+        process = multiprocessing.Process(
+            target=read_consistent,
+            args=(self.path, 'AAPL.US', 20000, child))
+        process.start()
+        self.assertEqual(parent.recv(), 'ready')
+        value = 0
+        while process.is_alive() and not parent.poll():
+            value += 1
+            self.table.write({
+                'code': 'AAPL.US', 'timestamp': value,
+                'open': value, 'close': value})
+        process.join()
+        self.assertEqual(parent.recv(), 0)
+        self.assertEqual(process.exitcode, 0)
+
+
+class QuoteFetcherTests(StubServerTestCase):
+    '''Tests for filling the table from the api'''
+
+    def setUp(self):
+        super().setUp()
+        self.use_client(retry_policy=RetryPolicy(attempts=1))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.table = SharedQuoteTable.create(
+            os.path.join(directory.name, 'quotes.table'),
+            [f'S{ index }.US' for index in range(45)])
+        self.addCleanup(self.table.close)
+
+    def test_refresh(self):
+        '''Ensure one refresh stores every quote in chunked requests'''
+        fetcher = QuoteFetcher(self.table, chunk_size=20)
+        self.assertEqual(fetcher.refresh(), 45)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(
+            self.table.read('S44.US'), stub_server.quote('S44.US'))
+
+    def test_run(self):
+        '''Ensure run refreshes until stopped despite a failed chunk'''
+        fetcher = QuoteFetcher(self.table, interval=0.01)
+        self.server.inject('real-time', 500, times=1)
+        thread = threading.Thread(target=fetcher.run)
+        thread.start()
+        while fetcher.stats['refreshes'] < 2:
+            thread.join(0.01)
+        fetcher.stop()
+        thread.join()
+        self.assertGreaterEqual(fetcher.stats['quotes'], 90)
+        self.assertEqual(
+            self.table.version('S0.US'), fetcher.stats['refreshes'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import json
+import unittest
+from json.decoder import JSONDecodeError
+
+from eodclient.errors import SymbolNotFoundError
+from eodclient.exchange import Exchange
+from eodclient.stream import iter_json_array
+from eodclient.symbol import Symbol
+from eodclient.tests.stub_server import StubServerTestCase, bars
+
+
+def byte_chunks(body, size):
+    '''Split a body into byte chunks of size'''
+    body = body.encode('utf-8')
+    return [body[index:index + size] for index in range(0, len(body), size)]
+
+
+class IterJsonArrayTests(unittest.TestCase):
+    '''Tests for the incremental json array parser'''
+
+    def test_every_chunk_size(self):
+        '''Ensure items split over any chunk boundary are parsed'''
+        items = [
+            {'Code': 'ÅB', 'Name': 'Ünïcode ✓', 'Price': 12.5},
+            {'Code': 'C', 'Name': 'Nested', 'List': [1, 2, {'a': None}]},
+            123456,
+            'text, with ] brackets',
+        ]
+        body = ' \n' + json.dumps(items, ensure_ascii=False) + '\n'
+        for size in (1, 2, 3, 7, 64, 4096):
+            self.assertEqual(
+                list(iter_json_array(byte_chunks(body, size))), items)
+
+    def test_empty_array(self):
+        '''Ensure an empty array yields nothing'''
+        self.assertEqual(list(iter_json_array(byte_chunks('[ ]', 1))), [])
+
+    def test_single_object(self):
+        '''Ensure a body that is one object is yielded whole'''
+        body = json.dumps({'code': 'AAPL.US', 'close': 1.5})
+        self.assertEqual(
+            list(iter_json_array(byte_chunks(body, 4))),
+            [{'code': 'AAPL.US', 'close': 1.5}]
+        )
+
+    def test_plain_text(self):
+        '''Ensure a plain text body raises with the whole body'''
+        with self.assertRaises(JSONDecodeError) as context:
+            list(iter_json_array(byte_chunks('Ticker Not Found', 3)))
+        self.assertEqual(context.exception.doc, 'Ticker Not Found')
+
+    def test_truncated(self):
+        '''Ensure a truncated array raises'''
+        with self.assertRaises(JSONDecodeError):
+            list(iter_json_array(byte_chunks('[{"a": 1}, {"b"', 3)))
+
+
+class StreamingRequestTests(StubServerTestCase):
+    '''Tests for the streaming methods against the stub server'''
+
+    def test_iter_symbols(self):
+        '''Ensure streamed symbols match get_symbols'''
+        exchange = Exchange('JSE')
+        symbols = exchange.iter_symbols(chunk_size=16)
+        self.assertNotIsInstance(symbols, list)
+        self.assertEqual(list(symbols), exchange.get_symbols())
+
+    def test_iter_symbols_message(self):
+        '''Ensure a plain text error is yielded as a message'''
+        self.assertEqual(
+            list(Exchange('NZ').iter_symbols()),
+            [{'message': 'Ticker Not Found'}]
+        )
+
+    def test_iter_end_of_day(self):
+        '''Ensure streamed bars match get_end_of_day'''
+        symbol = Symbol('AAPL', 'US')
+        self.assertEqual(
+            list(symbol.iter_end_of_day(from_date='2020-02-01', chunk_size=10)),
+            bars(start=Symbol.get_date('2020-02-01').date())
+        )
+
+    def test_iter_end_of_day_not_found(self):
+        '''Ensure a 404 raises SymbolNotFoundError'''
+        with self.assertRaises(SymbolNotFoundError):
+            list(Symbol('MISSING', 'US').iter_end_of_day())
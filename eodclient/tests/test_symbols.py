@@ -1,13 +1,19 @@
 import datetime
+import os
+import tempfile
 import unittest
 
 import vcr
 
 from eodclient.errors import (
+    BulkNotAvailableError,
     InvalidExchangeCodeError
 )
-from eodclient.exchange import Exchange
+from eodclient import exchange, rate_limiter
+from eodclient.exchange import Exchange, exchange_for_symbol
+from eodclient.series import EODTable, np
 from eodclient.symbol import Symbol
+from eodclient.tests.stub_server import StubServer, StubServerTestCase
 
 
 class ExchangeTests(unittest.TestCase):
@@ -46,6 +52,110 @@ class ExchangeTests(unittest.TestCase):
         with self.assertRaises(InvalidExchangeCodeError):
             Exchange_instance = Exchange(exchange_code='XXYP')
 
+    def test_registry(self):
+        '''Ensure exchanges are indexed by code and name'''
+        self.assertEqual(exchange.EXCHANGES['JSE'], 'Johannesburg Exchange')
+        self.assertEqual(
+            exchange.EXCHANGES_BY_NAME['Iceland Exchange'], ('IS', 'IC'))
+        with self.assertRaises(TypeError):
+            exchange.EXCHANGES['XXYP'] = 'Not an exchange'
+
+    def test_interned(self):
+        '''Ensure Exchange.get returns one shared instance per code'''
+        self.assertIs(Exchange.get('JSE'), Exchange.get('JSE'))
+        self.assertIs(exchange_for_symbol('TFG.JSE'), Exchange.get('JSE'))
+        self.assertEqual(exchange_for_symbol('BRK.B.US').name, 'USA Stocks')
+        with self.assertRaises(InvalidExchangeCodeError):
+            exchange_for_symbol('AAPL')
+
+    def test_refresh(self):
+        '''Ensure the registry is refreshed from the api and cached'''
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'exchanges.json')
+        self.addCleanup(
+            exchange.load_exchanges, exchange.BUILTIN_EXCHANGE_CODES)
+        with StubServer() as server, \
+                server.route():
+            exchange.refresh_exchanges(path=path)
+            exchange.refresh_exchanges(path=path)
+        self.assertEqual(len(server.requests), 1)
+        self.assertEqual(Exchange('NEW').name, 'New Exchange')
+        with self.assertRaises(InvalidExchangeCodeError):
+            Exchange('JSE')
+
+
+class BulkEndOfDayTests(StubServerTestCase):
+    '''Tests for the bulk end of day download against the stub server'''
+
+    BULK_KEYS = [
+        'code', 'exchange_short_name', 'date', 'open', 'high', 'low',
+        'close', 'adjusted_close', 'volume']
+
+    def test_bulk(self):
+        '''Ensure one request gets every symbol's bar'''
+        response = Exchange('US').get_bulk_end_of_day(date='2020-03-02')
+
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertIn('eod-bulk-last-day/US', self.server.requests[0])
+        self.assertEqual(len(response), 50)
+        self.assertEqual(list(response[0].keys()), self.BULK_KEYS)
+        self.assertEqual(response[0]['date'], '2020-03-02')
+
+    def test_fallback(self):
+        '''Ensure the bars are fetched per symbol when bulk is not available'''
+        self.server.inject('eod-bulk-last-day', 403)
+        exchange = Exchange('US')
+        response = exchange.get_bulk_end_of_day(date='2020-03-02', workers=4)
+
+        self.assertEqual(len(self.server.requests), 52)
+        self.assertEqual(response[0]['code'], 'S0')
+        self.assertEqual(list(response[0].keys()), self.BULK_KEYS)
+        self.server.requests.clear()
+        self.assertEqual(
+            response, exchange.get_bulk_end_of_day(date='2020-03-02'))
+
+    def test_fallback_errors(self):
+        '''Ensure a symbol that fails is left out of the fallback'''
+        self.server.inject('eod-bulk-last-day', 403)
+        self.server.inject('/eod/S3.US', 403)
+        response = Exchange('US').get_bulk_end_of_day(date='2020-03-02')
+
+        self.assertEqual(len(response), 49)
+        self.assertNotIn('S3', [record['code'] for record in response])
+        query = [path for path in self.server.requests if '/eod/S0.US' in path]
+        self.assertIn('to=2020-03-02', query[0])
+
+    def test_fallback_over_budget(self):
+        '''Ensure a bulk request over the daily budget falls back'''
+        self.addCleanup(rate_limiter.configure)
+        self.addCleanup(setattr, rate_limiter, 'used_today',
+                        rate_limiter.used_today)
+        rate_limiter.configure(per_day=60)
+        rate_limiter.used_today = 0
+        response = Exchange('US').get_bulk_end_of_day(date='2020-03-02')
+
+        self.assertEqual(len(response), 50)
+        self.assertFalse(any(
+            'eod-bulk-last-day' in path for path in self.server.requests))
+        self.assertEqual(rate_limiter.remaining, 9)
+
+    def test_no_fallback(self):
+        '''Ensure the error is raised without a fallback'''
+        self.server.inject('eod-bulk-last-day', 403)
+        with self.assertRaises(BulkNotAvailableError):
+            Exchange('US').get_bulk_end_of_day(fallback=False)
+
+    @unittest.skipIf(np is None, 'numpy is not installed')
+    def test_columnar(self):
+        '''Ensure the bulk rows can be returned as an EODTable'''
+        table = Exchange('US').get_bulk_end_of_day(columnar=True)
+
+        self.assertIsInstance(table, EODTable)
+        self.assertEqual(len(table), 50)
+        self.assertEqual(table[1]['code'], 'S1')
+        self.assertEqual(str(table.dates[0]), '2020-03-31')
+
 
 class SymbolTests(unittest.TestCase):
     '''Tests for the symbol'''
@@ -0,0 +1,165 @@
+import os
+import tempfile
+import unittest
+
+from eodclient.errors import SymbolNotFoundError
+from eodclient.exchange import Exchange
+from eodclient.retry import RetryPolicy
+from eodclient.symbol import Symbol, SymbolSet
+from eodclient.tests.stub_server import StubServer, StubServerTestCase, symbols
+from eodclient.universe import SymbolUniverse, UniverseStore
+
+
+class SlotsSymbolTests(unittest.TestCase):
+    '''Tests for the compact shared Symbol'''
+
+    def test_no_dict(self):
+        '''Ensure a Symbol has no instance dict'''
+        symbol = Symbol('AAPL', 'US')
+        self.assertFalse(hasattr(symbol, '__dict__'))
+        with self.assertRaises(AttributeError):
+            symbol.name = 'Apple'
+
+    def test_flyweight(self):
+        '''Ensure sets share one Symbol per code and exchange'''
+        first = SymbolSet([{'code': 'AAPL', 'exchange_code': 'US'}])
+        second = SymbolSet([{'code': 'AAPL', 'exchange_code': 'US'}])
+        self.assertIs(first.symbols[0], second.symbols[0])
+        self.assertIs(Symbol.get('AAPL', 'US'), first.symbols[0])
+        self.assertIsNot(Symbol.get('AAPL', 'JSE'), first.symbols[0])
+
+
+class SymbolUniverseTests(unittest.TestCase):
+    '''Tests for the index of an exchange's listings'''
+
+    def setUp(self):
+        listings = symbols('US', count=120)
+        listings[3]['Type'] = 'ETF'
+        listings[7]['Currency'] = 'EUR'
+        self.universe = SymbolUniverse(listings, 'US')
+
+    def test_lookup(self):
+        '''Ensure listings are found by code'''
+        self.assertEqual(len(self.universe), 120)
+        self.assertIn('S3', self.universe)
+        self.assertEqual(self.universe['S3']['Type'], 'ETF')
+        self.assertIs(self.universe.symbol('S3'), Symbol.get('S3', 'US'))
+        with self.assertRaises(SymbolNotFoundError):
+            self.universe.symbol('XX')
+
+    def test_filter(self):
+        '''Ensure listings are filtered on every field given'''
+        self.assertEqual(
+            [listing['Code'] for listing in self.universe.filter(Type='ETF')],
+            ['S3']
+        )
+        self.assertEqual(
+            len(self.universe.filter(Type='Common Stock', Currency='USD')),
+            118
+        )
+
+    def test_search(self):
+        '''Ensure prefix search returns codes in order'''
+        self.assertEqual(
+            [listing['Code'] for listing in self.universe.search('S11')],
+            ['S11', 'S110', 'S111', 'S112', 'S113', 'S114', 'S115', 'S116',
+             'S117', 'S118', 'S119']
+        )
+        self.assertEqual(self.universe.search('X'), [])
+
+    def test_symbol_set(self):
+        '''Ensure a SymbolSet is built from shared symbols'''
+        symbol_set = self.universe.filter(Currency='EUR').symbol_set()
+        self.assertIsInstance(symbol_set, SymbolSet)
+        self.assertIs(symbol_set.symbols[0], Symbol.get('S7', 'US'))
+        self.assertEqual(len(self.universe.symbol_set().symbols), 120)
+
+    def test_from_exchange(self):
+        '''Ensure a universe streams an exchange's listings'''
+        with StubServer() as server, \
+                server.route():
+            universe = SymbolUniverse.from_exchange(Exchange('US'))
+            with self.assertRaises(SymbolNotFoundError):
+                SymbolUniverse.from_exchange(Exchange('NZ'))
+        self.assertEqual(len(universe), 50)
+
+
+class UniverseStoreTests(StubServerTestCase):
+    '''Tests for snapshots and diffs of exchange listings'''
+
+    def setUp(self):
+        super().setUp()
+        self.use_client(retry_policy=RetryPolicy(backoff=0.01))
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.store = UniverseStore(os.path.join(directory.name, 'eod.sqlite'))
+        self.addCleanup(self.store.close)
+
+    def change_listings(self):
+        '''Add S50, remove S1 and rename S2 on the US exchange'''
+        listings = symbols('US')
+        listings[2]['Name'] = 'Renamed'
+        del listings[1]
+        listings.append(symbols('US', count=51)[50])
+        self.server.listings['US'] = listings
+
+    def test_initial(self):
+        '''Ensure the first refresh adds every listing'''
+        diff = self.store.refresh('US')
+        self.assertTrue(diff.initial)
+        self.assertEqual(len(diff.added), 50)
+        self.assertEqual(diff.removed, [])
+        self.assertEqual(len(self.store.universe('US')), 50)
+        self.assertEqual(
+            self.store.listings('US')[0], symbols('US')[0])
+        self.assertIsNotNone(self.store.snapshot('US')['etag'])
+
+    def test_not_modified(self):
+        '''Ensure a matching ETag gets a 304 and an empty diff'''
+        self.store.refresh('US')
+        diff = self.store.refresh('US')
+        self.assertTrue(diff.not_modified)
+        self.assertFalse(diff)
+        self.assertEqual(self.store.stats, {
+            'requests': 2, 'not_modified': 1, 'diffed': 1})
+        self.assertEqual(len(self.store.listings('US')), 50)
+
+    def test_same_hash(self):
+        '''Ensure an unchanged body is not diffed without an ETag'''
+        self.server.etags = False
+        self.store.refresh('US')
+        self.assertIsNone(self.store.snapshot('US')['etag'])
+        diff = self.store.refresh('US')
+        self.assertTrue(diff.not_modified)
+        self.assertEqual(self.store.stats['diffed'], 1)
+
+    def test_diff(self):
+        '''Ensure added, removed and changed listings are reported'''
+        for etags in (True, False):
+            with self.subTest(etags=etags):
+                self.server.etags = etags
+                self.server.listings.pop('US', None)
+                self.store.refresh('US')
+                self.change_listings()
+                diff = self.store.refresh('US')
+                self.assertFalse(diff.not_modified)
+                self.assertEqual(
+                    [listing['Code'] for listing in diff.added], ['S50'])
+                self.assertEqual(
+                    [listing['Code'] for listing in diff.removed], ['S1'])
+                self.assertEqual(len(diff.changed), 1)
+                old, new = diff.changed[0]
+                self.assertEqual((old['Name'], new['Name']),
+                                 ('Stock 2', 'Renamed'))
+                self.assertIs(
+                    diff.added_symbols().symbols[0], Symbol.get('S50', 'US'))
+                self.assertEqual(repr(diff), 'UniverseDiff(US, +1 -1 ~1)')
+                self.assertNotIn('S1', self.store.universe('US'))
+
+    def test_refresh_all(self):
+        '''Ensure exchanges are refreshed in parallel and failures kept'''
+        diffs, errors = self.store.refresh_all(['US', 'JSE', 'NZ'])
+        self.assertEqual(list(diffs), ['US', 'JSE'])
+        self.assertIsInstance(errors['NZ'], SymbolNotFoundError)
+        self.assertEqual(
+            self.store.universe('JSE').symbol('S0').exchange_code, 'JSE')
@@ -0,0 +1,322 @@
+'''Index of the symbols listed on an exchange and snapshots of the
+listings to find what changed between refreshes'''
+
+import bisect
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from json.decoder import JSONDecodeError
+
+from .client import get_client
+from .concurrency import fetch_all
+from .errors import SymbolNotFoundError
+from .symbol import Symbol, SymbolSet
+
+__all__ = ['SymbolUniverse', 'UniverseDiff', 'UniverseStore']
+
+
+class SymbolUniverse(object):
+    '''The listings of an exchange indexed by code
+
+    listings are the dicts Exchange.get_symbols returns. Lookup by code
+    is a dict access, prefix search is a binary search of the sorted
+    codes and Symbol instances are shared with Symbol.get'''
+    def __init__(self, listings, exchange_code):
+        '''Index listings of the exchange with exchange_code'''
+        self.exchange_code = exchange_code
+        self.listings = list(listings)
+        self._by_code = {
+            listing['Code']: listing for listing in self.listings
+        }
+        self._codes = sorted(self._by_code)
+
+    @classmethod
+    def from_exchange(cls, exchange):
+        '''Stream the listings of an Exchange into a universe'''
+        listings = list(exchange.iter_symbols())
+        if len(listings) == 1 and 'message' in listings[0]:
+            raise SymbolNotFoundError(listings[0]['message'])
+        return cls(listings, exchange.exchange_code)
+
+    def __len__(self):
+        return len(self._by_code)
+
+    def __contains__(self, code):
+        return code in self._by_code
+
+    def __getitem__(self, code):
+        '''The listing dict for a code'''
+        return self._by_code[code]
+
+    def __iter__(self):
+        return iter(self.listings)
+
+    def __repr__(self):
+        return f'SymbolUniverse({ self.exchange_code }, { len(self) } symbols)'
+
+    def symbol(self, code):
+        '''The shared Symbol for a listed code'''
+        if code not in self._by_code:
+            raise SymbolNotFoundError(f'{ code }.{ self.exchange_code }')
+        return Symbol.get(code, self.exchange_code)
+
+    def filter(self, **fields):
+        '''A universe of the listings matching every field, for example
+        filter(Type='ETF', Currency='USD')'''
+        return SymbolUniverse(
+            [
+                listing for listing in self.listings
+                if all(listing.get(field) == value
+                       for field, value in fields.items())
+            ],
+            self.exchange_code
+        )
+
+    def search(self, prefix):
+        '''The listings whose code starts with prefix, sorted by code'''
+        start = bisect.bisect_left(self._codes, prefix)
+        end = bisect.bisect_left(self._codes, prefix + '\U0010ffff', start)
+        return [self._by_code[code] for code in self._codes[start:end]]
+
+    def symbol_set(self, codes=None):
+        '''A SymbolSet of listed codes, or of every listing'''
+        if codes is None:
+            codes = self._by_code
+        return SymbolSet.from_symbols(self.symbol(code) for code in codes)
+
+
+def listing_hash(listing):
+    '''A digest of a listing that does not depend on its key order'''
+    return hashlib.sha1(
+        json.dumps(listing, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class UniverseDiff(object):
+    '''The listings added to, removed from and changed on an exchange
+    since its last snapshot
+
+    changed holds (old, new) listing pairs. not_modified is True when the
+    api answered the conditional request with a 304 or sent the same
+    body as last time, the listings were not parsed then. initial is True
+    for the first snapshot of an exchange, every listing is added'''
+    def __init__(self, exchange_code, added=(), removed=(), changed=(), *,
+                 not_modified=False, initial=False):
+        self.exchange_code = exchange_code
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = list(changed)
+        self.not_modified = not_modified
+        self.initial = initial
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return f'UniverseDiff({ self.exchange_code }, ' \
+            f'+{ len(self.added) } -{ len(self.removed) } ' \
+            f'~{ len(self.changed) })'
+
+    def added_symbols(self):
+        '''A SymbolSet of the new listings, to fetch their history'''
+        return SymbolSet.from_symbols(
+            Symbol.get(listing['Code'], self.exchange_code)
+            for listing in self.added
+        )
+
+
+class UniverseStore(object):
+    '''Snapshots of exchange listings in sqlite to diff refreshes against
+
+    refresh sends the ETag and Last-Modified of the last snapshot as a
+    conditional request. When the api does not answer with a 304 the
+    body is hashed and only parsed and compared listing by listing if
+    the hash changed. Can share a file with EODCache and Backfill'''
+    def __init__(self, path='eod_cache.sqlite'):
+        '''Open or create the snapshot tables in the sqlite file at path'''
+        self.path = path
+        self.stats = {'requests': 0, 'not_modified': 0, 'diffed': 0}
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS universe_snapshots ('
+                'exchange_code TEXT PRIMARY KEY, etag TEXT, '
+                'last_modified TEXT, content_hash TEXT, checked_at REAL)'
+            )
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS universe_listings ('
+                'exchange_code TEXT, code TEXT, position INTEGER, '
+                'listing_hash TEXT, listing TEXT, '
+                'PRIMARY KEY (exchange_code, code)) WITHOUT ROWID'
+            )
+
+    def snapshot(self, exchange_code):
+        '''The etag, last_modified, content_hash and checked_at time of
+        the last snapshot of an exchange, None if there is none'''
+        with self._lock:
+            row = self._connection.execute(
+                'SELECT etag, last_modified, content_hash, checked_at '
+                'FROM universe_snapshots WHERE exchange_code = ?',
+                (exchange_code,)
+            ).fetchone()
+        if row is None:
+            return None
+        return dict(zip(
+            ('etag', 'last_modified', 'content_hash', 'checked_at'), row))
+
+    def listings(self, exchange_code):
+        '''The listings of the last snapshot in the order the api sent'''
+        with self._lock:
+            rows = self._connection.execute(
+                'SELECT listing FROM universe_listings '
+                'WHERE exchange_code = ? ORDER BY position',
+                (exchange_code,)
+            ).fetchall()
+        return [json.loads(listing) for listing, in rows]
+
+    def universe(self, exchange_code):
+        '''A SymbolUniverse of the last snapshot without a request'''
+        return SymbolUniverse(self.listings(exchange_code), exchange_code)
+
+    def refresh(self, exchange_code):
+        '''Get the listings of an exchange if they changed, store them and
+        return a UniverseDiff against the last snapshot
+
+        Raises SymbolNotFoundError with the api's message when it sends
+        no listings'''
+        from .exchange import Exchange
+
+        exchange = Exchange.get(exchange_code)
+        snapshot = self.snapshot(exchange_code)
+        headers = {}
+        if snapshot is not None:
+            if snapshot['etag']:
+                headers['If-None-Match'] = snapshot['etag']
+            if snapshot['last_modified']:
+                headers['If-Modified-Since'] = snapshot['last_modified']
+        client = get_client()
+        response = client.get(
+            f'exchanges/{ exchange.exchange_code }',
+            params={'fmt': 'json'},
+            headers=headers
+        )
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        content_hash = hashlib.sha256(response.content).hexdigest()
+        with self._lock:
+            self.stats['requests'] += 1
+        if snapshot is not None and (
+                response.status_code == 304
+                or content_hash == snapshot['content_hash']):
+            if response.status_code == 304:
+                etag = etag or snapshot['etag']
+                last_modified = last_modified or snapshot['last_modified']
+                content_hash = snapshot['content_hash']
+            with self._lock, self._connection:
+                self.stats['not_modified'] += 1
+                self._save_snapshot(
+                    exchange_code, etag, last_modified, content_hash)
+            return UniverseDiff(exchange_code, not_modified=True)
+
+        try:
+            listings = client.parse(response)
+        except JSONDecodeError:
+            raise SymbolNotFoundError(
+                response.content.decode('utf-8', 'replace')) from None
+        if isinstance(listings, dict):
+            raise SymbolNotFoundError(listings.get('message', listings))
+        return self._store(
+            exchange_code, listings, etag, last_modified, content_hash,
+            initial=snapshot is None)
+
+    def _store(self, exchange_code, listings, etag, last_modified,
+               content_hash, *, initial):
+        '''Diff listings against the stored ones and replace them'''
+        rows = []
+        added = []
+        changed = []
+        seen = set()
+        with self._lock:
+            stored = {
+                code: (digest, listing)
+                for code, digest, listing in self._connection.execute(
+                    'SELECT code, listing_hash, listing '
+                    'FROM universe_listings WHERE exchange_code = ?',
+                    (exchange_code,)
+                )
+            }
+        for listing in listings:
+            code = listing['Code']
+            if code in seen:
+                continue
+            seen.add(code)
+            digest = listing_hash(listing)
+            previous = stored.get(code)
+            if previous is None:
+                added.append(listing)
+            elif previous[0] != digest:
+                changed.append((json.loads(previous[1]), listing))
+            rows.append((
+                exchange_code, code, len(rows), digest, json.dumps(listing)))
+        removed = [
+            json.loads(listing) for code, (digest, listing) in stored.items()
+            if code not in seen
+        ]
+        with self._lock, self._connection:
+            self.stats['diffed'] += 1
+            self._connection.execute(
+                'DELETE FROM universe_listings WHERE exchange_code = ?',
+                (exchange_code,)
+            )
+            self._connection.executemany(
+                'INSERT INTO universe_listings VALUES (?, ?, ?, ?, ?)', rows)
+            self._save_snapshot(
+                exchange_code, etag, last_modified, content_hash)
+        return UniverseDiff(
+            exchange_code, added, removed, changed, initial=initial)
+
+    def _save_snapshot(self, exchange_code, etag, last_modified,
+                       content_hash):
+        '''Record the validators of a snapshot, the lock must be held'''
+        self._connection.execute(
+            'INSERT OR REPLACE INTO universe_snapshots VALUES (?, ?, ?, ?, ?)',
+            (exchange_code, etag, last_modified, content_hash, time.time())
+        )
+
+    def refresh_all(self, exchange_codes=None, *, workers=8,
+                    max_per_host=None):
+        '''Refresh every exchange, by default all of EXCHANGE_CODES
+
+        Returns a dict of the UniverseDiff of each exchange and a dict of
+        the error of each exchange that failed'''
+        from .errors import REQUEST_ERRORS
+        from .exchange import EXCHANGES
+
+        def refresh(exchange_code):
+            try:
+                return self.refresh(exchange_code), None
+            except REQUEST_ERRORS as error:
+                return None, error
+
+        if exchange_codes is None:
+            exchange_codes = list(EXCHANGES)
+        diffs = {}
+        errors = {}
+        for exchange_code, (diff, error) in zip(
+                exchange_codes,
+                fetch_all(
+                    refresh,
+                    exchange_codes,
+                    workers=workers,
+                    max_per_host=max_per_host,
+                    url=get_client().api_url)):
+            if error is None:
+                diffs[exchange_code] = diff
+            else:
+                errors[exchange_code] = error
+        return diffs, errors
+
+    def close(self):
+        self._connection.close()
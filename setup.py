@@ -13,6 +13,12 @@ setup(
     classifiers = [],
     license='GPLv3',
     install_requires=['requests>=2,<3'],
+    extras_require={
+        'async': ['aiohttp>=3,<4'],
+        'fast': ['orjson>=3'],
+        'numpy': ['numpy>=1.20'],
+        'parquet': ['numpy>=1.20', 'pyarrow>=11'],
+    },
     python_requires='>=3.6',
     test_suite='nose.collector',
     tests_require=['nose'],